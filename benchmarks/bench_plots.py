@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+"""
+Times every plot type on synthetic datasets of growing size and compares the results with a stored baseline.
+Run from the GraphScripts folder:
+
+    python3 benchmarks/bench_plots.py                          all plot types at 10^2 to 10^6 rows
+    python3 benchmarks/bench_plots.py violin heatmap --sizes 1000 100000
+    python3 benchmarks/bench_plots.py --save-baseline          store the results as the new baseline
+    python3 benchmarks/bench_plots.py --threshold 0.5          flag cases 50% slower (or larger) than the baseline
+
+Every (plot type, size) case runs in a fresh interpreter, so its peak memory is its own and imports are not
+shared between cases. The plot types use the CONFIG of their script (see functions.batch.PLOT_SCRIPTS) with
+the data-specific settings (orders, palettes, axis limits, filters) removed, and the time of each stage is recorded:
+
+    load        read_plot_data on the .csv file (first read, so it includes making the dataset cache)
+    transform   the work done before the plot function: the bar summary table, or the plate tiles
+    layout      the plot function, which builds the figure
+    draw        drawing the figure once with Agg (this is where the swarm layout runs)
+    save        writing the svg file (export_figure)
+
+The command exits with status 1 if a case is slower or uses more memory than the baseline allows. The baseline is
+not part of the repository, since timings depend on the computer: the first run with --save-baseline creates
+benchmarks/baseline.json, and until then the results are only printed.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+BASELINE = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+SIZES = [100, 1000, 10_000, 100_000, 1_000_000]
+STAGES = ["load", "transform", "layout", "draw", "save"]
+THRESHOLD = 0.25                        #allowed slowdown/memory growth over the baseline (0.25 = 25%)
+MIN_SECONDS = 0.05                      #differences in total time smaller than this are never regressions
+MIN_RSS_MB = 20                         #differences in peak memory smaller than this are never regressions
+CASE_TIMEOUT = 900                      #seconds before a case is stopped
+MAX_ROWS = {"clustermap": 10_000}       #larger cases are skipped (average linkage needs all n^2 / 2 distances)
+
+# plot type: (synthetic dataset of benchmarks/datagen.py, config fields set for its columns)
+SCHEMAS = {
+    "bar": ("tissue_table", {}),
+    "barset": ("tissue_table", {}),
+    "clustermap": ("expression_table", {"index_col": 0}),
+    "facetgrid": ("tissue_table", {}),
+    "facetviolin": ("tissue_table", {}),
+    "heatmap": ("plate_table", {}),
+    "line": ("time_table", {}),
+    "plates": ("plate_table", {"plate_column": "Plate"}),
+    "qpcr_bar": ("tissue_table", {"x": "Tissue", "y": "Log_Copies", "hue": "Treatment"}),
+    "violin": ("tissue_table", {}),
+    "volcano": ("volcano_table", {"ratio": "log2", "log_pvalues": False}),
+}
+# script settings that only fit the real datasets
+DATA_SPECIFIC = {"order": None, "hue_order": None, "col_order": None, "palette": None, "ylim": None, "xticks": None,
+                 "index_col": None, "filter_equals": None, "filter_exclude": None, "chunksize": None,
+                 "stat_filter": None, "qpcr": None, "stats": None, "debug_show_plot": False}
+
+def benchmark_config(plot_type: str):
+    """The CONFIG of the plot type's script, set up for the synthetic dataset."""
+    import dataclasses
+    from functions.batch import load_script_config
+
+    config, _ = load_script_config(plot_type)
+    names = {field.name for field in dataclasses.fields(config)}
+    changes = {name: value for name, value in DATA_SPECIFIC.items() if name in names}
+    return dataclasses.replace(config, **{**changes, **SCHEMAS[plot_type][1]})
+
+def run_case(plot_type: str, n_rows: int, workdir: str) -> dict:
+    """Runs one case in this process and returns the time of every stage (seconds) and the peak memory (MB)."""
+    import resource
+    import datagen
+    import functions.parameters.all_file_funcs as myfunc
+    from functions.batch import PLOT_SCRIPTS, SUMMARY_PLOTS
+
+    myfunc.set_plot_backend(debug_show_plot=False)
+    import functions.plots as myplots
+    from functions.plots.heatmaps import plate_tiles
+    from functions.plots.output import export_figure
+
+    os.chdir(workdir)                   #the linkage cache goes to the temporary folder, so every run clusters again
+    config = benchmark_config(plot_type)
+    plot_name = PLOT_SCRIPTS[plot_type][1]
+    dataset = getattr(datagen, SCHEMAS[plot_type][0])(n_rows)
+    filename = os.path.join(workdir, f"{plot_type}_{n_rows}.csv")
+    dataset.to_csv(filename, index=False)
+
+    timings = {}
+    def stage(name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    df = stage("load", myplots.read_plot_data, filename, config)
+    if plot_name in SUMMARY_PLOTS:
+        summary = stage("transform", myplots.summarize_bars, df, config)
+        fig = stage("layout", getattr(myplots, plot_name), df, config, summary)
+    elif plot_name == "plate_heatmap":
+        tiles = stage("transform", lambda: list(plate_tiles(df, config)))
+        fig = stage("layout", myplots.tiled_heatmap, tiles, config)
+    else:
+        timings["transform"] = 0.0
+        fig = stage("layout", getattr(myplots, plot_name), df, config)
+    stage("draw", fig.canvas.draw)
+    stage("save", export_figure, fig, [os.path.join(workdir, f"{plot_type}_{n_rows}.svg")], bbox_inches="tight")
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss     #kilobytes on Linux
+    return {"plot": plot_type, "rows": n_rows, **timings, "total": sum(timings[name] for name in STAGES),
+            "peak_rss_mb": peak_kb / 1024}
+
+def run_in_subprocess(plot_type: str, n_rows: int, workdir: str) -> dict:
+    """Runs a case in a fresh interpreter. Failed cases have an error message instead of timings."""
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", plot_type, str(n_rows), workdir]
+    try:
+        proc = subprocess.run(command, cwd=REPO_DIR, capture_output=True, text=True, timeout=CASE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return {"plot": plot_type, "rows": n_rows, "error": f"timed out after {CASE_TIMEOUT} s"}
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines() or [f"exited with status {proc.returncode}"]
+        return {"plot": plot_type, "rows": n_rows, "error": lines[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def case_key(result: dict) -> str:
+    return f"{result['plot']}/{result['rows']}"
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """Lists what got worse than the baseline case beyond the threshold."""
+    regressions = []
+    if result["total"] > baseline["total"] * (1 + threshold) and result["total"] - baseline["total"] > MIN_SECONDS:
+        regressions.append(f"time {baseline['total']:.2f} -> {result['total']:.2f} s")
+    if (result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + threshold)
+            and result["peak_rss_mb"] - baseline["peak_rss_mb"] > MIN_RSS_MB):
+        regressions.append(f"memory {baseline['peak_rss_mb']:.0f} -> {result['peak_rss_mb']:.0f} MB")
+    return regressions
+
+def main(argv: list[str]|None = None) -> int:
+    from functions.batch import PLOT_SCRIPTS
+
+    parser = argparse.ArgumentParser(description="Benchmarks every plot type on synthetic data")
+    parser.add_argument("plots", nargs="*", default=sorted(SCHEMAS), help="plot types (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES, help="numbers of rows (default: 10^2 to 10^6)")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file (default: benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results in the baseline file")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown over the baseline (default: 0.25)")
+    parser.add_argument("--output", default=None, help="also write the results to this .json file")
+    parser.add_argument("--run-case", nargs=3, metavar=("PLOT", "ROWS", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case is not None:
+        plot_type, n_rows, workdir = args.run_case
+        print(json.dumps(run_case(plot_type, int(n_rows), workdir)))
+        return 0
+
+    unknown = [name for name in args.plots if name not in SCHEMAS]
+    if len(unknown) > 0:
+        print(f"Unknown plot type(s): {', '.join(unknown)}. Choose from: {', '.join(sorted(PLOT_SCRIPTS))}")
+        return 1
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    else:
+        print(f"No baseline at {args.baseline} yet, run with --save-baseline to create it.")
+
+    results, regressed = [], []
+    print(f"{'plot':<12} {'rows':>9} " + " ".join(f"{name:>9}" for name in [*STAGES, "total"]) + f" {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for plot_type in args.plots:
+            for n_rows in args.sizes:
+                if n_rows > MAX_ROWS.get(plot_type, n_rows):
+                    print(f"{plot_type:<12} {n_rows:>9} skipped (more than {MAX_ROWS[plot_type]} rows)")
+                    continue
+                result = run_in_subprocess(plot_type, n_rows, workdir)
+                results.append(result)
+                if "error" in result:
+                    print(f"{plot_type:<12} {n_rows:>9} FAILED: {result['error']}")
+                    continue
+                regressions = compare(result, baseline[case_key(result)], args.threshold) if case_key(result) in baseline else []
+                if regressions:
+                    regressed.append(case_key(result))
+                print(f"{plot_type:<12} {n_rows:>9} " + " ".join(f"{result[name]:>9.3f}" for name in [*STAGES, "total"])
+                      + f" {result['peak_rss_mb']:>8.0f}" + (f"  SLOWER: {', '.join(regressions)}" if regressions else ""))
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=1)
+    if args.save_baseline:
+        baseline.update({case_key(result): result for result in results if "error" not in result})
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=1, sort_keys=True)
+        print(f"Saved the baseline to {args.baseline}")
+    if regressed:
+        print(f"{len(regressed)} case(s) regressed beyond {args.threshold:.0%} of the baseline: {', '.join(regressed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+
+"""Times the ΔCt / ΔΔCt pipeline in functions.qpcr on a synthetic million-well export.
+Run from the GraphScripts folder: python3 benchmarks/bench_qpcr.py [number of wells]"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import qpcr_export
+from functions.qpcr import QPCRConfig, relative_expression
+
+if __name__ == "__main__":
+    n_wells = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    export = qpcr_export(n_wells)
+    config = QPCRConfig(control="Uninfected", sample_cols=["Sample ID"], match_cols=["Tissue"])
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        result = relative_expression(export, config)
+        timings.append(time.perf_counter() - start)
+    print(f"relative_expression: {len(export):,} wells -> {len(result):,} rows, best of 3: {min(timings):.3f} s")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+"""Times the Mann-Whitney test of functions.stats on balanced and very unbalanced pairs of samples, with and without
+ties, and checks every p-value against scipy.stats.mannwhitneyu (exit status 1 if one differs).
+Run from the GraphScripts folder: python3 benchmarks/bench_stats.py"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from scipy.stats import mannwhitneyu
+from functions.stats import mann_whitney
+
+# (n1, n2, ties): small tie-free samples use the exact distribution, however large the other sample is
+CASES = [(3, 4, False), (8, 8, False), (5, 1500, False), (8, 3000, False), (5, 1500, True), (500, 800, False), (500, 800, True)]
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    failed = []
+    for n1, n2, ties in CASES:
+        a, b = rng.normal(0, 1, n1), rng.normal(0.3, 1, n2)
+        if ties:                                        #values rounded to one decimal, like CTs
+            a, b = np.round(a, 1), np.round(b, 1)
+        a, b = np.sort(a), np.sort(b)
+        start = time.perf_counter()
+        statistic, pvalue = mann_whitney(a, b)
+        elapsed = time.perf_counter() - start
+        expected = mannwhitneyu(a, b, alternative="two-sided")
+        ok = np.isclose(statistic, expected.statistic) and np.isclose(pvalue, expected.pvalue, rtol=1e-9, atol=0)
+        if not ok:
+            failed.append(f"{n1} vs {n2}")
+        print(f"{n1:>4} vs {n2:>5}{' ties' if ties else '':<6} p = {pvalue:.6g} (scipy {expected.pvalue:.6g}) "
+              f"in {elapsed * 1000:.2f} ms{'' if ok else '  MISMATCH'}")
+    if failed:
+        print(f"p-values different from scipy for: {', '.join(failed)}")
+        sys.exit(1)
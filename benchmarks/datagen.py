@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+"""Synthetic datasets shaped like the real files in datasets/, at any number of rows, for the benchmarks."""
+
+import numpy as np
+import pandas as pd
+
+TISSUES = ["mLN", "PeyersPatch", "Colon", "Spleen", "Liver", "Cecum"]
+TREATMENTS = ["Uninfected", "MHV-Y", "yHV68", "yHV68 + MHV-Y"]
+CONDITIONS = ["WT", "KO", "Het"]
+
+def tissue_table(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """A long table of Tissue/Treatment/Log_Copies rows (like 2022_10_12_MHVY_dHE.csv), with a few replicates per
+    group for small tables and thousands for large ones."""
+    rng = np.random.default_rng(seed)
+    tissue = rng.integers(0, len(TISSUES), n_rows)
+    treatment = rng.integers(0, len(TREATMENTS), n_rows)
+    log_copies = np.clip(rng.normal(1 + 0.5 * tissue + 0.6 * treatment, 0.6), 0, None)
+    return pd.DataFrame({"Tissue": np.array(TISSUES)[tissue], "Log_Copies": log_copies,
+                         "Treatment": np.array(TREATMENTS)[treatment]})
+
+def time_table(n_rows: int, n_times: int = 24, seed: int = 0) -> pd.DataFrame:
+    """A time course of Time/Condition/Copies rows, the shape LinePlot.py expects."""
+    rng = np.random.default_rng(seed)
+    time = 2 * (1 + rng.integers(0, n_times, n_rows))
+    condition = rng.integers(0, len(CONDITIONS), n_rows)
+    copies = rng.lognormal(np.log(time * (1 + condition)), 0.4)
+    return pd.DataFrame({"Time": time, "Condition": np.array(CONDITIONS)[condition], "Copies": copies})
+
+def plate_table(n_rows: int, wells: int = 384, max_plates: int = 24, seed: int = 0) -> pd.DataFrame:
+    """Well Positions/LogCopies rows (like Data.csv) filling up to max_plates plates, named in a Plate column.
+    Larger tables measure every well more than once."""
+    from functions.plates import PLATE_FORMATS
+
+    rng = np.random.default_rng(seed)
+    layout = PLATE_FORMATS[wells]
+    labels = np.array([f"{row}{column}" for row in layout.row_labels() for column in layout.column_labels()])
+    index = np.arange(n_rows)
+    return pd.DataFrame({"LogCopies": rng.gamma(4, 0.6, n_rows), "Well Positions": labels[index % wells],
+                         "Plate": np.char.add("Plate", ((index // wells) % max_plates + 1).astype(str))})
+
+def volcano_table(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """A GF/SPF/Pval table indexed by feature name (like Duod_GFSPF.csv): the mean expression in germ-free and
+    specific pathogen free mice, and the p-value of their difference."""
+    rng = np.random.default_rng(seed)
+    gf = rng.lognormal(-0.5, 0.6, n_rows)
+    effect = rng.normal(0, 0.4, n_rows) * (rng.random(n_rows) < 0.2)
+    spf = gf * np.exp(effect + rng.normal(0, 0.1, n_rows))
+    pval = np.clip(np.exp(-np.abs(effect) * rng.gamma(8, 1, n_rows)), 0, 1)
+    index = pd.Index([f"feature_{idx}" for idx in range(n_rows)])
+    return pd.DataFrame({"GF": gf, "SPF": spf, "Pval": pval}, index=index)
+
+def expression_table(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """The volcano_table with the feature names in a first Feature column, the shape ClusterMap.py reads."""
+    return volcano_table(n_rows, seed).rename_axis("Feature").reset_index()
+
+def qpcr_export(n_wells: int, n_targets: int = 4, replicates: int = 3, seed: int = 0) -> pd.DataFrame:
+    """Makes a QuantStudio-like long table: every sample has each target (GAPDH first) in technical replicates."""
+    rng = np.random.default_rng(seed)
+    n_samples = max(1, n_wells // (n_targets * replicates))
+    targets = ["GAPDH"] + [f"Target{idx}" for idx in range(1, n_targets)]
+    sample = np.repeat(np.arange(n_samples), n_targets * replicates)
+    target = np.tile(np.repeat(np.arange(n_targets), replicates), n_samples)
+    group = np.where(sample % 4 == 0, "Uninfected", "Infected")
+    tissue = np.array(["mLN", "PP", "Colon", "Spleen"])[(sample // 4) % 4]
+    ct = 20 + 5 * target + rng.normal(0, 0.3, len(sample)) - 2 * (group == "Infected") * (target > 0)
+    ct[rng.random(len(ct)) < 0.01] = np.nan                 #Undetermined wells
+    return pd.DataFrame({"Sample Name": pd.Categorical(group), "Sample ID": [f"S{idx}" for idx in sample],
+                         "Tissue": pd.Categorical(tissue), "Target Name": pd.Categorical(np.array(targets)[target]),
+                         "CT": ct})
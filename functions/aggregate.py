@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""
+Per-group summary statistics (n, mean, SD, SEM and a t or bootstrap confidence interval of the mean) that the plots draw
+from, computed with a single grouping of the rows and np.bincount, and small enough to save next to the figure.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
+from functions.trace import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SUMMARY_COLUMNS = ["n", "mean", "sd", "sem", "ci_low", "ci_high", "max"]
+ERRORBARS = ["sd", "sem", "ci", "boot"]
+CI_LEVEL = 0.95                         #confidence level of ci_low/ci_high
+
+def t_quantile(q: float, df):
+    """Quantile of Student's t distribution for an array of degrees of freedom (NaN below 1 degree of freedom)."""
+    import numpy as np
+    from scipy.stats import t
+
+    df = np.asarray(df, dtype=float)
+    return np.where(df >= 1, t.ppf(q, np.maximum(df, 1)), np.nan)
+
+@traced()
+def summarize(df: pd.DataFrame, y: str, by: list[str], confidence: float = CI_LEVEL, n_boot: int|None = None,
+              seed: int = 0) -> pd.DataFrame:
+    """Summarizes y for every combination of the by columns: n, mean, sd (n - 1 denominator, like seaborn's "sd"
+    error bars), sem, the confidence interval of the mean and the largest value. Missing y values are ignored, and groups with a single
+    value have no sd/sem/ci. With n_boot, boot_low and boot_high add a percentile bootstrap interval of the mean
+    (functions.stats.bootstrap_ci) at the same confidence."""
+    import numpy as np
+    from functions.qpcr import group_codes
+
+    codes, summary = group_codes(df, by)
+    values = df[y].to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    n_groups = len(summary)
+
+    n = np.bincount(codes, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(codes, weights=values, minlength=n_groups) / n
+        squares = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=n_groups)
+        sd = np.sqrt(squares / (n - 1))
+        sem = sd / np.sqrt(n)
+    half_width = t_quantile((1 + confidence) / 2, n - 1) * sem
+    largest = np.full(n_groups, np.nan)
+    if len(values) > 0:
+        largest[n > 0] = -np.inf
+        np.maximum.at(largest, codes, values)
+
+    summary["n"] = n
+    summary["mean"] = mean
+    summary["sd"] = np.where(n > 1, sd, np.nan)
+    summary["sem"] = np.where(n > 1, sem, np.nan)
+    summary["ci_low"] = mean - half_width
+    summary["ci_high"] = mean + half_width
+    summary["max"] = largest
+    if n_boot is not None:
+        from functions.stats.bootstrap import bootstrap_ci
+
+        order = np.argsort(codes, kind="stable")
+        groups = np.split(values[order], np.cumsum(n)[:-1])
+        summary["boot_low"], summary["boot_high"] = bootstrap_ci(groups, 100 * confidence, n_boot, seed)
+    return summary
+
+def error_range(summary: pd.DataFrame, errorbar: str|None):
+    """The low and high end of the error bar of every summary row."""
+    import numpy as np
+
+    if errorbar is None:
+        return summary["mean"].to_numpy(), summary["mean"].to_numpy()
+    if errorbar == "ci":
+        return summary["ci_low"].to_numpy(), summary["ci_high"].to_numpy()
+    if errorbar == "boot":
+        return summary["boot_low"].to_numpy(), summary["boot_high"].to_numpy()
+    if errorbar in ("sd", "sem"):
+        spread = np.nan_to_num(summary[errorbar].to_numpy())
+        return summary["mean"].to_numpy() - spread, summary["mean"].to_numpy() + spread
+    print(f"Unknown errorbar {errorbar!r}, use one of {', '.join(ERRORBARS)} or None.")
+    sys.exit(1)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+"""Renders GraphScripts plots for every dataset in a folder using a pool of worker processes."""
+
+import os
+import sys
+import glob
+import time
+import runpy
+import warnings
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import functions.parameters.all_file_funcs as myfunc
+import functions.trace as trace
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_DIR = os.path.join(REPO_DIR, "scripts")
+
+# plot type name: (script in the scripts folder holding the CONFIG to use, plot function in functions.plots[,
+# variable of the script with the output name, when it isn't PLOT_TYPE])
+PLOT_SCRIPTS = {
+    "bar": ("BarPlot_Graph.py", "qpcr_bar"),
+    "barset": ("Make_BarSetPlot.py", "barset"),
+    "clustermap": ("ClusterMap.py", "clustered_heatmap"),
+    "facetgrid": ("MakeFacetGridPlot.py", "facet_grid"),
+    "facetviolin": ("MakeFacetGrid_ViolinPlot.py", "facet_violin"),
+    "heatmap": ("HeatMap.py", "heatmap"),
+    "line": ("LinePlot.py", "line"),
+    "plates": ("HeatMap.py", "plate_heatmap", "PLATES_PLOT_TYPE"),
+    "qpcr_bar": ("qPCR_BarPlot.py", "qpcr_bar"),
+    "violin": ("MakeViolinPlot.py", "violin"),
+    "volcano": ("VolcanoPlot.py", "volcano"),
+}
+
+# plot functions drawn from a summary table (functions.plots.summarize_bars), which is saved next to the image
+SUMMARY_PLOTS = {"qpcr_bar", "barset"}
+
+_script_configs = {}
+
+@dataclass
+class RenderResult:
+    """Stores the outcome of a single (plot type, dataset) render job."""
+    plot_type: str
+    dataset: str
+    output: str
+    ok: bool
+    message: str = ""
+    cache_key: str = ""
+    cached: bool = False
+    spans: list|None = None             #timing spans of the job, when tracing (functions.trace)
+
+def find_datasets(folder: str = "", pattern: str = "*.csv") -> list[str]:
+    """Lists the datasets in a folder of datasets/ as paths relative to datasets/ (the form get_file_from_cmd expects)."""
+    data_dir = myfunc.get_data_path("")
+    found = sorted(glob.glob(os.path.join(data_dir, folder, pattern)))
+    return [os.path.relpath(path, data_dir) for path in found if os.path.isfile(path)]
+
+def _init_worker(workdir: str, tracing: bool = False, trace_memory: bool = True):
+    """Sets up a worker process: non-interactive Agg backend and the repo folder as the working directory.
+    Workers are reused for many jobs, so the plotting libraries are only imported once per worker, by its first job.
+    With tracing, the worker records spans and returns them with each job's result instead of writing a file."""
+    if tracing:
+        trace.enable(memory=trace_memory)
+        trace.disable_output()
+    myfunc.set_plot_backend(debug_show_plot=False)
+    warnings.filterwarnings("ignore", message=".*non-interactive.*")  #plt.show() is a no-op under Agg
+    os.chdir(workdir)
+    if workdir not in sys.path:
+        sys.path.insert(0, workdir)
+
+def load_script_config(plot_type: str) -> tuple:
+    """Gets the (CONFIG, PLOT_TYPE) defined at the top of a plot type's script (PLOT_TYPE is the output name, or the
+    variable named by the third PLOT_SCRIPTS element). Scripts are only run once per worker, and their plotting code
+    is skipped because it sits under `if __name__ == "__main__"`."""
+    if plot_type not in _script_configs:
+        script = PLOT_SCRIPTS[plot_type]
+        script_vars = runpy.run_path(os.path.join(SCRIPT_DIR, script[0]), run_name="graphscripts_config")
+        output_name = script[2] if len(script) > 2 else "PLOT_TYPE"
+        _script_configs[plot_type] = (script_vars["CONFIG"], script_vars[output_name])
+    return _script_configs[plot_type]
+
+def render_job(plot_type: str, dataset: str, cache_dir: str|None = None) -> RenderResult:
+    """Renders one plot type for one dataset with the plot function and the configuration of its script.
+    With a cache_dir, an image already rendered from the same dataset bytes and configuration is reused instead."""
+    with trace.span("render", plot=plot_type, dataset=dataset):
+        result = _render(plot_type, dataset, cache_dir)
+    if trace.enabled():
+        result.spans = trace.take_spans()
+    return result
+
+def _render(plot_type: str, dataset: str, cache_dir: str|None) -> RenderResult:
+    import functions.plots as myplots
+    from functions.cache import RenderCache, render_key
+    from functions.plots.output import SUMMARY_SUFFIX, MATRIX_SUFFIX
+
+    output = ""
+    cache_key = ""
+    savefig_kws = {"bbox_inches": "tight"}
+    try:
+        config, output_type = load_script_config(plot_type)
+        plot_name = PLOT_SCRIPTS[plot_type][1]
+        dataset_path = myfunc.get_data_path(dataset)
+        output = myfunc.my_output_file(dataset, plot_type=output_type, extension="svg")
+        if cache_dir is not None:
+            cache = RenderCache(cache_dir, read_manifest=False)
+            cache_key = render_key(dataset_path, config, plot_name, "svg", **savefig_kws)
+            if cache.lookup(cache_key, output):
+                return RenderResult(plot_type, dataset, output, True, "(cached)", cache_key, True)
+
+        summary, matrix = None, None
+        if plot_name == "heatmap":                      #streamed into the matrix when the config has a chunksize
+            matrix = myplots.read_heatmap_matrix(dataset_path, config)
+            fig = myplots.heatmap(None, config, matrix)
+        else:
+            DataSet = myplots.read_plot_data(dataset_path, config)
+            summary = myplots.summarize_bars(DataSet, config) if plot_name in SUMMARY_PLOTS else None
+            if plot_name == "volcano":                  #the table of every feature is saved as the summary, like VolcanoPlot.py
+                from functions.volcano import volcano_table
+                features = volcano_table(DataSet, config)
+                fig = myplots.volcano(DataSet, config, features)
+                summary = features.reset_index()
+            elif summary is not None:
+                fig = getattr(myplots, plot_name)(DataSet, config, summary)
+            else:
+                fig = getattr(myplots, plot_name)(DataSet, config)
+            if plot_name == "clustered_heatmap":        #saved at full resolution next to the image, like ClusterMap.py
+                matrix = myplots.heatmap_matrix(DataSet, config)
+        start = time.perf_counter()
+        myplots.save_figure(fig, dataset, plot_type=output_type, extension="svg", dpi=config.dpi, table=summary,
+                            matrix=matrix, report=False, **savefig_kws)
+        message = f"({os.path.getsize(output) / 1000:.1f} kB, saved in {time.perf_counter() - start:.2f} s)"
+        if cache_dir is not None:
+            stem = os.path.splitext(output)[0]
+            extras = [stem + suffix for suffix, table in ((SUMMARY_SUFFIX, summary), (MATRIX_SUFFIX, matrix)) if table is not None]
+            cache.add(cache_key, output, extras)
+    except SystemExit as err:
+        return RenderResult(plot_type, dataset, output, False, f"exited with status {err.code}")
+    except Exception as err:
+        return RenderResult(plot_type, dataset, output, False, f"{type(err).__name__}: {err}")
+    finally:
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close("all")
+    return RenderResult(plot_type, dataset, output, True, message, cache_key)
+
+def run_batch(folder: str, plot_types: list[str], jobs: int|None = None, pattern: str = "*.csv",
+              use_cache: bool = True, cache_size_mb: float|None = None, trace_output: str|None = None) -> list[RenderResult]:
+    """Renders every requested plot type for every dataset in the folder, spreading the jobs over a process pool.
+    Unless use_cache is False, images whose dataset and configuration haven't changed are copied from the render
+    cache in generated_images/.cache instead of being plotted again. With a trace_output file, the stages of every
+    job are timed (functions.trace), written to the file at exit and the slowest stages are printed."""
+    from functions.cache import RenderCache, DEFAULT_MAX_BYTES
+
+    unknown = [name for name in plot_types if name not in PLOT_SCRIPTS]
+    if len(unknown) > 0:
+        print(f"Unknown plot type(s): {', '.join(unknown)}. Choose from: {', '.join(sorted(PLOT_SCRIPTS))}")
+        sys.exit(1)
+    output_types = {}
+    for name in plot_types:
+        output_types.setdefault(load_script_config(name)[1], []).append(name)
+    clashes = [names for names in output_types.values() if len(set(names)) > 1]
+    if len(clashes) > 0:                                #their images and tables would overwrite each other
+        print(f"Plot types with the same output file names: {'; '.join(', '.join(names) for names in clashes)}")
+        sys.exit(1)
+
+    datasets = find_datasets(folder, pattern)
+    if len(datasets) == 0:
+        print(f"No files matching {pattern} found in {myfunc.get_data_path(folder)}")
+        sys.exit(1)
+
+    os.makedirs(os.path.join(os.getcwd(), "generated_images"), exist_ok=True)
+    cache = None
+    if use_cache:
+        max_bytes = int(cache_size_mb * 1024 * 1024) if cache_size_mb is not None else DEFAULT_MAX_BYTES
+        cache = RenderCache(max_bytes=max_bytes)
+
+    if trace_output is not None:
+        trace.enable(trace_output, memory=os.environ.get(trace.MEMORY_ENV_VAR, "1") != "0")
+
+    results = []
+    cache_dir = cache.cache_dir if cache is not None else None
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(os.getcwd(), trace.enabled(), trace.memory_enabled())) as pool:
+        futures = [pool.submit(render_job, plot_type, dataset, cache_dir) for dataset in datasets for plot_type in plot_types]
+        for future in as_completed(futures):
+            result = future.result()
+            status = "done" if result.ok else "FAILED"
+            print(f"[{status}] {result.plot_type} {result.dataset} -> {result.output} {result.message}".rstrip())
+            if cache is not None and result.ok:
+                cache.record(result.cache_key, result.output)       #only this process writes the manifest
+            if result.spans:
+                trace.add_spans(result.spans)
+            results.append(result)
+    if cache is not None:
+        cache.save()
+    if trace.enabled():
+        trace.print_slowest(trace.recorded_spans())
+    return results
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+"""Content-addressed cache of rendered images (and the tables saved next to them), so an unchanged dataset + plot
+configuration + plotting code is not plotted twice."""
+
+import os
+import glob
+import json
+import time
+import shutil
+import hashlib
+import dataclasses
+from importlib import metadata
+
+CACHE_VERSION = 2                       #bump to invalidate every cached image (edits of the plotting code are detected)
+CACHE_LIBRARIES = ["matplotlib", "seaborn", "pandas", "numpy"]
+SOURCE_DIRS = ["functions", "scripts"]  #folders whose .py files decide how plots are drawn
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_source_hash = {}
+
+def library_versions() -> dict[str, str]:
+    """Gets the installed versions of the plotting libraries without importing them."""
+    versions = {}
+    for library in CACHE_LIBRARIES:
+        try:
+            versions[library] = metadata.version(library)
+        except metadata.PackageNotFoundError:
+            versions[library] = "missing"
+    return versions
+
+def source_hash() -> str:
+    """Hashes the plotting code (every .py file in SOURCE_DIRS), once per process."""
+    if "digest" not in _source_hash:
+        digest = hashlib.sha256()
+        for folder in SOURCE_DIRS:
+            for path in sorted(glob.glob(os.path.join(REPO_DIR, folder, "**", "*.py"), recursive=True)):
+                digest.update(os.path.relpath(path, REPO_DIR).encode() + b"\0")
+                with open(path, "rb") as source:
+                    digest.update(source.read() + b"\0")
+        _source_hash["digest"] = digest.hexdigest()
+    return _source_hash["digest"]
+
+def render_key(dataset_path: str, config, plot_name: str, extension: str = "svg", **savefig_kws) -> str:
+    """Hashes everything that decides what a rendered image looks like: the bytes of the dataset, the effective plot
+    configuration (orders, palettes, axis columns, ...), the plot function, the output format, the plotting code
+    (source_hash) and the library versions."""
+    digest = hashlib.sha256()
+    with open(dataset_path, "rb") as data:
+        for block in iter(lambda: data.read(1024 * 1024), b""):
+            digest.update(block)
+    settings = {
+        "cache_version": CACHE_VERSION,
+        "config": dataclasses.asdict(config) if dataclasses.is_dataclass(config) else config,
+        "plot": plot_name,
+        "extension": extension,
+        "savefig": savefig_kws,
+        "code": source_hash(),
+        "libraries": library_versions(),
+    }
+    digest.update(json.dumps(settings, sort_keys=True, default=repr).encode())
+    return digest.hexdigest()
+
+class RenderCache:
+    """A size-bounded cache of rendered images stored in one folder, with a manifest.json that records the size and
+    last use of every entry. When the cache grows over max_bytes the least recently used images are removed.
+    The tables a render saves next to its image (<image name>_summary.csv, _matrix.csv) are stored with it as
+    <key>_summary.csv etc. and restored together.
+
+    Looking up and adding images only touches the image files (copies are written to a temporary file and renamed),
+    so they are safe to call from many worker processes at once. The manifest should only be updated by one process,
+    which calls record() for every hit/addition and save() at the end."""
+
+    def __init__(self, cache_dir: str|None = None, max_bytes: int = DEFAULT_MAX_BYTES, read_manifest: bool = True):
+        self.cache_dir = cache_dir or os.path.join(os.getcwd(), "generated_images", ".cache")
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(self.cache_dir, "manifest.json")
+        self.entries = {}
+        if read_manifest and os.path.isfile(self.manifest_path):
+            try:
+                with open(self.manifest_path) as manifest:
+                    self.entries = json.load(manifest).get("entries", {})
+            except (OSError, ValueError):
+                print(f"Could not read {self.manifest_path}, starting with an empty render cache.")
+
+    def path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, key + "." + extension)
+
+    def _extras(self, key: str) -> list[str]:
+        """The cached side files of an entry (<key>_summary.csv, ...)."""
+        return sorted(path for path in glob.glob(os.path.join(self.cache_dir, glob.escape(key) + "_*"))
+                      if not path.endswith(".tmp"))
+
+    def lookup(self, key: str, output: str) -> bool:
+        """Copies a cached image, and the side files stored with it, to the output path. Returns False if the image
+        is not cached."""
+        cached = self.path(key, output.rsplit(".", 1)[-1])
+        if not os.path.isfile(cached):
+            return False
+        stem = os.path.splitext(output)[0]
+        for extra in self._extras(key):
+            _copy_atomic(extra, stem + os.path.basename(extra)[len(key):])
+        _copy_atomic(cached, output)
+        return True
+
+    def add(self, key: str, output: str, extras: list[str]|None = None):
+        """Stores a freshly rendered image in the cache, with the side files the render wrote next to it (paths
+        starting with the image name without extension, e.g. <image name>_summary.csv)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        stem = os.path.splitext(output)[0]
+        for extra in extras or []:
+            _copy_atomic(extra, os.path.join(self.cache_dir, key + extra[len(stem):]))
+        _copy_atomic(output, self.path(key, output.rsplit(".", 1)[-1]))
+
+    def record(self, key: str, output: str):
+        """Marks a cache entry as just used (called after lookup or add)."""
+        extension = output.rsplit(".", 1)[-1]
+        cached = self.path(key, extension)
+        if os.path.isfile(cached):
+            files = [cached, *self._extras(key)]
+            self.entries[key] = {"file": os.path.basename(cached),
+                                 "files": [os.path.basename(path) for path in files],
+                                 "bytes": sum(os.path.getsize(path) for path in files),
+                                 "output": os.path.basename(output),
+                                 "last_used": time.time()}
+
+    def evict(self) -> list[str]:
+        """Removes the least recently used images until the cache fits in max_bytes. Returns the removed keys."""
+        removed = []
+        total = sum(entry["bytes"] for entry in self.entries.values())
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            for name in entry.get("files", [entry["file"]]):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
+            total -= entry["bytes"]
+            removed.append(key)
+        for key in removed:
+            del self.entries[key]
+        return removed
+
+    def save(self):
+        """Evicts old entries and writes the manifest."""
+        self.evict()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w") as manifest:
+            json.dump({"version": CACHE_VERSION, "max_bytes": self.max_bytes, "entries": self.entries}, manifest, indent=1)
+        os.replace(temp_path, self.manifest_path)
+
+def _copy_atomic(source: str, destination: str):
+    """Copies a file through a temporary file so readers never see a half written image."""
+    temp_path = f"{destination}.{os.getpid()}.tmp"
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, destination)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+"""
+Hierarchical clustering of the rows and columns of heatmaps, with the linkage cached per matrix.
+
+The linkage is computed by fastcluster (faster, and without the full distance matrix for euclidean single/ward/
+centroid/median linkage) or by scipy.cluster.hierarchy, whichever is chosen or installed. The optimal leaf ordering
+(scipy) reorders the tree so that neighbouring rows are as similar as possible, which is much slower than the
+linkage itself. Every linkage and leaf order is stored under the hash of the matrix values and the clustering
+settings, in memory and as a .npz file in generated_images/.cache/linkage, so redrawing the same matrix with other
+colors, labels or sizes (even from a new run of the script) skips the distances, the linkage and the reordering.
+"""
+
+import os
+import sys
+import hashlib
+
+LINKAGE_BACKENDS = ["auto", "fastcluster", "scipy"]
+VECTOR_METHODS = ["single", "ward", "centroid", "median"]     #fastcluster methods that don't need the distance matrix
+CACHE_VERSION = 1                       #bump to invalidate the stored linkages
+CACHE_SIZE = 32                         #linkages kept in memory
+
+_linkage_cache = {}
+
+def linkage_backend(backend: str = "auto") -> str:
+    """Resolves "auto" to fastcluster when it is installed and to scipy otherwise. Exits if the backend is missing."""
+    if backend not in LINKAGE_BACKENDS:
+        print(f"Unknown linkage backend {backend!r}, use one of: {', '.join(LINKAGE_BACKENDS)}.")
+        sys.exit(1)
+    for name in (["fastcluster", "scipy"] if backend == "auto" else [backend]):
+        try:
+            __import__(name)
+            return name
+        except ImportError:
+            pass
+    print(f"Clustering needs {'fastcluster or scipy' if backend == 'auto' else backend} (pip install {'scipy' if backend == 'auto' else backend}).")
+    sys.exit(1)
+
+def _clean_values(values):
+    """The matrix as float64 with missing values replaced by their column mean (0 for all-missing columns)."""
+    import numpy as np
+
+    values = np.array(values, dtype=np.float64)
+    missing = np.isnan(values)
+    if missing.any():
+        counts = (~missing).sum(axis=0)
+        sums = np.where(missing, 0, values).sum(axis=0)
+        fill = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        values[missing] = np.broadcast_to(fill, values.shape)[missing]
+    return values
+
+def linkage_key(values, method: str, metric: str, optimal: bool, backend: str) -> str:
+    """Hashes the matrix (shape and values) and the clustering settings."""
+    digest = hashlib.sha256(repr((CACHE_VERSION, values.shape, method, metric, optimal, backend)).encode())
+    digest.update(values.tobytes())
+    return digest.hexdigest()
+
+def leaf_order(linkage):
+    """The leaves of a linkage matrix from left to right (the same order as scipy's leaves_list)."""
+    import numpy as np
+
+    n_leaves = len(linkage) + 1
+    children = linkage[:, :2].astype(np.int64)
+    order, stack = [], [2 * n_leaves - 2]
+    while stack:
+        node = stack.pop()
+        if node < n_leaves:
+            order.append(node)
+        else:
+            left, right = children[node - n_leaves]
+            stack.extend((right, left))
+    return np.array(order, dtype=np.int64)
+
+def _compute_linkage(values, method: str, metric: str, optimal: bool, backend: str):
+    if backend == "fastcluster":
+        import fastcluster
+        if method in VECTOR_METHODS and metric == "euclidean":
+            linkage = fastcluster.linkage_vector(values, method=method, metric=metric)
+        else:
+            linkage = fastcluster.linkage(values, method=method, metric=metric)
+    else:
+        from scipy.cluster import hierarchy
+        linkage = hierarchy.linkage(values, method=method, metric=metric)
+    if optimal:
+        try:
+            from scipy.cluster import hierarchy
+        except ImportError:
+            print("optimal_ordering needs scipy (pip install scipy).")
+            sys.exit(1)
+        linkage = hierarchy.optimal_leaf_ordering(linkage, values, metric=metric)
+    return linkage
+
+def cluster_linkage(values, method: str = "average", metric: str = "euclidean", optimal: bool = False,
+                    backend: str = "auto", cache_dir: str|None = None) -> tuple:
+    """Clusters the rows of a matrix (transpose it to cluster columns). Missing values count as their column mean.
+    Returns the linkage matrix (scipy format) and the leaf order. Results are cached by matrix hash in memory and in
+    cache_dir (generated_images/.cache/linkage by default, False to only cache in memory)."""
+    import numpy as np
+
+    values = _clean_values(values)
+    if len(values) < 2:
+        return np.empty((0, 4)), np.arange(len(values))
+    backend = linkage_backend(backend)
+    key = linkage_key(values, method, metric, optimal, backend)
+    if key in _linkage_cache:
+        return _linkage_cache[key]
+
+    if cache_dir is None:
+        cache_dir = os.path.join(os.getcwd(), "generated_images", ".cache", "linkage")
+    path = os.path.join(cache_dir, key + ".npz") if cache_dir else None
+    if path is not None and os.path.isfile(path):
+        with np.load(path) as stored:
+            result = (stored["linkage"], stored["leaves"])
+    else:
+        linkage = _compute_linkage(values, method, metric, optimal, backend)
+        result = (linkage, leaf_order(linkage))
+        if path is not None:
+            temp_path = f"{path}.{os.getpid()}.tmp.npz"
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.savez(temp_path, linkage=result[0], leaves=result[1])
+                os.replace(temp_path, path)             #several batch workers may write the same linkage
+            except OSError as err:
+                print(f"Could not cache the linkage ({err}), it will be computed again next time.")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    while len(_linkage_cache) >= CACHE_SIZE:
+        del _linkage_cache[next(iter(_linkage_cache))]
+    _linkage_cache[key] = result
+    return result
+
+def dendrogram_lines(linkage, leaves):
+    """The U-shaped line of every merge of a linkage, as an (n merges, 4, 2) array of (position, height) points.
+    Leaf i of the leaf order sits at position i + 0.5 (the center of heatmap cell i)."""
+    import numpy as np
+
+    n_leaves = len(leaves)
+    position = np.empty(2 * n_leaves - 1)
+    position[leaves] = np.arange(n_leaves) + 0.5
+    height = np.zeros(2 * n_leaves - 1)
+    lines = np.empty((len(linkage), 4, 2))
+    for merge, (left, right, distance, _) in enumerate(linkage):
+        left, right = int(left), int(right)
+        lines[merge] = [(position[left], height[left]), (position[left], distance),
+                        (position[right], distance), (position[right], height[right])]
+        position[n_leaves + merge] = (position[left] + position[right]) / 2
+        height[n_leaves + merge] = distance
+    return lines
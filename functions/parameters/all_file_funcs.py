@@ -2,11 +2,18 @@
 
 """Provides all reusable parameters for seaborn graphing"""
 
+from __future__ import annotations
+
 import sys
 import os
 import re
-import pandas as pd
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from functions.trace import span, traced
+
+if TYPE_CHECKING:                       #pandas is only needed for type hints here, so it isn't imported at runtime
+    import pandas as pd
 
 DEFAULT_COLORS = ["#A66E4A",
                     "#93B7D5",
@@ -28,6 +35,11 @@ DEFAULT_COLORS = ["#A66E4A",
                     "#582B36"]
 DEF_LEN = len(DEFAULT_COLORS)
 
+CATEGORICAL_COLUMNS = ["Tissue", "Treatment", "Infection", "Sample Name"]  #read in as categorical columns when present
+DATASET_CACHE = ".cache"                                                   #folder (next to the .csv) for parsed datasets
+QPCR_NA_VALUES = ["Undetermined"]                                          #CT values the instrument writes for no amplification
+COMPACT_UNIQUE_RATIO = 0.5                                                 #text columns with fewer unique values per row become categories
+
 @dataclass
 class ColorWheel:
     """A dataclass used to store information about hex codes for graphs. Has a name (str) and colors (dictionary)."""
@@ -72,10 +84,9 @@ def get_default_colors() -> any:
 def get_white_wheel(DataSet: pd.DataFrame, pop_value: str = "") -> ColorWheel:
     """Generates a white color wheel based on the values in the provided DataFrame. A 'pop' value may be
     provided to remove extra data columns before processing."""
-    TreatType = DataSet.copy()                          #Creates an object with a copy of all the data
-    TreatType = TreatType.pop(pop_value)                #Removes pop_value from the copied data
+    TreatType = DataSet[pop_value]                      #The column itself, not a copy of the whole DataFrame
     WhiteWheel = ColorWheel("white_wheel", {})          #Initializes a dictionary
-    for Treat in TreatType: 
+    for Treat in TreatType.unique():
         WhiteWheel.colors.setdefault(Treat, '#FFFFFF')  #Sets all value defaults to white
     return WhiteWheel.colors
 
@@ -114,31 +125,299 @@ def make_wheel(wheel_name:str = "new") -> ColorWheel:
     """Generate an empty ColorWheel object."""
     return ColorWheel(wheel_name, dict())
 
+def set_plot_backend(debug_show_plot: bool=False):
+    """Uses the non-interactive Agg backend unless the plot is being previewed with debug_show_plot. Agg does not need
+       a display and is faster to start, so it is used whenever plots are only saved."""
+    if debug_show_plot == True:
+        return
+    os.environ["MPLBACKEND"] = "Agg"        #picked up when matplotlib gets imported
+    if "matplotlib" in sys.modules:
+        sys.modules["matplotlib"].use("Agg")
+
 def get_data_path(filename: str) -> str:
     """Gets the file path of the current directory and appends /datasets/ to allow for file organization."""
     full_path = os.getcwd() + "/datasets/" + filename
     return full_path
 
 def get_file_from_cmd(position: int=1,in_datasets: bool=True):
-    """Opens a specified file from a command line argument. The position parameter defines which argument the
+    """Gets the path of a file specified in a command line argument. The position parameter defines which argument the
        filename is passed in."""
     if in_datasets == True:
         filename = get_data_path(sys.argv[position])
     else:
         filename = sys.argv[position]
+    if not os.path.isfile(filename):
+        print("File not found. Double check spelling and/or directory path.")
+        sys.exit(1)
+    return filename
+
+def _sidecar_format() -> str:
+    """Parsed datasets are stored as Parquet when pyarrow is installed, and as a pandas pickle otherwise."""
     try:
-        return open(filename, "r"), sys.argv[position]
+        import pyarrow
+        return "parquet"
+    except ImportError:
+        return "pickle"
+
+def _encode_categories(DataSet: pd.DataFrame, categorical: list[str]) -> pd.DataFrame:
+    """Converts the listed text columns to categories, in order of first appearance (the order seaborn would use)."""
+    import pandas as pd
+
+    for column in categorical:
+        if column in DataSet.columns and DataSet[column].dtype == object:
+            DataSet[column] = pd.Categorical(DataSet[column], categories=pd.unique(DataSet[column].dropna()))
+    return DataSet
+
+def dataset_memory(DataSet: pd.DataFrame) -> int:
+    """Bytes used by a DataFrame, including its index and the text of object columns."""
+    return int(DataSet.memory_usage(index=True, deep=True).sum())
+
+def _downcast_numbers(DataSet: pd.DataFrame, float32: bool=True) -> pd.DataFrame:
+    """Stores the integer columns in the smallest integer type that holds them, and float64 columns as float32."""
+    import numpy as np
+    import pandas as pd
+
+    for column in DataSet.columns:
+        values = DataSet[column]
+        if pd.api.types.is_integer_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            DataSet[column] = pd.to_numeric(values, downcast="integer")
+        elif float32 and values.dtype == np.float64:
+            largest = values.abs().max(skipna=True)
+            if not largest > np.finfo(np.float32).max:          #NaN (all missing) is also safe to store as float32
+                DataSet[column] = values.astype(np.float32)
+    return DataSet
+
+def compact_dataset(DataSet: pd.DataFrame, categorical: list[str]|None=None, float32: bool=True,
+                    max_unique_ratio: float=COMPACT_UNIQUE_RATIO, report: bool=False) -> pd.DataFrame:
+    """Shrinks a DataFrame in place for plotting: the categorical columns, and any other text column with at most
+       max_unique_ratio unique values per row, are stored as categories (one integer code per row), integer columns
+       are downcast to the smallest integer type that holds them, and with float32 the float64 columns are stored as
+       float32 (about 7 significant digits, plenty for CT values and copies). With report, the memory used before and
+       after is printed."""
+    if categorical is None:
+        categorical = CATEGORICAL_COLUMNS
+    before = dataset_memory(DataSet) if report else 0
+    text = [column for column in DataSet.columns if DataSet[column].dtype == object
+            and (column in categorical or DataSet[column].nunique() <= max_unique_ratio * len(DataSet))]
+    _downcast_numbers(_encode_categories(DataSet, text), float32)
+    if report:
+        after = dataset_memory(DataSet)
+        print(f"Memory: {before / 2**20:.2f} MB -> {after / 2**20:.2f} MB ({before / max(after, 1):.1f}x smaller)")
+    return DataSet
+
+def load_dataset(filename: str, index_col: int|None=None, categorical: list[str]|None=None,
+                 use_cache: bool=True, compact: bool=False, report: bool=False) -> pd.DataFrame:
+    """Reads a .csv file into a DataFrame. The parsed table is saved in a sidecar file (datasets/.cache/<name>.parquet)
+       on the first read and loaded from there afterwards, which is much faster than parsing the .csv again. The sidecar
+       is re-made whenever the .csv file's modification time or size changes. Columns listed in categorical (Tissue,
+       Treatment, Infection and Sample Name by default) are stored as categories, in order of first appearance, and
+       QPCR_NA_VALUES ("Undetermined" CTs) are read as missing, as in read_filtered. With compact, the table is shrunk by compact_dataset before it is cached (report prints its memory use)."""
+    import pandas as pd
+
+    if categorical is None:
+        categorical = CATEGORICAL_COLUMNS
+    try:
+        stats = os.stat(filename)
     except FileNotFoundError:
-        print("File not found. Double check spelling and/or directory path.")
+        print(f"File {filename} not found. Double check spelling and/or directory path.")
         sys.exit(1)
 
-def my_output_file(filename: str, plot_type: str ="Plot", extension: str="svg") -> str:
+    sidecar_format = _sidecar_format()
+    sidecar = os.path.join(os.path.dirname(os.path.abspath(filename)), DATASET_CACHE,
+                           os.path.basename(filename) + "." + sidecar_format)
+    signature = {"mtime_ns": stats.st_mtime_ns, "size": stats.st_size, "index_col": index_col,
+                 "categorical": list(categorical), "format": sidecar_format, "compact": compact,
+                 "na_values": QPCR_NA_VALUES}
+
+    if use_cache and os.path.isfile(sidecar) and os.path.isfile(sidecar + ".json"):
+        with open(sidecar + ".json") as meta:
+            if json.load(meta) == signature:
+                with span("read_cache", file=os.path.basename(filename)):
+                    DataSet = pd.read_parquet(sidecar) if sidecar_format == "parquet" else pd.read_pickle(sidecar)
+                if report:
+                    print(f"Memory: {dataset_memory(DataSet) / 2**20:.2f} MB (compact: {compact})")
+                return DataSet
+
+    with span("read_csv", file=os.path.basename(filename)):
+        DataSet = pd.read_csv(filename, index_col=index_col, na_values=QPCR_NA_VALUES)
+    if compact:
+        with span("compact"):
+            compact_dataset(DataSet, categorical, report=report)
+    else:
+        _encode_categories(DataSet, categorical)
+
+    if use_cache:
+        temp_path = f"{sidecar}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+            if sidecar_format == "parquet":
+                DataSet.to_parquet(temp_path)
+            else:
+                DataSet.to_pickle(temp_path)
+            os.replace(temp_path, sidecar)                  #several batch workers may write the same sidecar
+            with open(temp_path, "w") as meta:
+                json.dump(signature, meta)
+            os.replace(temp_path, sidecar + ".json")
+        except (OSError, ValueError, TypeError) as err:     #e.g. a read-only folder or a column pyarrow can't store
+            print(f"Could not cache {filename} ({err}), it will be parsed again next time.")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return DataSet
+
+@dataclass
+class RowFilter:
+    """A list of row filters that are combined into one boolean mask, evaluated once over the whole DataFrame.
+    Steps run in the order they are added: equals() keeps rows with the given value(s), exclude() drops rows with
+    any of the given values, quantile() and iqr() drop outliers of a numeric column (their statistics only use the
+    rows kept by the steps before them). Categorical columns are compared on their integer codes."""
+    steps: list[tuple] = field(default_factory=list)
+
+    def equals(self, column: str, value) -> RowFilter:
+        """Keeps only rows where column is value (or one of the values, if a list is given)."""
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        self.steps.append(("equals", column, values))
+        return self
+
+    def exclude(self, column: str, values: list) -> RowFilter:
+        """Drops rows where column is one of the values."""
+        self.steps.append(("exclude", column, list(values)))
+        return self
+
+    def quantile(self, column: str, upper: float=0.95, lower: float|None=None) -> RowFilter:
+        """Drops rows above the upper quantile (and below the lower quantile, if given) of column."""
+        self.steps.append(("quantile", column, (lower, upper)))
+        return self
+
+    def iqr(self, column: str, k: float=1.5, low_bound: float|None=0) -> RowFilter:
+        """Drops rows above Q3 + k * IQR of column, and below low_bound (Q1 - k * IQR if low_bound is None)."""
+        self.steps.append(("iqr", column, (k, low_bound)))
+        return self
+
+    def mask(self, DataSet: pd.DataFrame) -> tuple:
+        """Evaluates every step into one boolean mask. Returns the mask and a report with the number of rows kept
+        and removed by each step."""
+        import numpy as np
+
+        keep = np.ones(len(DataSet), dtype=bool)
+        report = []
+        for kind, column, args in self.steps:
+            before = int(keep.sum())
+            if kind in ("equals", "exclude"):
+                matches = _matches(DataSet[column], args)
+                keep &= matches if kind == "equals" else ~matches
+            else:
+                values = DataSet[column].to_numpy(dtype=float)
+                kept_values = values[keep]
+                if kind == "quantile":
+                    lower, upper = args
+                    low = np.nanquantile(kept_values, lower) if lower is not None else -np.inf
+                    high = np.nanquantile(kept_values, upper)
+                else:
+                    k, low_bound = args
+                    q1, q3 = np.nanquantile(kept_values, [0.25, 0.75])
+                    low = low_bound if low_bound is not None else q1 - k * (q3 - q1)
+                    high = q3 + k * (q3 - q1)
+                keep &= (values >= low) & (values <= high)
+            after = int(keep.sum())
+            report.append({"step": kind, "column": column, "kept": after, "removed": before - after})
+        return keep, report
+
+    def apply(self, DataSet: pd.DataFrame, verbose: bool=False) -> tuple:
+        """Returns the positions of the rows that pass every step (for DataSet.iloc) and the step report."""
+        import numpy as np
+
+        with span("filter", steps=len(self.steps)):
+            keep, report = self.mask(DataSet)
+        if verbose:
+            print(f"{len(DataSet)} rows")
+            for step in report:
+                print(f"  {step['step']} {step['column']}: kept {step['kept']}, removed {step['removed']}")
+        return np.flatnonzero(keep), report
+
+    def take(self, DataSet: pd.DataFrame, verbose: bool=False) -> pd.DataFrame:
+        """Returns the rows that pass every step, selected with a single copy. Categories that no longer appear are
+        dropped so they don't show up as empty slots on the plot."""
+        if len(self.steps) == 0:
+            return DataSet
+        positions, _ = self.apply(DataSet, verbose=verbose)
+        Filtered = DataSet.iloc[positions]
+        for position, dtype in enumerate(Filtered.dtypes):
+            if dtype == "category":
+                Filtered.isetitem(position, Filtered.iloc[:, position].cat.remove_unused_categories())
+        return Filtered
+
+def _matches(column: pd.Series, values: list):
+    """Boolean array of the rows whose value is in values, compared on integer codes for categorical columns."""
+    import numpy as np
+
+    if column.dtype == "category":
+        codes = column.cat.codes.to_numpy()
+        wanted = column.cat.categories.get_indexer(values)
+        return np.isin(codes, wanted[wanted >= 0])
+    return column.isin(values).to_numpy()
+
+@traced()
+def read_filtered(filename: str, columns: list[str]|None=None, equals: dict|None=None, exclude: dict|None=None,
+                  index_col: int|None=None, chunksize: int=100_000, categorical: list[str]|None=None,
+                  na_values: list[str]|None=None, compact: bool=False, report: bool=False) -> pd.DataFrame:
+    """Reads a large .csv file (e.g. a multi-plate QuantStudio export) in chunks, keeping only the needed columns and
+       rows. Only the columns in columns (plus any filter/index columns) are parsed, and each chunk is filtered before
+       the next one is read, so memory use depends on the rows kept instead of on the size of the file.
+       equals maps a column to the value (or list of values) to keep, exclude maps a column to a list of values to drop.
+       With compact, the numbers of every kept chunk are downcast and the result is shrunk by compact_dataset."""
+    import pandas as pd
+
+    equals = equals or {}
+    exclude = exclude or {}
+    if categorical is None:
+        categorical = CATEGORICAL_COLUMNS
+    if na_values is None:
+        na_values = QPCR_NA_VALUES
+
+    header = pd.read_csv(filename, nrows=0, na_values=na_values).columns
+    index_name = header[index_col] if index_col is not None else None
+    usecols = None
+    if columns is not None:
+        wanted = set(columns) | set(equals) | set(exclude)
+        if index_name is not None:
+            wanted.add(index_name)
+        missing = wanted - set(header)
+        if len(missing) > 0:
+            print(f"Column(s) {', '.join(sorted(map(str, missing)))} not found in {filename}. Double check the column names.")
+            sys.exit(1)
+        usecols = [column for column in header if column in wanted]
+
+    row_filter = RowFilter()
+    for column, value in equals.items():
+        row_filter.equals(column, value)
+    for column, values in exclude.items():
+        row_filter.exclude(column, values)
+
+    kept = []
+    for chunk in pd.read_csv(filename, usecols=usecols, chunksize=chunksize, na_values=na_values):
+        chunk = chunk.iloc[row_filter.apply(chunk)[0]]
+        kept.append(_downcast_numbers(chunk) if compact else chunk)
+
+    DataSet = pd.concat(kept, ignore_index=True) if len(kept) > 0 else pd.DataFrame(columns=usecols or header)
+    if index_name is not None:
+        DataSet = DataSet.set_index(index_name)
+        if str(index_name).startswith("Unnamed:"):      #same unnamed index as read_csv(index_col=...) gives
+            DataSet.index.name = None
+    if compact:
+        return compact_dataset(DataSet, categorical, report=report)
+    return _encode_categories(DataSet, categorical)
+
+def my_output_file(filename: str, plot_type: str ="Plot", extension: str="svg", csv: bool=True) -> str:
     """Creates a regex to rename the output file based on the original .csv file. The plot type adds the name of
-       the plot to the filename, and the extension specifies what file format to save (svg, png, jpeg, or pdf)."""
+       the plot to the filename, and the extension specifies what file format to save (svg, svgz, png, jpeg, or pdf).
+       If csv is False, filename is used as a title instead of a .csv filename."""
     try:
-        if extension in ["svg", "png", "pdf", "jpeg", "jpg"]:
+        if extension in ["svg", "svgz", "png", "pdf", "jpeg", "jpg"]:
             just_name = filename.split("/")
-            new_name = re.sub(".csv$","_Image" + plot_type + "." + extension, just_name[::-1][0],1)
+            if csv == True:
+                new_name = re.sub(".csv$","_Image" + plot_type + "." + extension, just_name[::-1][0],1)
+            else:
+                new_name = filename + "_Image" + plot_type + "." + extension
             return os.getcwd() + "/generated_images/" + new_name
     except AttributeError:
         print("_io.TextIOWrapper object has no attribute 'split'. Double check that the filename passed is a string.")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+Plate layouts of the standard microplate formats (6 to 1536 wells) and fast lookup of well labels such as "A1",
+"B02" or "AF48" to integer (row, column) positions.
+
+Well labels are parsed once per unique label through a precomputed table, so a multi-plate export with millions of
+rows costs one dictionary lookup per distinct well, and the heatmap matrix is filled by a NumPy scatter.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+@dataclass(frozen=True)
+class PlateFormat:
+    """The number of rows and columns of a plate format."""
+    rows: int
+    columns: int
+
+    @property
+    def wells(self) -> int:
+        return self.rows * self.columns
+
+    def row_labels(self) -> list[str]:
+        """Row letters from the top of the plate: A to Z, then AA, AB, ... (1536-well plates go up to AF)."""
+        return [_row_label(row) for row in range(self.rows)]
+
+    def column_labels(self) -> list[int]:
+        return list(range(1, self.columns + 1))
+
+# number of wells: layout, smallest first
+PLATE_FORMATS = {
+    6: PlateFormat(2, 3),
+    12: PlateFormat(3, 4),
+    24: PlateFormat(4, 6),
+    48: PlateFormat(6, 8),
+    96: PlateFormat(8, 12),
+    384: PlateFormat(16, 24),
+    1536: PlateFormat(32, 48),
+}
+LARGEST_PLATE = PLATE_FORMATS[1536]
+
+def _row_label(row: int) -> str:
+    letters = ""
+    row += 1
+    while row > 0:
+        row, remainder = divmod(row - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+@lru_cache(maxsize=1)
+def well_lookup() -> dict[str, tuple[int, int]]:
+    """Maps every well label of the largest plate format to its zero based (row, column). Labels are upper case and
+    are included both without and with zero padded column numbers ("A1", "A01")."""
+    lookup = {}
+    for row, row_label in enumerate(LARGEST_PLATE.row_labels()):
+        for column in range(LARGEST_PLATE.columns):
+            lookup[f"{row_label}{column + 1}"] = (row, column)
+            lookup[f"{row_label}{column + 1:02d}"] = (row, column)
+    return lookup
+
+def well_codes(wells: pd.Series):
+    """Converts a column of well labels to integer row and column arrays (zero based). Missing or unrecognised labels
+    get -1. Only the distinct labels are looked up, the rows are then filled by indexing with the factorized codes."""
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(wells)                    #missing labels get code -1
+    lookup = well_lookup()
+    positions = np.array([lookup.get(str(label).strip().upper(), (-1, -1)) for label in uniques] + [(-1, -1)],
+                         dtype=np.int64).reshape(-1, 2)
+    rows_and_columns = positions[codes]                     #code -1 picks the (-1, -1) row added at the end
+    return rows_and_columns[:, 0], rows_and_columns[:, 1]
+
+def plate_format(rows, columns, wells: int|None = None) -> PlateFormat:
+    """Returns the layout of the given plate size, or the smallest standard plate the (row, column) positions fit on."""
+    if wells is not None:
+        if wells not in PLATE_FORMATS:
+            print(f"Unknown plate format {wells}, use one of {', '.join(str(size) for size in PLATE_FORMATS)}.")
+            sys.exit(1)
+        return PLATE_FORMATS[wells]
+    max_row = int(rows.max()) if len(rows) > 0 else 0
+    max_column = int(columns.max()) if len(columns) > 0 else 0
+    for layout in PLATE_FORMATS.values():
+        if max_row < layout.rows and max_column < layout.columns:
+            return layout
+    return LARGEST_PLATE
+
+def _well_index(wells: pd.Series, wells_per_plate: int|None = None):
+    """Returns the flat (row * columns + column) index of every well, a mask of the rows that have a well, and the
+    PlateFormat. Exits with a message if a label can't be read or doesn't fit on the plate."""
+    rows, columns = well_codes(wells)
+    unknown = (rows < 0) & wells.notna().to_numpy()
+    if unknown.any():
+        examples = ", ".join(str(label) for label in wells[unknown].unique()[:5])
+        print(f"Could not read the well positions {examples} (expected labels such as A1 or B02).")
+        sys.exit(1)
+    placed = rows >= 0
+    layout = plate_format(rows[placed], columns[placed], wells_per_plate)
+    if not ((rows[placed] < layout.rows) & (columns[placed] < layout.columns)).all():
+        print(f"Some well positions do not fit on a {layout.wells} well plate.")
+        sys.exit(1)
+    return rows[placed] * layout.columns + columns[placed], placed, layout
+
+def plate_matrix(wells: pd.Series, values, wells_per_plate: int|None = None):
+    """Scatters values into a (rows x columns) array of the plate layout. Wells that appear more than once (e.g. the
+    same well of several plates) are averaged, and empty wells are NaN. Returns the array and the PlateFormat."""
+    import numpy as np
+    from functions.qpcr import group_mean
+
+    flat, placed, layout = _well_index(wells, wells_per_plate)
+    values = np.asarray(values, dtype=float)[placed]
+    return group_mean(values, flat, layout.wells).reshape(layout.rows, layout.columns), layout
+
+def plate_stack(wells: pd.Series, values, plates: pd.Series, wells_per_plate: int|None = None):
+    """Like plate_matrix, but with one matrix per plate, all filled by one scatter. Returns a (plates x rows x columns)
+    array, the PlateFormat shared by all plates and the plate labels (in order of first appearance)."""
+    import numpy as np
+    import pandas as pd
+    from functions.qpcr import group_mean
+
+    flat, placed, layout = _well_index(wells, wells_per_plate)
+    plate_codes, labels = pd.factorize(plates, use_na_sentinel=False)
+    flat = plate_codes[placed] * layout.wells + flat
+    values = np.asarray(values, dtype=float)[placed]
+    stack = group_mean(values, flat, len(labels) * layout.wells).reshape(len(labels), layout.rows, layout.columns)
+    return stack, layout, list(labels)
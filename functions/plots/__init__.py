@@ -0,0 +1,40 @@
+"""Importable plot functions. Each takes a DataFrame and a config object and returns a matplotlib Figure.
+
+The plotting libraries are only imported when a plot function is first used, so scripts can build their
+configuration (and the batch runner can start) without paying for the seaborn/pandas/matplotlib imports."""
+
+import importlib
+from functions.plots.config import PlotConfig, HeatmapConfig, VolcanoConfig
+
+# plot function name: module it is defined in (module names differ from function names so importing
+# a submodule never shadows its function on this package)
+_LAZY_FUNCTIONS = {
+    "save_figure": "functions.plots.output",
+    "read_plot_data": "functions.plots.data",
+    "swarm_points": "functions.plots.points",
+    "annotate_pairs": "functions.plots.annotate",
+    "summarize_bars": "functions.plots.bars",
+    "qpcr_bar": "functions.plots.categorical",
+    "barset": "functions.plots.categorical",
+    "violin": "functions.plots.categorical",
+    "facet_grid": "functions.plots.categorical",
+    "facet_violin": "functions.plots.categorical",
+    "line": "functions.plots.lines",
+    "heatmap": "functions.plots.heatmaps",
+    "heatmap_matrix": "functions.plots.heatmaps",
+    "read_heatmap_matrix": "functions.plots.heatmaps",
+    "clustered_heatmap": "functions.plots.heatmaps",
+    "plate_heatmap": "functions.plots.heatmaps",
+    "tiled_heatmap": "functions.plots.heatmaps",
+    "read_plate_tiles": "functions.plots.heatmaps",
+    "volcano": "functions.plots.scatter",
+}
+
+__all__ = ["PlotConfig", "HeatmapConfig", "VolcanoConfig", *_LAZY_FUNCTIONS]
+
+def __getattr__(name: str):
+    if name in _LAZY_FUNCTIONS:
+        value = getattr(importlib.import_module(_LAZY_FUNCTIONS[name]), name)
+        globals()[name] = value             #later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
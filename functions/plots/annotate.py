@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+"""Significance brackets between the bars of a plot, from the results of functions.stats.pairwise_tests."""
+
+import numpy as np
+import pandas as pd
+from matplotlib import transforms
+from functions.aggregate import error_range
+from functions.plots.bars import summarize_bars
+from functions.plots.config import PlotConfig
+from functions.plots.points import categorical_order, group_positions
+from functions.stats import StatsConfig, pairwise_tests
+
+BRACKET_GAP = 0.03                      #space between the data and a bracket, and between stacked brackets (fraction of the y axis)
+TEXT_HEIGHT = 0.04                      #room left for the label over a bracket (fraction of the y axis)
+
+def annotate_pairs(ax, df: pd.DataFrame, config: PlotConfig, stats: StatsConfig|None = None,
+                   summary: pd.DataFrame|None = None) -> pd.DataFrame:
+    """Tests the groups of a bar plot and draws a bracket with the p-value label over every compared pair (only the
+    significant ones with stats.hide_non_significant). Brackets are stacked from the narrowest up so they never
+    cross, starting over the error bar or highest dot of the groups they span (taken from the bar summary table if
+    given). Returns the test results."""
+    stats = stats or config.stats
+    dodged = config.hue is not None and config.hue != config.x
+    x_levels = categorical_order(df[config.x], config.order)
+    hue_levels = categorical_order(df[config.hue], config.hue_order) if dodged else None
+    results = pairwise_tests(df, config.x, config.y, config.hue if dodged else None, stats,
+                             order=x_levels, hue_order=hue_levels)
+
+    positions = group_positions(x_levels, hue_levels)
+    columns = [config.x, config.hue] if dodged else [config.x]
+    if summary is None or list(summary.columns[:len(columns)]) != columns:
+        summary = summarize_bars(df, config, columns)
+    _, error_top = error_range(summary, config.errorbar)
+    keys = zip(summary[config.x], summary[config.hue]) if dodged else summary[config.x]
+    tops = {key: np.nanmax([high, largest]) for key, high, largest in zip(keys, error_top, summary["max"])
+            if not np.isnan(largest)}          #top of the error bar, or the highest dot
+
+    drawn = results[results["significant"]] if stats.hide_non_significant else results
+    if len(drawn) == 0:
+        return results
+    bottom, top = ax.get_ylim()
+    span = top - bottom
+    spans = [sorted((positions[first], positions[second])) for first, second in zip(drawn["group1"], drawn["group2"])]
+    placed = []                                     #(left, right, height) of the brackets drawn so far
+    outside = stats.loc == "outside"
+    for index in np.argsort([right - left for left, right in spans], kind="stable"):
+        left, right = spans[index]
+        if outside:
+            base = 1.0                              #in axes coordinates, just above the plot
+            step = BRACKET_GAP
+        else:
+            covered = [tops[key] for key, position in positions.items() if left <= position <= right and key in tops]
+            base = max(covered) + BRACKET_GAP * span
+            step = BRACKET_GAP * span
+        below = [height for other_left, other_right, height in placed if other_left <= right and left <= other_right]
+        height = max([base, *[level + step + (TEXT_HEIGHT if outside else TEXT_HEIGHT * span) for level in below]])
+        end = stats.line_height * (1 if outside else span)
+        transform = transforms.blended_transform_factory(ax.transData, ax.transAxes) if outside else ax.transData
+        ax.plot([left, left, right, right], [height, height + end, height + end, height], color="black",
+                linewidth=1.5, transform=transform, clip_on=False)
+        ax.text((left + right) / 2, height + end, drawn["label"].iloc[index], ha="center", va="bottom",
+                transform=transform, clip_on=False)
+        placed.append((left, right, height + end))
+    if not outside:
+        highest = max(height for _, _, height in placed) + (TEXT_HEIGHT + BRACKET_GAP) * span
+        if highest > top:
+            ax.set_ylim(bottom, highest)
+    return results
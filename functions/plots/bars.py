@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""Bars and error bars drawn from a precomputed summary table (see functions.aggregate) instead of by seaborn,
+which would group and aggregate the data again on every render."""
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.collections import LineCollection
+from matplotlib.patches import Patch
+from functions.aggregate import summarize, error_range
+from functions.plots.config import PlotConfig
+from functions.plots.points import CATEGORY_WIDTH, categorical_order, group_positions
+
+ERROR_COLOR = ".26"                     #seaborn's error bar color
+CAPSIZE = .1                            #width of the error bar caps, relative to the bar width
+
+def summary_columns(config: PlotConfig) -> list[str]:
+    """The columns the bars are grouped by: the facet column, x and hue."""
+    return list(dict.fromkeys(column for column in (config.col, config.x, config.hue) if column is not None))
+
+def summarize_bars(df: pd.DataFrame, config: PlotConfig, columns: list[str]|None = None) -> pd.DataFrame:
+    """The summary table a bar plot is drawn from: n, mean, sd, sem, confidence interval and max of config.y for
+    every (col, x, hue) group (or the given columns), plus the bootstrap interval for "boot" error bars. Pass it to
+    the bar plot functions and to save_figure(table=...) to export it."""
+    n_boot = config.n_boot if config.errorbar == "boot" else None
+    return summarize(df, config.y, columns or summary_columns(config), n_boot=n_boot, seed=config.seed)
+
+def hue_colors(levels: list, palette) -> dict:
+    """Maps every level to its color, from a dict of colors, a list of colors, a seaborn palette name or the default
+    color cycle (palette None)."""
+    if isinstance(palette, dict):
+        missing = [level for level in levels if level not in palette]
+        if len(missing) > 0:
+            raise ValueError(f"The palette dictionary is missing keys: {set(missing)}")
+        return {level: palette[level] for level in levels}
+    return dict(zip(levels, sns.color_palette(palette, len(levels))))
+
+def draw_bars(ax, summary: pd.DataFrame, config: PlotConfig, x_levels: list, hue_levels: list|None) -> dict:
+    """Draws one bar per summary row at its categorical position (dodged by hue) and all error bars as a single
+    line collection, then labels the categorical x axis. Returns the legend handles of the hue levels."""
+    dodged = config.hue is not None and config.hue != config.x
+    positions = group_positions(x_levels, hue_levels if dodged else None)
+    width = CATEGORY_WIDTH / len(hue_levels) if dodged else CATEGORY_WIDTH
+    keys = list(zip(summary[config.x], summary[config.hue])) if dodged else list(summary[config.x])
+    centers = np.array([positions.get(key, np.nan) for key in keys], dtype=float)
+    drawn = ~np.isnan(centers) & (summary["n"].to_numpy() > 0)
+
+    color_column = config.hue if config.hue is not None else (config.x if config.palette is not None else None)
+    colors = {}
+    if color_column is not None:
+        levels = hue_levels if color_column == config.hue else x_levels
+        colors = hue_colors(levels, config.palette)
+        bar_colors = [colors.get(level, "C0") for level in summary.loc[drawn, color_column]]
+    else:
+        bar_colors = "C0"
+    ax.bar(centers[drawn], summary["mean"].to_numpy()[drawn], width=width, color=bar_colors, edgecolor="black",
+           linewidth=1)
+
+    if config.errorbar is not None:
+        low, high = error_range(summary.loc[drawn], config.errorbar)
+        x = centers[drawn]
+        cap = CAPSIZE * width / 2
+        segments = np.concatenate([
+            np.stack([np.column_stack([x, low]), np.column_stack([x, high])], axis=1),
+            np.stack([np.column_stack([x - cap, low]), np.column_stack([x + cap, low])], axis=1),
+            np.stack([np.column_stack([x - cap, high]), np.column_stack([x + cap, high])], axis=1),
+        ])
+        segments = segments[~np.isnan(segments).any(axis=(1, 2))]
+        ax.add_collection(LineCollection(segments, colors=ERROR_COLOR, linewidths=.75, zorder=2))
+        ax.autoscale_view()
+
+    ax.set_xticks(range(len(x_levels)), labels=[str(level) for level in x_levels])
+    ax.set_xlim(-.5, len(x_levels) - .5)
+    ax.xaxis.grid(False)
+    if config.hue is None:
+        return {}
+    return {str(level): Patch(facecolor=colors[level], edgecolor="black", linewidth=1) for level in hue_levels}
+
+def bar_levels(df: pd.DataFrame, config: PlotConfig) -> tuple[list, list|None]:
+    """The order of the x and hue levels of a bar plot."""
+    x_levels = categorical_order(df[config.x], config.order)
+    hue_levels = categorical_order(df[config.hue], config.hue_order) if config.hue is not None else None
+    return x_levels, hue_levels
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+"""Bar, violin and facet grid plots with the individual observations overlayed as dots (see functions.plots.points)."""
+
+import seaborn as sns
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from functions.plots.config import PlotConfig
+from functions.plots.output import plot_context
+from functions.plots.points import swarm_points
+from functions.plots.annotate import annotate_pairs
+from functions.plots.bars import bar_levels, draw_bars, summarize_bars
+from functions.trace import traced
+
+def _point_kws(config: PlotConfig) -> dict:
+    """Arguments of swarm_points shared by every plot: white dots with a black edge."""
+    return {"kind": config.points, "max_points": config.max_points, "size": config.dot_size, "linewidth": .75}
+
+def _style_axes(ax, config: PlotConfig):
+    """Applies the axis range, label rotation and title shared by the single-axis plots."""
+    if config.ylim is not None:
+        ax.set(ylim=config.ylim)
+    if config.axis_rotate:
+        ax.tick_params(axis="x", labelrotation=config.axis_rotate)
+    ax.set_title(config.title)
+
+@traced()
+def qpcr_bar(df: pd.DataFrame, config: PlotConfig, summary: pd.DataFrame|None = None) -> Figure:
+    """Generates a barplot (mean with a config.errorbar whisker, standard deviation by default) with the observations
+    overlayed as dots. The bars are drawn from summary (see summarize_bars), which is computed here if not given.
+    With config.stats the bars are compared pairwise and significance brackets are drawn over them."""
+    summary = summary if summary is not None else summarize_bars(df, config)
+    x_levels, hue_levels = bar_levels(df, config)
+    with plot_context(config):
+        g = sns.FacetGrid(df, height=config.height, aspect=config.aspect)
+        ax = g.ax
+        legend_data = draw_bars(ax, summary, config, x_levels, hue_levels)
+        if config.legend and len(legend_data) > 0:
+            g.add_legend(legend_data=legend_data, label_order=list(legend_data), title="")
+
+        swarm_points(df,
+            x=config.x,
+            y=config.y,
+            hue=config.hue,
+            dodge=config.hue is not None and config.hue != config.x,   #keeps dots of each hue over their own bar
+            order=x_levels,
+            hue_order=hue_levels,
+            ax=ax,
+            **_point_kws(config),
+        )
+        _style_axes(ax, config)
+        if config.stats is not None:
+            annotate_pairs(ax, df, config, summary=summary)
+        g.set_axis_labels("", "")       #sets labels to be empty, default will pull from the data
+    return g.figure
+
+@traced()
+def barset(df: pd.DataFrame, config: PlotConfig, summary: pd.DataFrame|None = None) -> Figure:
+    """Generates one barplot per value of config.col, each with the observations overlayed as dots. The bars of all
+    facets are drawn from one summary table (see qpcr_bar)."""
+    summary = summary if summary is not None else summarize_bars(df, config)
+    x_levels, hue_levels = bar_levels(df, config)
+    with plot_context(config):
+        g = sns.FacetGrid(df, col=config.col, col_order=config.col_order, height=config.height, aspect=config.aspect)
+        legend_data = {}
+        for col_value, ax in g.axes_dict.items():
+            legend_data = draw_bars(ax, summary[summary[config.col] == col_value], config, x_levels, hue_levels)
+        if config.legend and len(legend_data) > 0:
+            g.add_legend(legend_data=legend_data, label_order=list(legend_data))
+        g.map_dataframe(swarm_points,
+            x=config.x,
+            y=config.y,
+            order=x_levels,
+            **_point_kws(config),
+        )
+        g.set_axis_labels("", "")
+    return g.figure
+
+@traced()
+def violin(df: pd.DataFrame, config: PlotConfig) -> Figure:
+    """Generates a violin plot split by config.hue with the observations overlayed as dots."""
+    with plot_context(config):
+        fig, ax = plt.subplots(figsize=config.figsize)
+        sns.violinplot(data=df,
+            x=config.x,
+            y=config.y,
+            hue=config.hue,
+            cut=1,                          #how far the density extends past the data point extremes
+            order=config.order,
+            hue_order=config.hue_order,
+            palette=config.palette,
+            saturation=1,
+            inner=None,
+            density_norm="width",           #conforms all violins to the same width
+            linewidth=1,
+            edgecolor="black",
+            ax=ax,
+        )
+        swarm_points(df,
+            x=config.x,
+            y=config.y,
+            hue=config.hue,
+            dodge=config.hue is not None and config.hue != config.x,
+            order=config.order,
+            hue_order=config.hue_order,
+            ax=ax,
+            **_point_kws(config),
+        )
+        if not config.legend and ax.legend_ is not None:
+            ax.legend_.remove()
+        _style_axes(ax, config)
+    return fig
+
+def _facet(df: pd.DataFrame, config: PlotConfig, plot_func, **plot_kws) -> Figure:
+    """Draws plot_func on a FacetGrid (one facet per value of config.col) and overlays the observations on every facet.
+    The x and hue levels are taken from the whole table, so every facet places, dodges and colors them the same way."""
+    x_levels, hue_levels = bar_levels(df, config)
+    with plot_context(config):
+        g = sns.FacetGrid(df,
+            col=config.col,
+            col_order=config.col_order,
+            col_wrap=config.col_wrap,
+            ylim=config.ylim,
+            height=config.height,
+            aspect=config.aspect,
+        )
+        g.map_dataframe(plot_func,
+            x=config.x,
+            y=config.y,
+            hue=config.hue,
+            order=x_levels,
+            hue_order=hue_levels,
+            palette=config.palette,
+            **plot_kws,
+        )
+        g.map_dataframe(swarm_points,
+            x=config.x,
+            y=config.y,
+            hue=config.hue,
+            dodge="auto",                   #dodged exactly when seaborn dodges the facet's bars/violins
+            order=x_levels,
+            hue_order=hue_levels,
+            **_point_kws(config),
+        )
+        g.set_axis_labels("", "")
+    return g.figure
+
+@traced()
+def facet_grid(df: pd.DataFrame, config: PlotConfig) -> Figure:
+    """Generates a FacetGrid of barplots with the observations overlayed on each facet."""
+    return _facet(df, config, sns.barplot, edgecolor="black", legend=False)
+
+@traced()
+def facet_violin(df: pd.DataFrame, config: PlotConfig) -> Figure:
+    """Generates a FacetGrid of violin plots with the observations overlayed on each facet."""
+    return _facet(df, config, sns.violinplot, inner=None, cut=1, density_norm="width", linewidth=.75, legend=False)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+"""Configuration objects passed to the plot functions in functions.plots."""
+
+from dataclasses import dataclass
+
+@dataclass
+class PlotConfig:
+    """Stores the columns, orderings and styling used by the categorical, facet and line plot functions.
+    Every field mirrors one of the variables that used to be set at the top of a script."""
+    x: str = "Tissue"                       #x axis data column
+    y: str = "Log_Copies"                   #y axis data column
+    hue: str|None = None                    #column that splits the bars/violins/lines by color
+    order: list|None = None                 #order of the values on the x axis
+    hue_order: list|None = None             #order of the hue values
+    col: str|None = None                    #column used to facet the grid (facet and barset plots)
+    col_order: list|None = None             #order of the facets
+    col_wrap: int|None = None               #number of facets per row
+    palette: dict|list|None = None          #colors of the bars/violins, a dict of value to hex code or a list of hex codes
+    dot_size: float = 5                     #size of the overlayed dots
+    points: str = "swarm"                   #layout of the overlayed dots, "swarm" (side by side) or "strip" (random jitter)
+    max_points: int|None = 500              #groups with more observations only draw this many dots (thinning the densest values)
+    height: float = 6                       #height of each plot
+    aspect: float = 1.2                     #width/height ratio of each plot
+    figsize: tuple|None = None              #figure size for single-axis plots (violin, line)
+    ylim: tuple|None = None                 #y axis range, None pulls it from the data
+    xticks: list|None = None                #x axis tick positions (line plots)
+    ci: int = 68                            #confidence interval size (line plots)
+    errorbar: str|None = "sd"               #bar whiskers: "sd", "sem", "ci" (95% confidence interval of the mean), "boot" (95%
+                                            #bootstrap interval, like seaborn's default) or None
+    n_boot: int = 1000                      #bootstrap resamples of the line plot bands and "boot" error bars
+    seed: int = 0                           #seed of the bootstrap, the same seed always gives the same intervals
+    axis_rotate: int = 0                    #rotation of the x axis labels
+    title: str = ""                         #plot title
+    legend: bool = True                     #shows the legend
+    theme: bool = False                     #applies the default seaborn theme (sns.set_theme) to this plot only
+    index_col: int|None = None              #column of the .csv file used as the row index
+    filter_equals: dict|None = None         #only keeps rows where a column has a value, e.g. {"Viral Genotype": "MHV-Y"}
+    filter_exclude: dict|None = None        #drops rows where a column has one of the values, e.g. {"Infection": ["Uninfected"]}
+    chunksize: int|None = None              #streams the .csv file in chunks of this many rows (for very large exports)
+    compact: bool = False                   #stores text columns as categories and numbers as float32/small integers (much less memory)
+    stat_filter: str|None = None            #drops y outliers: "iqr" (above Q3 + 1.5 IQR or below 0) or "quantile" (above stat_quantile)
+    stat_quantile: float = 0.95
+    qpcr: object|None = None                #a functions.qpcr.QPCRConfig to compute ΔΔCt/relative expression from raw CT values
+    stats: object|None = None               #a functions.stats.StatsConfig to test the bars and draw significance brackets (qpcr_bar)
+    formats: tuple = ("svg",)               #image formats saved by the scripts, any of "svg", "pdf", "png" and "jpeg"
+    dpi: float|str = "print"                #resolution of png/jpeg files and rasterized layers: a number, "screen", "print" or "poster"
+    debug_show_plot: bool = False           #shows the plot locally before saving. May break saved file.
+
+    def columns(self) -> list[str]:
+        """Lists the data columns this plot uses (for a qPCR calculation, the raw export columns it needs)."""
+        used = [column for column in (self.x, self.y, self.hue, self.col) if column is not None]
+        if self.qpcr is None:
+            return list(dict.fromkeys(used))
+        from functions.qpcr import EXPRESSION_COLUMNS
+        return list(dict.fromkeys([*self.qpcr.columns(), *(column for column in used if column not in EXPRESSION_COLUMNS)]))
+
+@dataclass
+class HeatmapConfig:
+    """Stores the columns and color scale used by the heatmap function."""
+    value: str = "LogCopies"                #column with the heat values
+    x: str = "Sample"                       #heatmap rows when not plotting well positions
+    y: str = "log(MOI)"                     #heatmap columns when not plotting well positions
+    aggregate: str = "mean"                 #statistic of the values of every (x, y) pair: "mean", "median" (exact, but with chunksize it keeps 16 bytes per row, not only the matrix), "max" or "count"
+    matrix_columns: list|None = None        #wide tables: the columns drawn as the heatmap columns, one heatmap row per table row (named by index_col)
+    well_positions: bool = True             #plots one cell per well of the plate instead of grouped means
+    well_column: str = "Well Positions"     #column with the well labels ("A1", "B2", ...)
+    plate: int|None = None                  #plate format (96, 384, 1536, ...), None picks the smallest plate the wells fit on
+    top_color: str = "#bb334c"              #the color of the highest value, the colormap goes from white to this color
+    vmin: float|None = 0                    #the value of the lowest saturation of the color bar, None uses the data minimum (tiled heatmaps)
+    vmax: float|None = None                 #the value of the highest saturation, None rounds up the data maximum
+    threshold: float|None = None            #values under the threshold are drawn white
+    linewidths: float = 0.5                 #width of the lines between cells
+    border_min_size: float = 4              #the lines are left out when the cells are smaller than this (points)
+    pooling: str|None = "mean"              #cells beyond the pixels of the output (at dpi) are combined: "mean", "max", "min" (None draws all)
+    plate_column: str|None = None           #column naming the plate of each row, draws one tile per plate (plate_heatmap)
+    tile_columns: int = 4                   #number of plate tiles per row of the figure
+    tile_size: float = 3                    #width of one plate tile in inches
+    rotate_x: int|None = None               #rotation of the x axis labels, None keeps the default
+    rotate_y: int = 0                       #rotation of the y axis labels
+    cluster: str = "both"                   #clustered_heatmap: clusters the "rows", the "columns" or "both"
+    linkage_method: str = "average"         #"single", "complete", "average", "weighted", "ward", "centroid" or "median"
+    linkage_metric: str = "euclidean"       #distance between rows/columns, e.g. "euclidean", "correlation" or "cosine"
+    linkage_backend: str = "auto"           #"fastcluster", "scipy" or "auto" (fastcluster when installed)
+    optimal_ordering: bool = False          #orders the leaves so neighbouring rows are most alike (slow, cached per matrix)
+    figsize: tuple|None = None              #figure size of clustered heatmaps, None is 8 x 10 inches
+    title: str = ""
+    theme: bool = True
+    index_col: int|None = None
+    filter_equals: dict|None = None
+    filter_exclude: dict|None = None
+    chunksize: int|None = None              #reads the file in chunks of this many rows; x/y heatmaps are then aggregated chunk by chunk
+    compact: bool = False                   #shrinks the loaded table, see PlotConfig
+    stat_filter: str|None = None            #drops outliers of value, "iqr" or "quantile" (see PlotConfig)
+    stat_quantile: float = 0.95
+    formats: tuple = ("svg",)               #image formats, see PlotConfig
+    dpi: float|str = "print"
+    debug_show_plot: bool = False
+
+    def columns(self) -> list[str]:
+        """Lists the data columns this heatmap uses."""
+        plate = [self.plate_column] if self.plate_column is not None else []
+        if self.matrix_columns is not None:
+            return [*self.matrix_columns, *plate]
+        if self.well_positions:
+            return [self.well_column, self.value, *plate]
+        return [self.x, self.y, self.value, *plate]
+
+@dataclass
+class VolcanoConfig:
+    """Stores the columns, significance thresholds and styling used by the volcano plot function."""
+    fold_change: str|None = None            #column with the log2 fold change, None computes it from numerator and denominator
+    numerator: str = "SPF"                  #column of the condition compared (positive fold changes are up in it)
+    denominator: str = "GF"                 #column of the reference condition
+    ratio: str = "log2"                     #"log2" (log2 of numerator / denominator) or "difference" (for columns already on a log2 scale)
+    pseudocount: float = 0                  #added to both columns before the log2 ratio, so zeros don't give infinite fold changes
+    pvalue: str = "Pval"                    #column with the p-values
+    log_pvalues: bool = False               #the p-value column already holds -log10 p
+    correction: str = "BH"                  #multiple testing correction: "BH", "BY", "storey" (q-values), "holm" or "bonferroni"
+    groups: str|None = None                 #column whose values (e.g. tissues) are corrected separately, None corrects all features together
+    alpha: float = 0.05                     #largest adjusted p-value called significant
+    min_fold_change: float = 1              #smallest absolute log2 fold change called up/down (1 is twofold)
+    top_labels: int = 10                    #labels the most significant up/down features with their names (the row index)
+    up_color: str = "#bb334c"
+    down_color: str = "#3b6fb6"
+    ns_color: str = "#b0b0b0"               #not significant, drawn as one decimated image layer
+    dot_size: float = 12                    #marker area in points²
+    figsize: tuple|None = None
+    xlim: tuple|None = None                 #x axis range, None pulls it from the data
+    ylim: tuple|None = None
+    title: str = ""
+    theme: bool = False
+    index_col: int|None = 0                 #column of the .csv file with the feature names
+    filter_equals: dict|None = None
+    filter_exclude: dict|None = None
+    chunksize: int|None = None
+    compact: bool = False                   #shrinks the loaded table, see PlotConfig
+    formats: tuple = ("svg",)               #image formats, see PlotConfig
+    dpi: float|str = "print"
+    debug_show_plot: bool = False
+
+    def columns(self) -> list[str]:
+        """Lists the data columns this volcano plot uses."""
+        values = [self.fold_change] if self.fold_change is not None else [self.numerator, self.denominator]
+        return [*values, self.pvalue, *([self.groups] if self.groups is not None else [])]
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+"""Loads the data a plot needs according to its config."""
+
+import sys
+import functions.parameters.all_file_funcs as myfunc
+from functions.trace import traced
+
+@traced()
+def read_plot_data(filename: str, config, verbose: bool = False):
+    """Reads a dataset for a plot. If config.chunksize is set the file is streamed and only the columns the plot uses
+    and the rows passing config.filter_equals/filter_exclude are kept. Otherwise the whole (cached) dataset is loaded
+    and then filtered. config.compact shrinks the table as it is loaded (myfunc.compact_dataset). With config.qpcr
+    the raw CT values are turned into ΔCt/ΔΔCt/relative expression columns, and config.stat_filter finally drops
+    outliers of the plotted values. Each filter stage selects its rows only once."""
+    if config.chunksize is not None:
+        DataSet = myfunc.read_filtered(filename, columns=config.columns(), equals=config.filter_equals,
+                                       exclude=config.filter_exclude, index_col=config.index_col, chunksize=config.chunksize,
+                                       compact=config.compact, report=verbose)
+    else:
+        row_filter = myfunc.RowFilter()
+        for column, value in (config.filter_equals or {}).items():
+            row_filter.equals(column, value)
+        for column, values in (config.filter_exclude or {}).items():
+            row_filter.exclude(column, values)
+        DataSet = myfunc.load_dataset(filename, index_col=config.index_col, compact=config.compact, report=verbose)
+        DataSet = row_filter.take(DataSet, verbose=verbose)
+
+    if getattr(config, "qpcr", None) is not None:
+        from functions.qpcr import relative_expression
+        DataSet = relative_expression(DataSet, config.qpcr)
+
+    if getattr(config, "stat_filter", None) is not None:
+        value_column = getattr(config, "value", None) or config.y
+        if config.stat_filter == "iqr":
+            outliers = myfunc.RowFilter().iqr(value_column)
+        elif config.stat_filter == "quantile":
+            outliers = myfunc.RowFilter().quantile(value_column, upper=config.stat_quantile)
+        else:
+            print(f"Unknown stat_filter {config.stat_filter!r}, use 'iqr' or 'quantile'.")
+            sys.exit(1)
+        DataSet = outliers.take(DataSet, verbose=verbose)
+    return DataSet
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+"""Heatmaps of plate well positions, of grouped means or of the columns of a wide table, clustered heatmaps, and tiled
+heatmaps of many plates on one color scale."""
+
+import os
+import sys
+import math
+import numpy as np
+import seaborn as sns
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from functions.plates import plate_matrix, plate_stack
+from functions.plots.config import HeatmapConfig
+from functions.plots.data import read_plot_data
+from functions.plots.output import DPI_PRESETS, plot_context
+from functions.streaming import AGGREGATES, stream_matrix
+from functions.trace import traced
+
+RASTERIZE_CELLS = 20_000                #tiled heatmaps with more cells are stored as images inside vector (svg/pdf) files
+BORDER_CELLS = 384                      #tiles with more cells are drawn without lines between the cells
+POOLING = ["mean", "max", "min"]        #how cells beyond the output resolution are combined (level of detail)
+LABEL_SPACING = 1.2                     #a tick label needs this many font sizes of room, or the labels are thinned
+RASTERIZE_CELL_POINTS = 1               #cells smaller than this (points) are stored as an image inside vector files
+
+@traced()
+def heatmap_matrix(df: pd.DataFrame, config: HeatmapConfig) -> pd.DataFrame:
+    """Formats a long table into the matrix that gets plotted. With config.matrix_columns those columns of a wide table
+    are the matrix. With well positions every value is placed in its well of the plate layout (see functions.plates),
+    otherwise config.aggregate (the mean by default) of config.value is taken for every (x, y) pair.
+    attrs["value_max"] keeps the largest value of the table, the default top of the color scale."""
+    if config.matrix_columns is not None:
+        return df[config.matrix_columns]
+    if config.well_positions:
+        values, layout = plate_matrix(df[config.well_column], df[config.value], config.plate)
+        matrix = pd.DataFrame(values, index=layout.row_labels(), columns=layout.column_labels())
+    else:
+        if config.aggregate not in AGGREGATES:
+            print(f"Unknown aggregate {config.aggregate!r}, use one of: {', '.join(AGGREGATES)}.")
+            sys.exit(1)
+        cells = df.groupby([config.x, config.y])[config.value].agg(config.aggregate).reset_index()
+        matrix = cells.pivot(index=config.x, columns=config.y, values=config.value)
+        if config.aggregate == "count":
+            return matrix
+    matrix.attrs["value_max"] = float(df[config.value].max())
+    return matrix
+
+def read_heatmap_matrix(filename: str, config: HeatmapConfig) -> pd.DataFrame:
+    """Reads the matrix of a heatmap from a file. With config.chunksize an x/y heatmap is aggregated chunk by chunk
+    (functions.streaming.stream_matrix), so the long table is never in memory, only the matrix. Other heatmaps (and
+    stat_filter, which needs the whole column) read the table with read_plot_data and format it with heatmap_matrix."""
+    if config.chunksize is not None and not config.well_positions and config.matrix_columns is None and config.stat_filter is None:
+        return stream_matrix(filename, config.x, config.y, config.value, config.aggregate, config.chunksize,
+                             equals=config.filter_equals, exclude=config.filter_exclude)
+    return heatmap_matrix(read_plot_data(filename, config), config)
+
+def _color_scale(matrix: pd.DataFrame, config: HeatmapConfig) -> tuple:
+    """The white to config.top_color colormap and its (vmin, vmax). vmax defaults to the rounded up largest value of
+    the table (matrix.attrs["value_max"]) or else of the matrix."""
+    if config.vmax is not None:
+        vmax_val = config.vmax
+    else:
+        vmax_val = math.ceil(matrix.attrs.get("value_max", np.nanmax(matrix.to_numpy(dtype=float))))
+
+    Pal = sns.light_palette(config.top_color, as_cmap=True)   #white to a saturated color
+    vmin_val = config.vmin
+    if config.threshold is not None:
+        vmin_val = config.threshold
+        Pal.set_under(color="#ffffff")
+    return Pal, vmin_val, vmax_val
+
+def pool_matrix(values, row_step: int, column_step: int, pooling: str = "mean"):
+    """Combines every block of row_step x column_step cells into one cell by their "mean", "max" or "min" (ignoring
+    missing values). The last blocks may be smaller."""
+    import warnings
+
+    rows, columns = values.shape
+    padded = np.full((math.ceil(rows / row_step) * row_step, math.ceil(columns / column_step) * column_step), np.nan)
+    padded[:rows, :columns] = values
+    blocks = padded.reshape(padded.shape[0] // row_step, row_step, padded.shape[1] // column_step, column_step)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)     #all-missing blocks stay NaN
+        return {"mean": np.nanmean, "max": np.nanmax, "min": np.nanmin}[pooling](blocks, axis=(1, 3))
+
+def _level_of_detail(shape: tuple, size: tuple, config: HeatmapConfig) -> dict:
+    """Decides how a matrix of shape (rows, columns) is drawn in axes of size (width, height) inches: the pooling
+    steps that bring the cells down to the pixels of the output (at config.dpi), whether the cells are big enough
+    for borders (config.border_min_size points) or so small they are stored as an image, and every how many
+    rows/columns a tick label fits."""
+    import matplotlib as mpl
+    from matplotlib.font_manager import FontProperties
+
+    rows, columns = shape
+    width, height = size
+    dpi = DPI_PRESETS.get(config.dpi, config.dpi)
+    if config.pooling is not None and config.pooling not in POOLING:
+        print(f"Unknown pooling {config.pooling!r}, use one of: {', '.join(POOLING)} (or None).")
+        sys.exit(1)
+    pool = config.pooling is not None
+    row_step = max(1, math.ceil(rows / (height * dpi))) if pool else 1
+    column_step = max(1, math.ceil(columns / (width * dpi))) if pool else 1
+    cell_points = min(72 * width / columns, 72 * height / rows)
+    label_points = {axis: FontProperties(size=mpl.rcParams[f"{axis}tick.labelsize"]).get_size_in_points() * LABEL_SPACING
+                    for axis in ("x", "y")}
+    return {"row_step": row_step, "column_step": column_step,
+            "borders": config.linewidths > 0 and cell_points >= config.border_min_size,
+            "rasterized": cell_points < RASTERIZE_CELL_POINTS or rows * columns > RASTERIZE_CELLS,
+            "x_labels": max(1, math.ceil(columns * label_points["x"] / (72 * width))),
+            "y_labels": max(1, math.ceil(rows * label_points["y"] / (72 * height)))}
+
+def _axes_inches(fig: Figure, ax) -> tuple:
+    position = ax.get_position()
+    width, height = fig.get_size_inches()
+    return width * position.width, height * position.height
+
+@traced()
+def heatmap(df: pd.DataFrame|None, config: HeatmapConfig, matrix: pd.DataFrame|None = None) -> Figure:
+    """Generates a heatmap with a white to config.top_color colormap. A matrix already made by heatmap_matrix or
+    read_heatmap_matrix is drawn as it is (df can then be None). Matrices with more rows or columns than the output
+    has pixels (at config.dpi) are pooled down to it (config.pooling), tick labels are thinned to the ones that fit
+    and the cell borders are left out when the cells are smaller than config.border_min_size points."""
+    heatmap_data = matrix if matrix is not None else heatmap_matrix(df, config)
+    Pal, vmin_val, vmax_val = _color_scale(heatmap_data, config)
+
+    with plot_context(config):
+        fig, ax = plt.subplots()
+        width, height = _axes_inches(fig, ax)
+        detail = _level_of_detail(heatmap_data.shape, (width * 0.8, height), config)     #the color bar takes ~20%
+        if detail["row_step"] > 1 or detail["column_step"] > 1:                #more cells than pixels
+            row_step, column_step = detail["row_step"], detail["column_step"]
+            heatmap_data = pd.DataFrame(pool_matrix(heatmap_data.to_numpy(dtype=float), row_step, column_step, config.pooling),
+                                        index=heatmap_data.index[::row_step], columns=heatmap_data.columns[::column_step])
+            detail = _level_of_detail(heatmap_data.shape, (width * 0.8, height), config)   #labels/borders of the pooled cells
+        sns.heatmap(heatmap_data,
+            cmap=Pal,
+            vmin=vmin_val,
+            vmax=vmax_val,
+            linewidths=config.linewidths if detail["borders"] else 0,
+            xticklabels=detail["x_labels"] if detail["x_labels"] > 1 else True,     #every label that fits
+            yticklabels=detail["y_labels"] if detail["y_labels"] > 1 else True,
+            rasterized=detail["rasterized"],
+            ax=ax,
+        )
+        if config.rotate_x is not None:
+            plt.setp(ax.get_xticklabels(), rotation=config.rotate_x)
+        plt.setp(ax.get_yticklabels(), rotation=config.rotate_y)
+        ax.set_title(config.title)
+        fig.tight_layout()
+    return fig
+
+@traced()
+def clustered_heatmap(df: pd.DataFrame, config: HeatmapConfig) -> Figure:
+    """Heatmap with its rows and/or columns (config.cluster) reordered by hierarchical clustering, with the dendrograms
+    drawn next to them. The linkage comes from functions.cluster, which caches it per matrix, so redrawing the same
+    data with another style doesn't cluster it again. The cells are one pcolormesh, like the tiles of tiled_heatmap, with
+    the same level of detail as heatmap (pooling, thinned labels and no borders on small cells)."""
+    from matplotlib.path import Path
+    from matplotlib.patches import PathPatch
+    from functions.cluster import cluster_linkage, dendrogram_lines
+
+    if config.cluster not in ("rows", "columns", "both"):
+        print(f"Unknown cluster {config.cluster!r}, use 'rows', 'columns' or 'both'.")
+        sys.exit(1)
+    matrix = heatmap_matrix(df, config)
+    Pal, vmin_val, vmax_val = _color_scale(matrix, config)
+    Pal.set_bad(color="#ffffff")                              #missing (x, y) pairs
+    values = matrix.to_numpy(dtype=float)
+    settings = {"method": config.linkage_method, "metric": config.linkage_metric,
+                "optimal": config.optimal_ordering, "backend": config.linkage_backend}
+    trees = {}
+    if config.cluster in ("rows", "both"):
+        trees["rows"] = cluster_linkage(values, **settings)
+        values, matrix = values[trees["rows"][1]], matrix.iloc[trees["rows"][1]]
+    if config.cluster in ("columns", "both"):
+        trees["columns"] = cluster_linkage(values.T, **settings)
+        values, matrix = values[:, trees["columns"][1]], matrix.iloc[:, trees["columns"][1]]
+
+    with plot_context(config):
+        fig = plt.figure(figsize=config.figsize or (8, 10))
+        grid = fig.add_gridspec(2, 2, width_ratios=[0.15, 1], height_ratios=[0.12, 1], wspace=0.02, hspace=0.02)
+        ax = fig.add_subplot(grid[1, 1])
+        detail = _level_of_detail(values.shape, _axes_inches(fig, ax), config)
+        row_edges = np.minimum(np.arange(0, values.shape[0] + detail["row_step"], detail["row_step"]), values.shape[0])
+        column_edges = np.minimum(np.arange(0, values.shape[1] + detail["column_step"], detail["column_step"]), values.shape[1])
+        cells = values
+        if detail["row_step"] > 1 or detail["column_step"] > 1:                #more cells than pixels
+            cells = pool_matrix(values, detail["row_step"], detail["column_step"], config.pooling)
+        mesh = ax.pcolormesh(column_edges, row_edges, np.ma.masked_invalid(cells), cmap=Pal, vmin=vmin_val, vmax=vmax_val,
+                             edgecolors="white" if detail["borders"] else "face",
+                             linewidth=config.linewidths if detail["borders"] else 0, rasterized=detail["rasterized"])
+        ax.set_xlim(0, values.shape[1])
+        ax.set_ylim(values.shape[0], 0)                 #first row at the top, like sns.heatmap
+        shown_columns = np.arange(0, values.shape[1], detail["x_labels"])     #the labels that fit, at their own cells
+        shown_rows = np.arange(0, values.shape[0], detail["y_labels"])
+        ax.set_xticks(shown_columns + 0.5, [str(matrix.columns[column]) for column in shown_columns],
+                      rotation=config.rotate_x if config.rotate_x is not None else 90)
+        ax.set_yticks(shown_rows + 0.5, [str(matrix.index[row]) for row in shown_rows], rotation=config.rotate_y)
+        ax.yaxis.tick_right()
+        ax.tick_params(length=0)
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+
+        for axis, (linkage, leaves) in trees.items():
+            tree_ax = fig.add_subplot(grid[1, 0] if axis == "rows" else grid[0, 1])
+            lines = dendrogram_lines(linkage, leaves)
+            if axis == "rows":
+                lines = lines[:, :, ::-1]                   #height on x, rows on y
+                tree_ax.set_ylim(values.shape[0], 0)
+                tree_ax.set_xlim(lines[:, :, 0].max(initial=1) * 1.05, 0)      #root on the left
+            else:
+                tree_ax.set_xlim(0, values.shape[1])
+                tree_ax.set_ylim(0, lines[:, :, 1].max(initial=1) * 1.05)
+            codes = np.tile([Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO], len(lines))
+            tree_ax.add_patch(PathPatch(Path(lines.reshape(-1, 2), codes), fill=False, linewidth=0.5))   #one path, not one per merge
+            tree_ax.set_axis_off()
+        color_ax = fig.add_subplot(grid[0, 0])              #top left corner, like sns.clustermap
+        fig.colorbar(mesh, cax=color_ax.inset_axes([0.7, 0.05, 0.15, 0.9]))
+        color_ax.set_axis_off()
+        fig.suptitle(config.title)
+    return fig
+
+@traced()
+def plate_tiles(df: pd.DataFrame, config: HeatmapConfig, prefix: str = "") -> list[tuple[str, pd.DataFrame]]:
+    """Splits a table into one heatmap matrix per value of config.plate_column (the whole table is one tile if it
+    is None). Returns (title, matrix) pairs. Well positions of all plates are placed with a single scatter."""
+    if config.plate_column is None:
+        return [(prefix, heatmap_matrix(df, config))]
+    if config.well_positions:
+        stack, layout, labels = plate_stack(df[config.well_column], df[config.value], df[config.plate_column], config.plate)
+        return [(f"{prefix}{label}", pd.DataFrame(matrix, index=layout.row_labels(), columns=layout.column_labels()))
+                for label, matrix in zip(labels, stack)]
+    return [(f"{prefix}{label}", heatmap_matrix(plate, config))
+            for label, plate in df.groupby(config.plate_column, sort=False, observed=True)]
+
+def read_plate_tiles(filenames: list[str], config: HeatmapConfig):
+    """Reads the files one after another and yields their plate matrices, so only one dataset is in memory at a time.
+    With several files the tiles are titled by file name (and plate)."""
+    for filename in filenames:
+        prefix = ""
+        if len(filenames) > 1:
+            prefix = os.path.splitext(os.path.basename(filename))[0] + (" " if config.plate_column is not None else "")
+        yield from plate_tiles(read_plot_data(filename, config), config, prefix)
+
+@traced()
+def tiled_heatmap(tiles, config: HeatmapConfig) -> Figure:
+    """Draws many heatmap matrices as a grid of small heatmaps sharing one color bar. The color scale is found in a
+    single pass over the tiles (config.vmin/vmax override it), and each tile is drawn as one pcolormesh, so 50 plates
+    of 1536 wells draw as 50 artists instead of 76800 cell patches."""
+    titles, matrices = [], []
+    low, high = math.inf, -math.inf
+    for title, matrix in tiles:                         #tiles may be a generator reading one file at a time
+        titles.append(title)
+        matrices.append(matrix)
+        values = matrix.to_numpy(dtype=float)
+        if not np.isnan(values).all():
+            low, high = min(low, np.nanmin(values)), max(high, np.nanmax(values))
+    if len(matrices) == 0 or high == -math.inf:         #no tiles, or only empty wells (no color scale to draw)
+        raise ValueError("No plates to draw.")
+    vmin_val = config.vmin if config.vmin is not None else low
+    vmax_val = config.vmax if config.vmax is not None else math.ceil(high)
+
+    Pal = sns.light_palette(config.top_color, as_cmap=True)   #white to a saturated color
+    Pal.set_bad(color="#ffffff")                              #empty wells
+    if config.threshold is not None:
+        vmin_val = config.threshold
+        Pal.set_under(color="#ffffff")
+
+    n_columns = min(config.tile_columns, len(matrices))
+    n_rows = math.ceil(len(matrices) / n_columns)
+    with plot_context(config):
+        fig, axes = plt.subplots(n_rows, n_columns, squeeze=False,
+                                 figsize=(config.tile_size * n_columns + 1, config.tile_size * 0.75 * n_rows + 0.5))
+        rasterized = sum(matrix.size for matrix in matrices) > RASTERIZE_CELLS
+        borders = config.linewidths > 0 and max(matrix.size for matrix in matrices) <= BORDER_CELLS
+        for index, (ax, title, matrix) in enumerate(zip(axes.flat, titles, matrices)):
+            mesh = ax.pcolormesh(np.ma.masked_invalid(matrix.to_numpy(dtype=float)), cmap=Pal, vmin=vmin_val, vmax=vmax_val,
+                                 edgecolors="white" if borders else "face", linewidth=config.linewidths / 4 if borders else 0,
+                                 rasterized=rasterized)
+            ax.invert_yaxis()                           #first row (A) at the top, like the plate
+            ax.set_aspect("equal" if config.well_positions else "auto")
+            _tile_ticks(ax, matrix, x_labels=index + n_columns >= len(matrices), y_labels=index % n_columns == 0)
+            ax.set_title(title, fontsize="small")
+        for ax in axes.flat[len(matrices):]:
+            ax.set_visible(False)
+        fig.colorbar(mesh, ax=axes.ravel().tolist(), shrink=0.8)
+        fig.suptitle(config.title)
+    return fig
+
+def plate_heatmap(df: pd.DataFrame, config: HeatmapConfig) -> Figure:
+    """Tiled heatmap of every plate (config.plate_column) of one export, on one color scale."""
+    return tiled_heatmap(plate_tiles(df, config), config)
+
+def _tile_ticks(ax, matrix: pd.DataFrame, x_labels: bool = True, y_labels: bool = True, max_labels: int = 8):
+    """Labels at most max_labels rows and columns of a tile, evenly spaced, at the cell centers. Only the tiles on the
+    left edge get row labels and the bottom tiles column labels, the others have no ticks (which also saves time)."""
+    for labels, show, set_ticks, set_labels in ((matrix.columns, x_labels, ax.set_xticks, ax.set_xticklabels),
+                                                (matrix.index, y_labels, ax.set_yticks, ax.set_yticklabels)):
+        if not show:
+            set_ticks([])
+            continue
+        step = max(1, math.ceil(len(labels) / max_labels))
+        positions = np.arange(0, len(labels), step)
+        set_ticks(positions + 0.5)
+        set_labels([str(labels[position]) for position in positions], fontsize="x-small")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""Line plots with the individual observations drawn as a scatterplot."""
+
+import seaborn as sns
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from functions.aggregate import summarize
+from functions.plots.bars import hue_colors
+from functions.plots.config import PlotConfig
+from functions.plots.output import plot_context
+from functions.plots.points import categorical_order
+from functions.trace import traced
+
+BAND_ALPHA = .2                         #opacity of the confidence interval band (seaborn's default)
+
+def line_bands(ax, df: pd.DataFrame, config: PlotConfig, colors: dict|None) -> pd.DataFrame:
+    """Draws the bootstrap confidence interval (config.ci) of the mean at every x value as a band per hue value,
+    from one summary of all the (hue, x) groups. Returns the summary."""
+    columns = [config.hue, config.x] if config.hue is not None else [config.x]
+    summary = summarize(df, config.y, columns, confidence=config.ci / 100, n_boot=config.n_boot, seed=config.seed)
+    summary = summary[summary["n"] > 0]
+    lines = summary.groupby(config.hue, observed=True, sort=False) if config.hue is not None else [(None, summary)]
+    for level, points in lines:
+        points = points.sort_values(config.x)
+        color = colors[level] if colors is not None else "C0"
+        ax.fill_between(points[config.x], points["boot_low"], points["boot_high"], color=color, alpha=BAND_ALPHA,
+                        linewidth=0)
+    return summary
+
+@traced()
+def line(df: pd.DataFrame, config: PlotConfig) -> Figure:
+    """Generates a line plot of the mean with a confidence interval band, with every observation drawn on top."""
+    with plot_context(config):
+        fig, ax = plt.subplots(figsize=config.figsize)
+        colors = None
+        if config.hue is not None:
+            colors = hue_colors(categorical_order(df[config.hue], config.hue_order), config.palette)
+        line_bands(ax, df, config, colors)  #confidence interval bands, bootstrapped once for all the lines
+        sns.lineplot(data=df,
+            x=config.x,
+            y=config.y,
+            hue=config.hue,             #grouping variable (what the color change will be based on)
+            hue_order=config.hue_order,
+            palette=colors,
+            markers=True,
+            dashes=False,
+            errorbar=None,              #the bands are drawn by line_bands
+            ax=ax,
+        )
+        sns.scatterplot(data=df,
+            x=config.x,
+            y=config.y,
+            hue=config.hue,
+            hue_order=config.hue_order,
+            palette=colors,
+            legend=False,
+            ax=ax,
+        )
+        if config.xticks is not None:
+            ax.set(xticks=config.xticks)
+        if config.ylim is not None:
+            ax.set(ylim=config.ylim)
+        ax.set_title(config.title)
+    return fig
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+"""Shared helpers for drawing and saving figures from the plot functions."""
+
+import io
+import os
+import sys
+import time
+from dataclasses import dataclass
+import seaborn as sns
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.collections import Collection
+from matplotlib.figure import Figure
+import functions.parameters.all_file_funcs as myfunc
+from functions.svg import HASH_SALT, SVG_METADATA, write_svg
+from functions.trace import span
+
+RASTER_FORMATS = ["png", "jpeg", "jpg"]
+VECTOR_FORMATS = ["svg", "svgz", "pdf"]
+DPI_PRESETS = {"screen": 100, "print": 300, "poster": 600}     #dpi of the raster formats and of rasterized layers
+SUMMARY_SUFFIX = "_summary.csv"         #appended to the image name (without extension) for the table saved with it
+MATRIX_SUFFIX = "_matrix.csv"           #and for the full heatmap matrix
+RASTERIZE_POINTS = 5000                 #vector formats draw collections with more dots/cells than this as an embedded image
+
+def plot_context(config) -> matplotlib.rc_context:
+    """Returns a context in which a figure is drawn. If config.theme is set the default seaborn theme is applied
+    inside the context only, so repeated calls in one process don't change each other's style."""
+    rc = {}
+    if config.theme:
+        rc.update(sns.axes_style("darkgrid"))
+        rc.update(sns.plotting_context("notebook"))
+    return matplotlib.rc_context(rc)
+
+def dense_collections(fig: Figure, limit: int|None = None) -> list[Collection]:
+    """The collections of the figure (swarm dots, heatmap cells, ...) with more than limit (RASTERIZE_POINTS)
+    elements, which are not rasterized yet."""
+    limit = RASTERIZE_POINTS if limit is None else limit
+    dense = []
+    for ax in fig.axes:
+        for collection in ax.collections:
+            size = len(collection.get_offsets())
+            if collection.get_array() is not None:          #colormapped cells (heatmaps)
+                size = max(size, collection.get_array().size)
+            if size > limit and not collection.get_rasterized():
+                dense.append(collection)
+    return dense
+
+def check_formats(extensions: list[str]):
+    """Exits if one of the image formats can't be written."""
+    unknown = [extension for extension in extensions if extension not in VECTOR_FORMATS + RASTER_FORMATS]
+    if len(unknown) > 0:
+        print(f"Unknown image format(s): {', '.join(unknown)}. Use one of {', '.join(VECTOR_FORMATS + RASTER_FORMATS)}.")
+        sys.exit(1)
+
+def render_pixels(fig: Figure, dpi: float, **savefig_kws):
+    """Draws the figure with Agg exactly as savefig would for a png (including bbox_inches="tight"), and returns the
+    pixels as a (height, width, 4) RGBA array without encoding them."""
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    canvas = fig.canvas
+    agg = FigureCanvasAgg(fig)
+    try:
+        agg.print_figure(io.BytesIO(), format="rgba", dpi=dpi, **savefig_kws)
+        return np.asarray(agg.renderer.buffer_rgba()).copy()    #the renderer of the (cropped) saved image
+    finally:
+        fig.set_canvas(canvas)
+
+@dataclass
+class ExportRecord:
+    """Stores the size of one written image and the time it took to draw, encode and write it."""
+    path: str
+    size: int                           #bytes written
+    seconds: float
+
+    def __str__(self) -> str:
+        return f"{os.path.basename(self.path)} ({self.size / 1000:.1f} kB in {self.seconds:.2f} s)"
+
+def _write_raster(path: str, pixels, extension: str, dpi: float) -> tuple[int, float]:
+    from PIL import Image
+
+    start = time.perf_counter()
+    with span("encode", format=extension):
+        image = Image.fromarray(pixels, mode="RGBA")
+        if extension == "png":
+            image.save(path, format="png", dpi=(dpi, dpi))
+        else:
+            image.convert("RGB").save(path, format="jpeg", quality=95, dpi=(dpi, dpi))
+    return os.path.getsize(path), time.perf_counter() - start
+
+def _write_vector(path: str, data: bytes, extension: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    with span("encode", format=extension):
+        if extension in ("svg", "svgz"):
+            size = write_svg(path, data, compress=extension == "svgz")
+        else:
+            with open(path, "wb") as file:
+                size = file.write(data)
+    return size, time.perf_counter() - start
+
+def export_figure(fig: Figure, outputs: list[str], dpi: float|str = "print", **savefig_kws) -> list[ExportRecord]:
+    """Writes one drawn figure to every output path, in the format of its extension (svg, svgz, pdf, png, jpeg).
+
+    The vector formats draw dense collections (dense_collections) as an embedded image at dpi, so thousands of dots
+    don't become thousands of paths. svg files are made reproducible and minified by functions.svg (svgz files are
+    also gzipped). The figure is drawn once per format in this thread (matplotlib figures can't be drawn from
+    several threads), while the png/jpeg compression and the file writes run in a thread pool, next to the drawing
+    of the other formats. dpi is a number or one of DPI_PRESETS. Returns the size and time of every file."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    dpi = DPI_PRESETS.get(dpi, dpi)
+    check_formats([os.path.splitext(output)[1][1:].lower() for output in outputs])
+
+    with ThreadPoolExecutor() as pool:
+        writes = []
+        for output in outputs:
+            start = time.perf_counter()
+            extension = os.path.splitext(output)[1][1:].lower()
+            if extension in RASTER_FORMATS:
+                with span("save", format=extension):
+                    pixels = render_pixels(fig, dpi, **savefig_kws)
+                writes.append((output, time.perf_counter() - start, pool.submit(_write_raster, output, pixels, extension, dpi)))
+                continue
+            dense = dense_collections(fig)
+            for collection in dense:
+                collection.set_rasterized(True)
+            buffer = io.BytesIO()
+            try:
+                with span("save", format=extension):
+                    if extension in ("svg", "svgz"):
+                        with matplotlib.rc_context({"svg.hashsalt": HASH_SALT}):
+                            fig.savefig(buffer, format="svg", dpi=dpi, metadata=SVG_METADATA, **savefig_kws)
+                    else:
+                        fig.savefig(buffer, format=extension, dpi=dpi, **savefig_kws)
+            finally:
+                for collection in dense:
+                    collection.set_rasterized(False)
+            writes.append((output, time.perf_counter() - start, pool.submit(_write_vector, output, buffer.getvalue(), extension)))
+        records = []
+        for output, drawing, write in writes:
+            size, writing = write.result()
+            records.append(ExportRecord(output, size, drawing + writing))
+    return records
+
+def save_figure(fig: Figure, filename: str, plot_type: str = "Plot", extension: str|list[str] = "svg", csv: bool = True,
+                show: bool = False, table=None, matrix=None, dpi: float|str = "print", report: bool = True, **savefig_kws) -> str:
+    """Saves a figure to generated_images with a name built by my_output_file, then closes it.
+    extension can be a list of formats (e.g. ["svg", "png", "pdf"]), all written from the same drawn figure by
+    export_figure. If show is True the plot is previewed first (this may break the saved file). A table (e.g. the
+    summary of a bar plot from summarize_bars) is saved next to the image as <image name>_summary.csv, and a heatmap
+    matrix, at full resolution whatever the image shows, as <image name>_matrix.csv.
+    With report, the size and time of every written file is printed. Returns the path of the first format."""
+    extensions = [extension] if isinstance(extension, str) else list(extension)
+    check_formats(extensions)
+    outputs = [myfunc.my_output_file(filename, plot_type=plot_type, extension=name, csv=csv) for name in extensions]
+    if show:
+        plt.show()
+    records = export_figure(fig, outputs, dpi=dpi, **savefig_kws)
+    plt.close(fig)
+    if report:
+        print("Saved " + ", ".join(str(record) for record in records))
+    if table is not None:
+        table.to_csv(os.path.splitext(outputs[0])[0] + SUMMARY_SUFFIX, index=False)
+    if matrix is not None:
+        matrix.to_csv(os.path.splitext(outputs[0])[0] + MATRIX_SUFFIX)
+    return outputs[0]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+"""The dots of the individual observations drawn over bars and violins, laid out by functions.swarm."""
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.artist import allow_rasterization
+from matplotlib.collections import PathCollection
+from matplotlib.markers import MarkerStyle
+from matplotlib.transforms import IdentityTransform
+from functions.swarm import beeswarm_offsets, jitter_offsets, density_subsample
+from functions.trace import span
+
+CATEGORY_WIDTH = 0.8                    #width of a bar/violin group on the categorical axis, as in seaborn
+
+class SwarmCollection(PathCollection):
+    """Scatter dots that are moved into a beeswarm whenever they are drawn, because the layout depends on the final
+    size of the axes. The layout is only recomputed if the axes limits or size changed: it is the same at every dpi
+    (pixel distances and the dot size scale together) and wherever the axes are moved, so saving several formats or
+    a tight bounding box reuses it."""
+
+    def __init__(self, paths, centers, y, groups, half_width: float, **kwargs):
+        super().__init__(paths, offsets=np.column_stack([centers, y]), **kwargs)
+        self._centers = centers
+        self._y = y
+        self._group_rows = _group_rows(groups)
+        self._half_width = half_width
+        self._layout_key = None
+
+    @allow_rasterization
+    def draw(self, renderer):
+        transform = self.axes.transData
+        matrix = transform.get_matrix()
+        key = (round(matrix[0, 0] * 72 / self.figure.dpi, 6), round(matrix[1, 1] * 72 / self.figure.dpi, 6))
+        if key != self._layout_key:
+            self._layout_key = key
+            with span("swarm_layout", points=len(self._y)):
+                xy = transform.transform(np.column_stack([self._centers, self._y]))
+                diameter = (np.sqrt(self.get_sizes()[0]) + self.get_linewidths()[0]) * self.figure.dpi / 72
+                max_offset = abs(transform.transform([(self._half_width, 0)])[0, 0] - transform.transform([(0, 0)])[0, 0])
+                for rows in self._group_rows:
+                    xy[rows, 0] += beeswarm_offsets(xy[rows, 1], diameter, max_offset)
+                self.set_offsets(transform.inverted().transform(xy))
+        super().draw(renderer)
+
+def _group_rows(groups) -> list:
+    """Splits the row positions by group code."""
+    order = np.argsort(groups, kind="stable")
+    return np.split(order, np.flatnonzero(np.diff(groups[order])) + 1)
+
+def categorical_order(values: pd.Series, order: list|None = None) -> list:
+    """The order of the categories along a categorical axis, following seaborn: the given order, the categories of a
+    categorical column, or the values in order of appearance (sorted if they are all numbers)."""
+    if order is not None:
+        return list(order)
+    if values.dtype == "category":
+        return list(values.cat.categories)
+    levels = list(pd.unique(values.dropna()))
+    if pd.api.types.is_numeric_dtype(values):
+        levels = sorted(levels)
+    return levels
+
+def group_positions(x_levels: list, hue_levels: list|None = None) -> dict:
+    """The x position of the center of every bar: x values sit at 0, 1, 2, ... and hue levels are dodged within
+    CATEGORY_WIDTH, as drawn by seaborn. Keys are x values, or (x value, hue value) with hue levels."""
+    if hue_levels is None:
+        return {x_value: float(index) for index, x_value in enumerate(x_levels)}
+    width = CATEGORY_WIDTH / len(hue_levels)
+    return {(x_value, hue_value): x_index - CATEGORY_WIDTH / 2 + width * (hue_index + 0.5)
+            for x_index, x_value in enumerate(x_levels) for hue_index, hue_value in enumerate(hue_levels)}
+
+def swarm_points(data: pd.DataFrame, x: str, y: str, hue: str|None = None, order: list|None = None,
+                 hue_order: list|None = None, dodge: bool|str = False, kind: str = "swarm", max_points: int|None = 500,
+                 size: float = 5, linewidth: float = .75, facecolor: str = "#FFFFFF", edgecolor: str = "black",
+                 seed: int = 0, ax=None, **kwargs) -> PathCollection:
+    """Draws the observations of every x category (and hue level, with dodge) as dots, in a beeswarm (kind="swarm") or
+    randomly jittered (kind="strip"). Groups with more than max_points observations are subsampled keeping the shape
+    of their distribution. dodge="auto" dodges like seaborn's default, only if an x category has several hue levels
+    in data. Can be passed to FacetGrid.map_dataframe (its color/label arguments are ignored)."""
+    ax = ax or plt.gca()
+    data = data.dropna(subset=[y])
+    if dodge == "auto":
+        dodge = hue is not None and bool((data.groupby(x, observed=True)[hue].nunique() > 1).any())
+    x_levels = categorical_order(data[x], order)
+    x_codes = pd.Index(x_levels).get_indexer(data[x])
+    centers = x_codes.astype(float)
+    half_width = CATEGORY_WIDTH / 2
+    hue_codes = np.zeros(len(data), dtype=np.int64)
+    n_hues = 1
+    if dodge and hue is not None:
+        hue_levels = categorical_order(data[hue], hue_order)
+        hue_codes = pd.Index(hue_levels).get_indexer(data[hue])
+        n_hues = max(len(hue_levels), 1)
+        half_width = CATEGORY_WIDTH / n_hues / 2
+        centers += -CATEGORY_WIDTH / 2 + half_width * (2 * hue_codes + 1)
+    placed = (x_codes >= 0) & (hue_codes >= 0)                #values missing from order/hue_order are not drawn
+    values = data[y].to_numpy(dtype=float)
+    groups = (x_codes * n_hues + hue_codes)[placed]
+    centers, values = centers[placed], values[placed]
+
+    if max_points is not None:
+        keep = [rows[density_subsample(values[rows], max_points, seed=seed)] for rows in _group_rows(groups) if len(rows) > 0]
+        keep = np.sort(np.concatenate(keep)) if len(keep) > 0 else np.zeros(0, dtype=np.int64)
+        centers, values, groups = centers[keep], values[keep], groups[keep]
+
+    marker = MarkerStyle("o")
+    style = {"sizes": [size ** 2], "facecolors": facecolor, "edgecolors": edgecolor, "linewidths": linewidth,
+             "offset_transform": ax.transData, "zorder": 3}
+    paths = [marker.get_path().transformed(marker.get_transform())]
+    if kind == "swarm":
+        points = SwarmCollection(paths, centers, values, groups, half_width, **style)
+    else:
+        offsets = np.column_stack([centers + jitter_offsets(len(values), half_width * 1.6, seed), values])
+        points = PathCollection(paths, offsets=offsets, **style)
+    points.set_transform(IdentityTransform())           #marker sizes are in points, like plt.scatter
+    if len(values) > 0:                                  #e.g. an empty facet
+        ax.add_collection(points)
+        ax.autoscale_view(scalex=False)                  #the categorical x axis keeps its limits
+    return points
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+"""Volcano plots: the log2 fold change against -log10 p of every feature, colored by up/down/not significant."""
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from functions.plots.config import VolcanoConfig
+from functions.plots.output import plot_context
+from functions.swarm import grid_decimate
+from functions.trace import traced
+from functions.volcano import volcano_table, top_features
+
+DECIMATE_CELL = 0.5                     #ns dots closer than this many dot diameters share one drawn dot
+LABEL_RADII = (1, 2, 3, 5, 8)           #distances (dot diameters) at which a label is tried around its dot
+LABEL_DIRECTIONS = [(1, 1), (-1, 1), (1, -1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)]
+LABEL_FONTSIZE = 7
+
+def _axis_limits(values, limits: tuple|None, symmetric: bool) -> tuple:
+    """The given limits, or the range of the finite values plus 5% (symmetric around 0 for fold changes)."""
+    if limits is not None:
+        return limits
+    finite = values[np.isfinite(values)]
+    top = np.abs(finite).max() if len(finite) > 0 else 1.0
+    top = top * 1.05 if top > 0 else 1.0
+    return (-top, top) if symmetric else (0, top)
+
+def _overlaps(box, boxes) -> bool:
+    """Whether a (x0, y0, x1, y1) box overlaps any row of an (n, 4) array of boxes."""
+    if len(boxes) == 0:
+        return False
+    boxes = np.asarray(boxes)
+    return bool(((box[0] < boxes[:, 2]) & (boxes[:, 0] < box[2]) & (box[1] < boxes[:, 3]) & (boxes[:, 1] < box[3])).any())
+
+def _place_labels(ax, x, y, names: list[str], radius: float, fontsize: float = LABEL_FONTSIZE):
+    """Labels the dots at (x, y) with names, connected by a line. Each label goes to the first spot around its dot
+    (LABEL_DIRECTIONS at growing LABEL_RADII) where it stays inside the axes and overlaps neither the labels placed
+    before it nor any of the labelled dots; labels that fit nowhere take the closest spot. radius is the dot radius
+    in points."""
+    fig = ax.figure
+    renderer = fig.canvas.get_renderer()
+    to_pixels = fig.dpi / 72
+    centers = ax.transData.transform(np.column_stack([x, y]))
+    dot = radius * to_pixels
+    placed = [(cx - dot, cy - dot, cx + dot, cy + dot) for cx, cy in centers]
+    frame = ax.get_window_extent(renderer)
+
+    for (cx, cy), name in zip(centers, names):
+        text = ax.text(0, 0, name, fontsize=fontsize)
+        size = text.get_window_extent(renderer)
+        text.remove()
+        width, height = size.width, size.height
+        choice = None
+        for step in LABEL_RADII:
+            for dx, dy in LABEL_DIRECTIONS:
+                norm = np.hypot(dx, dy)
+                offset = (dx / norm * step * 2 * dot, dy / norm * step * 2 * dot)
+                left = cx + offset[0] - width * (dx < 0) - width / 2 * (dx == 0)
+                bottom = cy + offset[1] - height * (dy < 0) - height / 2 * (dy == 0)
+                box = (left, bottom, left + width, bottom + height)
+                inside = frame.x0 <= box[0] and box[2] <= frame.x1 and frame.y0 <= box[1] and box[3] <= frame.y1
+                if choice is None:
+                    choice = (dx, dy, offset, box)
+                if inside and not _overlaps(box, placed):
+                    choice = (dx, dy, offset, box)
+                    break
+            else:
+                continue
+            break
+        dx, dy, offset, box = choice
+        placed.append(box)
+        ax.annotate(name, xy=ax.transData.inverted().transform((cx, cy)),
+                    xytext=(offset[0] / to_pixels, offset[1] / to_pixels), textcoords="offset points",
+                    ha={1: "left", -1: "right", 0: "center"}[dx], va={1: "bottom", -1: "top", 0: "center"}[dy],
+                    fontsize=fontsize, arrowprops={"arrowstyle": "-", "linewidth": 0.5, "color": "0.3",
+                                                   "shrinkA": 0, "shrinkB": radius})
+
+@traced()
+def volcano(df: pd.DataFrame, config: VolcanoConfig, table: pd.DataFrame|None = None) -> Figure:
+    """Generates a volcano plot of a feature table (one row per feature, named by the index). The fold changes,
+    p-values and classes come from table (functions.volcano.volcano_table), computed here if not given.
+
+    The not significant features are drawn as one rasterized layer, keeping one dot per half a dot diameter of the
+    plot (grid_decimate), so tens of thousands of overlapping dots cost a few thousand; the up/down features stay
+    vector markers. Dashed lines mark the fold change and p-value thresholds and the config.top_labels most
+    significant hits are labelled with their names. Infinite fold changes are drawn at the edge of the x axis."""
+    if table is None:
+        table = volcano_table(df, config)
+    fold = table["log2_fold_change"].to_numpy(dtype=float)
+    neg_log_p = table["neg_log10_p"].to_numpy(dtype=float)
+    classes = table["class"].to_numpy()
+
+    with plot_context(config):
+        fig, ax = plt.subplots(figsize=config.figsize)
+        xlim = _axis_limits(fold, config.xlim, symmetric=True)
+        ylim = _axis_limits(neg_log_p, config.ylim, symmetric=False)
+        ax.set(xlim=xlim, ylim=ylim)                #the decimation grid needs the final data to pixel scale
+        fold = np.clip(fold, *xlim)                 #infinite (and clipped) fold changes sit on the edge
+        radius = np.sqrt(config.dot_size) / 2       #marker radius in points
+
+        ns = np.flatnonzero(classes == "ns")
+        pixels = ax.transData.transform(np.column_stack([fold[ns], neg_log_p[ns]]))
+        keep = ns[grid_decimate(pixels[:, 0], pixels[:, 1], DECIMATE_CELL * 2 * radius * fig.dpi / 72)]
+        ax.scatter(fold[keep], neg_log_p[keep], s=config.dot_size, color=config.ns_color, linewidths=0,
+                   rasterized=True, label=f"ns ({len(ns)})")
+        for name, color in (("down", config.down_color), ("up", config.up_color)):
+            hits = classes == name
+            ax.scatter(fold[hits], neg_log_p[hits], s=config.dot_size, color=color, edgecolors="white",
+                       linewidths=0.3, label=f"{name} ({hits.sum()})")
+
+        line_style = {"color": "0.4", "linestyle": "--", "linewidth": 0.8, "zorder": 0}
+        for threshold in (-config.min_fold_change, config.min_fold_change):
+            ax.axvline(threshold, **line_style)
+        significant = table["p_adjusted"].to_numpy() <= config.alpha
+        if significant.any():                       #the largest raw p-value still significant after correction
+            ax.axhline(neg_log_p[significant].min(), **line_style)
+
+        if config.top_labels > 0:
+            top = top_features(table, config.top_labels)
+            _place_labels(ax, fold[top], neg_log_p[top], [str(name) for name in table.index[top]], radius)
+
+        if config.fold_change is not None:
+            ax.set_xlabel(config.fold_change)
+        else:
+            ax.set_xlabel(f"log2 fold change ({config.numerator} / {config.denominator})")
+        ax.set_ylabel("-log10 p")
+        ax.legend(frameon=False, loc="upper left", bbox_to_anchor=(1.01, 1), fontsize="small")
+        ax.set_title(config.title)
+    return fig
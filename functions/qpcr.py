@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""
+Relative expression from raw qPCR CT values (the Target Name / CT columns of a QuantStudio export):
+reference-gene ΔCt, ΔΔCt against a control group, 2^-ΔΔCt fold change, and log copies from a standard curve.
+
+Every step works on integer group codes with np.bincount, so there are no per-row or per-group Python loops.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from functions.trace import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# columns added by relative_expression
+DELTA_CT = "Delta Ct"
+DELTA_DELTA_CT = "Delta Delta Ct"
+FOLD_CHANGE = "Relative Expression"
+LOG_FOLD_CHANGE = "LogValue"
+EXPRESSION_COLUMNS = [DELTA_CT, DELTA_DELTA_CT, FOLD_CHANGE, LOG_FOLD_CHANGE]
+
+@dataclass
+class QPCRConfig:
+    """Stores which columns of a qPCR export identify the samples, targets and control group."""
+    reference: str = "GAPDH"                                #reference (housekeeping) gene in the target column
+    control: object = "Uninfected"                          #value of group_col the other groups are compared against
+    group_col: str = "Sample Name"                          #column with the experimental group of every sample
+    sample_cols: list[str] = field(default_factory=lambda: ["Sample Name"])   #columns that together identify one sample
+    match_cols: list[str] = field(default_factory=list)     #compare only against controls with the same values (e.g. tissue)
+    target_col: str = "Target Name"
+    ct_col: str = "CT"
+
+    def columns(self) -> list[str]:
+        """Lists the export columns the calculation needs."""
+        needed = [*self.sample_cols, self.group_col, *self.match_cols, self.target_col, self.ct_col]
+        return list(dict.fromkeys(needed))
+
+def group_codes(df: pd.DataFrame, columns: list[str]):
+    """Returns an integer code per row for every unique combination of the columns, and the table of unique combinations."""
+    import numpy as np
+    import pandas as pd
+
+    codes = np.zeros(len(df), dtype=np.int64)
+    for column in columns:
+        column_codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+        #numbered again after every column (sort keeps the order of the combinations), so the codes stay below the
+        #number of rows instead of growing with the product of the column cardinalities and overflowing
+        codes = pd.factorize(codes * len(uniques) + column_codes, sort=True)[0]
+    _, first_rows, codes = np.unique(codes, return_index=True, return_inverse=True)
+    return codes.ravel(), df[columns].iloc[first_rows].reset_index(drop=True)
+
+def group_mean(values, codes, n_groups: int):
+    """Means of values per group code, ignoring NaN (e.g. wells with an Undetermined CT). Empty groups are NaN."""
+    import numpy as np
+
+    valid = ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+def delta_ct(df: pd.DataFrame, config: QPCRConfig) -> pd.DataFrame:
+    """Averages the technical replicates of every (sample, target) and subtracts the sample's reference-gene CT.
+    Returns one row per sample and non-reference target with the mean CT and the ΔCt."""
+    import numpy as np
+
+    keys = list(dict.fromkeys([*config.sample_cols, config.group_col, *config.match_cols]))
+    ct = df[config.ct_col].to_numpy(dtype=float)
+
+    well_codes, wells = group_codes(df, [*keys, config.target_col])            #one group per (sample, target)
+    mean_ct = group_mean(ct, well_codes, len(wells))
+    sample_codes, samples = group_codes(wells, config.sample_cols)
+
+    is_reference = (wells[config.target_col] == config.reference).to_numpy()
+    reference_ct = group_mean(np.where(is_reference, mean_ct, np.nan), sample_codes, len(samples))
+
+    result = wells.loc[~is_reference].reset_index(drop=True)
+    result[config.ct_col] = mean_ct[~is_reference]
+    result[DELTA_CT] = mean_ct[~is_reference] - reference_ct[sample_codes[~is_reference]]
+    return result
+
+def delta_delta_ct(delta: pd.DataFrame, config: QPCRConfig) -> pd.DataFrame:
+    """Subtracts the mean ΔCt of the control group (per target and match_cols) from every ΔCt, and adds the
+    2^-ΔΔCt fold change and its log10."""
+    import numpy as np
+
+    codes, groups = group_codes(delta, [config.target_col, *config.match_cols])
+    dct = delta[DELTA_CT].to_numpy(dtype=float)
+    is_control = (delta[config.group_col] == config.control).to_numpy()
+    control_dct = group_mean(np.where(is_control, dct, np.nan), codes, len(groups))
+
+    result = delta.copy(deep=False)                         #the new columns don't change delta, so its columns are shared
+    result[DELTA_DELTA_CT] = dct - control_dct[codes]
+    result[FOLD_CHANGE] = np.exp2(-result[DELTA_DELTA_CT])
+    result[LOG_FOLD_CHANGE] = np.log10(result[FOLD_CHANGE])
+    return result
+
+@traced("qpcr")
+def relative_expression(df: pd.DataFrame, config: QPCRConfig) -> pd.DataFrame:
+    """Runs the whole ΔΔCt pipeline on a raw export: one row per sample and target with its mean CT, ΔCt, ΔΔCt,
+    relative expression (2^-ΔΔCt) and LogValue (log10 of the relative expression)."""
+    return delta_delta_ct(delta_ct(df, config), config)
+
+def fit_standard_curve(ct, log10_copies) -> dict[str, float]:
+    """Fits CT = slope * log10(copies) + intercept to a dilution series. Also returns the amplification efficiency
+    (1.0 is a perfect doubling every cycle) and the r squared of the fit."""
+    import numpy as np
+
+    ct = np.asarray(ct, dtype=float)
+    log10_copies = np.asarray(log10_copies, dtype=float)
+    valid = ~(np.isnan(ct) | np.isnan(log10_copies))
+    slope, intercept = np.polyfit(log10_copies[valid], ct[valid], 1)
+    residuals = ct[valid] - (slope * log10_copies[valid] + intercept)
+    r_squared = 1 - np.sum(residuals ** 2) / np.sum((ct[valid] - ct[valid].mean()) ** 2)
+    return {"slope": float(slope), "intercept": float(intercept), "efficiency": float(10 ** (-1 / slope) - 1),
+            "r_squared": float(r_squared)}
+
+def log_copies(ct, slope: float, intercept: float):
+    """Converts CT values to log10 copies with a standard curve (see fit_standard_curve)."""
+    import numpy as np
+
+    return (np.asarray(ct, dtype=float) - intercept) / slope
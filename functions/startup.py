@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+"""Measures how long GraphScripts modules take to import, using python's built-in -X importtime report."""
+
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules imported by the command line tool before any plot is drawn
+CLI_MODULES = ["functions.batch", "functions.plots"]
+# modules imported by a batch worker when it draws its first plot
+RENDER_MODULES = ["functions.plots.categorical", "functions.plots.lines", "functions.plots.heatmaps"]
+
+def profile_imports(modules: list[str]) -> list[tuple[str, int, int]]:
+    """Imports the modules in a fresh interpreter and returns (module, self time, cumulative time) for every module
+    that got imported, in microseconds. A fresh interpreter is used so already imported modules don't hide the cost."""
+    code = "\n".join(f"import {module}" for module in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr.strip().splitlines()[-1])
+        sys.exit(1)
+    timings = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+def print_import_profile(label: str, modules: list[str], top: int = 15):
+    """Prints the total import time of a list of modules and the modules that took the longest to import."""
+    timings = profile_imports(modules)
+    total_us = sum(self_us for _, self_us, _ in timings)
+    print(f"{label}: {total_us / 1000:.1f} ms to import {', '.join(modules)} ({len(timings)} modules)")
+    print(f"  {'self [ms]':>10} {'cumulative [ms]':>16}  module")
+    for name, self_us, cumulative_us in sorted(timings, key=lambda timing: timing[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:>10.1f} {cumulative_us / 1000:>16.1f}  {name}")
@@ -0,0 +1,11 @@
+"""Statistical tests between the groups of a plot and bootstrap confidence intervals. The plots draw the results with
+functions.plots.annotate."""
+
+from functions.stats.pairwise import StatsConfig, pairwise_tests, adjust_pvalues, pvalue_label, default_pairs
+from functions.stats.tests import mann_whitney
+from functions.stats.fdr import fdr_adjust, storey_pi0
+from functions.stats.resampling import permutation_test, bootstrap_test, resample_pairs
+from functions.stats.bootstrap import bootstrap_means, bootstrap_ci
+
+__all__ = ["StatsConfig", "pairwise_tests", "adjust_pvalues", "pvalue_label", "default_pairs", "mann_whitney",
+           "fdr_adjust", "storey_pi0", "permutation_test", "bootstrap_test", "resample_pairs", "bootstrap_means", "bootstrap_ci"]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+Bootstrap confidence intervals of the group means, for the line plot bands and the "boot" bar error bars.
+
+The resamples of many groups are drawn as one matrix (n_boot rows, every value of every group as columns) and
+summed per group with np.add.reduceat, instead of one bootstrap per group like seaborn does. The bootstrap means
+of every group are memoised by the hash of its values, n_boot and the seed, so rendering the same data again
+(another output format, another style) reuses them. Every group is seeded from its own values, so a group gets the
+same interval whichever plot or call it is drawn in.
+"""
+
+import hashlib
+
+from functions.trace import traced
+
+BATCH_VALUES = 1 << 22                  #number of resampled values per batch (bounds the memory of a batch)
+CACHE_SIZE = 4096                       #groups whose bootstrap means are kept
+
+_means_cache = {}
+
+def _values_key(values) -> bytes:
+    return hashlib.sha1(values.tobytes()).digest()
+
+def _bootstrap_groups(groups: list, keys: list[bytes], n_boot: int, seed: int):
+    """Bootstrap means of the groups, as an (n_boot, groups) matrix."""
+    import numpy as np
+
+    sizes = np.array([len(values) for values in groups])
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    pooled = np.concatenate(groups)
+    draws = np.concatenate([np.random.default_rng([seed, int.from_bytes(key[:8], "little")]).random((n_boot, size))
+                            for key, size in zip(keys, sizes)], axis=1)
+    rows = (starts.repeat(sizes) + (draws * sizes.repeat(sizes)).astype(np.int64))     #a random row of its own group
+    return np.add.reduceat(pooled[rows], starts, axis=1) / sizes
+
+@traced("bootstrap")
+def bootstrap_means(groups: list, n_boot: int = 1000, seed: int = 0) -> list:
+    """The n_boot bootstrap means of every group of values (NaN values are left out), drawn in batches of groups
+    and memoised. Empty groups get an empty array."""
+    import numpy as np
+
+    groups = [np.asarray(values, dtype=float) for values in groups]
+    groups = [values[~np.isnan(values)] for values in groups]
+    keys = [(_values_key(values), n_boot, seed) for values in groups]
+    found = {key: _means_cache[key] for key in keys if key in _means_cache}
+    missing = {key: values for key, values in zip(keys, groups) if len(values) > 0 and key not in found}
+
+    batches, batch, batch_values = [], [], 0
+    for key, values in missing.items():                 #as many groups per batch as fit in BATCH_VALUES
+        if batch and (batch_values + len(values)) * n_boot > BATCH_VALUES:
+            batches.append(batch)
+            batch, batch_values = [], 0
+        batch.append(key)
+        batch_values += len(values)
+    if batch:
+        batches.append(batch)
+
+    for batch in batches:
+        means = _bootstrap_groups([missing[key] for key in batch], [key[0] for key in batch], n_boot, seed)
+        for column, key in enumerate(batch):
+            found[key] = means[:, column]
+            while len(_means_cache) >= CACHE_SIZE:
+                del _means_cache[next(iter(_means_cache))]
+            _means_cache[key] = found[key]
+    return [found[key] if len(values) > 0 else np.empty(0) for key, values in zip(keys, groups)]
+
+def bootstrap_ci(groups: list, level: float = 95, n_boot: int = 1000, seed: int = 0):
+    """Percentile bootstrap confidence interval (level in percent, like seaborn's ("ci", 95)) of the mean of every
+    group of values. Returns the low and high ends as arrays, NaN for empty groups."""
+    import numpy as np
+
+    means = bootstrap_means(groups, n_boot, seed)
+    low, high = np.full(len(means), np.nan), np.full(len(means), np.nan)
+    drawn = [index for index, group_means in enumerate(means) if len(group_means) > 0]
+    if drawn:
+        low[drawn], high[drawn] = np.percentile(np.stack([means[index] for index in drawn]),
+                                                [(100 - level) / 2, (100 + level) / 2], axis=1)
+    return low, high
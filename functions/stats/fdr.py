@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+"""
+False discovery rate corrections of many p-values at once: Benjamini-Hochberg ("BH"), Benjamini-Yekutieli ("BY",
+valid for any dependence between the tests) and Storey's q-values ("storey", BH scaled by the estimated fraction
+pi0 of true null hypotheses).
+
+The p-values are sorted once (and then stably by group code), so every group (e.g. the features of each tissue) is a
+contiguous run with its ranks known. Every correction is then a scaling of the sorted p-values and a running
+minimum from the largest p-value down within every group, so thousands of groups cost the same as one. Missing
+p-values stay missing and are not counted in the number of tests.
+"""
+
+from __future__ import annotations
+
+import sys
+
+FDR_METHODS = ["BH", "BY", "storey"]
+STOREY_LAMBDA = 0.5                     #p-values above this are counted to estimate pi0 (Storey & Tibshirani's default)
+
+def group_ranks(pvalues, groups=None) -> tuple:
+    """Sorts the p-values by value with one sort, then groups them with a stable sort of the group codes. Returns
+    (order, codes, ranks, sizes): order holds the positions of the non-missing p-values (and group labels) in sorted
+    order, codes their group codes in that order, ranks their rank within their group (from 1), and sizes the number
+    of p-values of every group."""
+    import numpy as np
+    import pandas as pd
+
+    pvalues = np.asarray(pvalues, dtype=float)
+    if groups is None:
+        order = np.flatnonzero(~np.isnan(pvalues))
+        order = order[np.argsort(pvalues[order])]       #ties may come in any order, their adjusted values are equal
+        return order, np.zeros(len(order), dtype=np.int64), np.arange(1, len(order) + 1), np.array([len(order)])
+
+    codes = pd.factorize(np.asarray(groups), use_na_sentinel=True)[0].astype(np.int64)       #missing labels are -1
+    order = np.flatnonzero(~np.isnan(pvalues) & (codes >= 0))
+    order = order[np.argsort(pvalues[order])]
+    codes = codes[order]
+    if len(order) > 0:                                  #a stable sort by group keeps the p-value order within groups
+        by_group = np.argsort(codes.astype(np.min_scalar_type(codes.max())), kind="stable")     #radix sort for < 65536 groups
+        order, codes = order[by_group], codes[by_group]
+    sizes = np.bincount(codes, minlength=codes.max() + 1 if len(codes) > 0 else 0)
+    starts = np.cumsum(sizes) - sizes
+    ranks = np.arange(1, len(order) + 1) - starts[codes]
+    return order, codes, ranks, sizes
+
+def group_accumulate(values, codes, how: str = "min", reverse: bool = False):
+    """Running minimum ("min") or maximum ("max") of values within every run of equal codes (the codes are
+    grouped, as group_ranks returns them), from the last value backwards if reverse."""
+    import numpy as np
+    import pandas as pd
+
+    values = np.asarray(values, dtype=float)
+    step = slice(None, None, -1) if reverse else slice(None)
+    if len(codes) == 0 or codes[0] == codes[-1]:        #a single group
+        ufunc = np.minimum if how == "min" else np.maximum
+        return ufunc.accumulate(values[step])[step]
+    grouped = pd.Series(values[step]).groupby(codes[step], sort=False)
+    return (grouped.cummin() if how == "min" else grouped.cummax()).to_numpy()[step]
+
+def _pi0(sorted_pvalues, codes, sizes, storey_lambda: float):
+    import numpy as np
+
+    above = np.bincount(codes, weights=sorted_pvalues > storey_lambda, minlength=len(sizes))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.minimum(np.maximum(above, 1) / (sizes * (1 - storey_lambda)), 1.0)
+
+def storey_pi0(pvalues, groups=None, storey_lambda: float = STOREY_LAMBDA):
+    """Storey's estimate of the fraction of true null hypotheses in every group: the share of p-values above
+    storey_lambda divided by 1 - storey_lambda, at most 1 (and counting at least one p-value above storey_lambda, so
+    the q-values are never 0). Returns one value per group, in the order of the group codes of group_ranks."""
+    import numpy as np
+
+    pvalues = np.asarray(pvalues, dtype=float)
+    order, codes, _, sizes = group_ranks(pvalues, groups)
+    return _pi0(pvalues[order], codes, sizes, storey_lambda)
+
+def fdr_adjust(pvalues, method: str = "BH", groups=None, storey_lambda: float = STOREY_LAMBDA):
+    """Adjusts p-values for the false discovery rate, separately within every group if groups (one label per p-value,
+    e.g. a tissue column) is given. method is "BH", "BY" or "storey" (q-values). Returns an array of the adjusted
+    p-values in the order of pvalues, NaN where the p-value or its group label is missing."""
+    import numpy as np
+
+    if method not in FDR_METHODS:
+        print(f"Unknown FDR correction {method!r}, use one of {', '.join(FDR_METHODS)}.")
+        sys.exit(1)
+    pvalues = np.asarray(pvalues, dtype=float)
+    order, codes, ranks, sizes = group_ranks(pvalues, groups)
+    tests = sizes[codes]
+    scaled = pvalues[order] * tests / ranks
+    if method == "BY":                                  #times the harmonic number of the number of tests
+        harmonic = np.cumsum(1 / np.arange(1, sizes.max() + 1)) if len(sizes) > 0 else np.empty(0)
+        scaled *= harmonic[tests - 1]
+    elif method == "storey":
+        scaled *= _pi0(pvalues[order], codes, sizes, storey_lambda)[codes]
+    adjusted = np.full(len(pvalues), np.nan)
+    adjusted[order] = np.minimum(group_accumulate(scaled, codes, "min", reverse=True), 1.0)
+    return adjusted
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+"""
+Pairwise comparisons between the groups of a bar plot (e.g. every pair of treatments within each tissue).
+
+The values are sorted once by (group, value), every test then reads its two groups as slices of that sorted
+array. Results are cached per dataset content and grouping, so drawing the same comparisons again is free.
+"""
+
+from __future__ import annotations
+
+import sys
+import hashlib
+import itertools
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from functions.trace import traced
+from functions.stats.tests import mann_whitney
+from functions.stats.fdr import FDR_METHODS, fdr_adjust, group_ranks, group_accumulate
+from functions.stats.resampling import RESAMPLING_TESTS, resample_pairs
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TESTS = {"Mann-Whitney": mann_whitney, **RESAMPLING_TESTS}
+CORRECTIONS = ["bonferroni", "holm", *FDR_METHODS]
+# p-value thresholds of the "star" text format (as in statannotations)
+STAR_THRESHOLDS = [(1e-4, "****"), (1e-3, "***"), (1e-2, "**"), (5e-2, "*")]
+CACHE_SIZE = 32
+
+_results_cache = {}
+
+@dataclass
+class StatsConfig:
+    """Stores which groups of a bar plot are compared, the test, and how the significance brackets are drawn."""
+    test: str = "Mann-Whitney"                  #statistical test between two groups: "Mann-Whitney", or "permutation"/"bootstrap"
+                                                #(difference of means, better for small groups such as 5 mice)
+    n_resamples: int = 10000                    #resamples of the permutation/bootstrap tests (permutation tests are exact if
+                                                #there are fewer possible permutations)
+    seed: int = 0                               #seed of the resampling tests, the same seed always gives the same p-values
+    jobs: int|None = 1                          #processes running resampling tests in parallel, None uses one per core
+    correction: str|None = None                 #multiple comparison correction: "bonferroni", "holm", "BH" (Benjamini-Hochberg),
+                                                #"BY" (Benjamini-Yekutieli), "storey" (q-values) or None
+    correct_within_x: bool = False              #corrects the pairs within every x value (e.g. tissue) separately, not all together
+    pairs: list|None = None                     #groups to compare, e.g. [(("Liver", "WT"), ("Liver", "KO"))] with a hue or [("Liver", "Spleen")]
+                                                #without one. None compares every pair of hue values within each x value
+    text_format: str = "star"                   #"star" (*, **, *** or ****) or "simple" (the p-value)
+    hide_non_significant: bool = True           #only draws brackets for p-values under alpha
+    alpha: float = 0.05
+    loc: str = "inside"                         #"inside" draws the brackets over the bars, "outside" above the plot
+    line_height: float = 0.02                   #height of the bracket ends, as a fraction of the y axis (0 draws flat lines)
+
+def dataset_hash(df: pd.DataFrame, columns: list[str]) -> str:
+    """Hashes the content of the columns (not the row index), to recognise the same data in a later call."""
+    import pandas as pd
+
+    return hashlib.sha1(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes()).hexdigest()
+
+def default_pairs(x_levels: list, hue_levels: list|None = None) -> list:
+    """Every pair of hue levels within each x value, or every pair of x values if there is no hue."""
+    if hue_levels is None:
+        return list(itertools.combinations(x_levels, 2))
+    return [((x_value, first), (x_value, second)) for x_value in x_levels
+            for first, second in itertools.combinations(hue_levels, 2)]
+
+def adjust_pvalues(pvalues, method: str|None, groups=None):
+    """Corrects p-values for multiple comparisons, separately within every group if groups (one label per p-value)
+    is given. The FDR corrections ("BH", "BY", "storey") are computed by functions.stats.fdr. Missing p-values stay
+    missing and don't count as tests."""
+    import numpy as np
+
+    pvalues = np.asarray(pvalues, dtype=float)
+    if method is None or len(pvalues) == 0:
+        return pvalues
+    if method in FDR_METHODS:
+        return fdr_adjust(pvalues, method, groups)
+    if method not in CORRECTIONS:
+        print(f"Unknown correction {method!r}, use one of {', '.join(CORRECTIONS)} or None.")
+        sys.exit(1)
+    order, codes, ranks, sizes = group_ranks(pvalues, groups)
+    tests = sizes[codes]
+    adjusted = np.full(len(pvalues), np.nan)
+    if method == "bonferroni":
+        adjusted[order] = np.minimum(pvalues[order] * tests, 1.0)
+    else:                                               #holm
+        adjusted[order] = np.minimum(group_accumulate(pvalues[order] * (tests - ranks + 1), codes, "max"), 1.0)
+    return adjusted
+
+def pvalue_label(pvalue: float, text_format: str = "star") -> str:
+    """The text drawn over a bracket."""
+    if text_format == "simple":
+        return f"p = {pvalue:.2g}"
+    for threshold, stars in STAR_THRESHOLDS:
+        if pvalue <= threshold:
+            return stars
+    return "ns"
+
+@traced()
+def pairwise_tests(df: pd.DataFrame, x: str, y: str, hue: str|None = None, stats: StatsConfig|None = None,
+                   order: list|None = None, hue_order: list|None = None) -> pd.DataFrame:
+    """Tests every pair of groups (stats.pairs, or default_pairs of the x and hue levels). Returns one row per pair
+    with the groups, their sizes, the statistic, the raw and corrected p-value and the label to draw. Pairs where a
+    group has no values are left out."""
+    import numpy as np
+    import pandas as pd
+    from functions.qpcr import group_codes
+
+    stats = stats or StatsConfig()
+    if stats.test not in TESTS:
+        print(f"Unknown test {stats.test!r}, use one of {', '.join(TESTS)}.")
+        sys.exit(1)
+    columns = [x] if hue is None or hue == x else [x, hue]
+    data = df.loc[df[y].notna(), [*columns, y]]
+    groups_key = (dataset_hash(data, [*columns, y]), tuple(columns), y, stats.test, stats.n_resamples, stats.seed,
+                  stats.correction, stats.correct_within_x, stats.alpha, stats.text_format, repr(stats.pairs), repr(order), repr(hue_order))
+    if groups_key in _results_cache:
+        return _results_cache[groups_key].copy()
+
+    codes, groups = group_codes(data, columns)
+    labels = [tuple(row) if len(columns) > 1 else row[0] for row in groups.itertuples(index=False)]
+    code_of = {label: code for code, label in enumerate(labels)}
+    values = data[y].to_numpy(dtype=float)
+    sort_rows = np.lexsort((values, codes))             #one sort: grouped, and sorted within every group
+    sorted_values = values[sort_rows]
+    ends = np.cumsum(np.bincount(codes, minlength=len(labels)))
+    starts = ends - np.bincount(codes, minlength=len(labels))
+
+    pairs = stats.pairs
+    if pairs is None:
+        x_levels = order if order is not None else list(dict.fromkeys(groups[x]))
+        hue_levels = None
+        if len(columns) > 1:
+            hue_levels = hue_order if hue_order is not None else list(dict.fromkeys(groups[hue]))
+        pairs = default_pairs(x_levels, hue_levels)
+
+    pairs = [(first, second) for first, second in pairs if first in code_of and second in code_of]
+    samples = [(sorted_values[starts[code_of[first]]:ends[code_of[first]]],
+                sorted_values[starts[code_of[second]]:ends[code_of[second]]]) for first, second in pairs]
+    if stats.test in RESAMPLING_TESTS:
+        outcomes = resample_pairs(stats.test, samples, stats.n_resamples, stats.seed, stats.jobs)
+    else:
+        outcomes = [TESTS[stats.test](a, b) for a, b in samples]
+    rows = [{"group1": first, "group2": second, "n1": len(a), "n2": len(b), "statistic": statistic, "pvalue": pvalue}
+            for (first, second), (a, b), (statistic, pvalue) in zip(pairs, samples, outcomes)]
+    results = pd.DataFrame(rows, columns=["group1", "group2", "n1", "n2", "statistic", "pvalue"])
+    within = None
+    if stats.correct_within_x and len(columns) > 1:     #pairs of hue levels, grouped by the x value of their first group
+        within = [first[0] for first in results["group1"]]
+    results["pvalue_adjusted"] = adjust_pvalues(results["pvalue"], stats.correction, within)
+    results["significant"] = results["pvalue_adjusted"] <= stats.alpha
+    results["label"] = [pvalue_label(pvalue, stats.text_format) for pvalue in results["pvalue_adjusted"]]
+
+    if len(_results_cache) >= CACHE_SIZE:
+        del _results_cache[next(iter(_results_cache))]
+    _results_cache[groups_key] = results
+    return results.copy()
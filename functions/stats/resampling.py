@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""
+Permutation and bootstrap tests of the difference between two group means, for small groups where the
+Mann-Whitney normal approximation is unreliable.
+
+Resamples are drawn in NumPy batches (a matrix of resampled index sets at a time) and the statistic of a whole
+batch is computed at once. When the number of possible permutations is at most n_resamples every permutation is
+enumerated instead, which gives the exact p-value. Every pair of groups gets its own seed derived from the base
+seed and the pair's position, so results are the same whether pairs run in one process or in a process pool.
+"""
+
+import math
+import itertools
+
+BATCH_VALUES = 1 << 22                  #number of resampled values per batch (bounds the memory of a batch)
+
+def mean_difference(a, b) -> float:
+    return float(a.mean() - b.mean())
+
+def permutation_test(a, b, n_resamples: int = 10000, rng=None) -> tuple[float, float]:
+    """Two-sided permutation test of the difference in means. Returns the observed difference and the p-value,
+    exact if all permutations fit in n_resamples, otherwise (hits + 1) / (n_resamples + 1)."""
+    import numpy as np
+
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    pooled = np.concatenate([a, b])
+    n1, n = len(a), len(a) + len(b)
+    total = pooled.sum()
+    observed = mean_difference(a, b)
+    tolerance = 1e-12 * max(1.0, abs(observed))
+
+    if math.comb(n, n1) <= n_resamples:                 #exact: every way of picking the first group
+        first = np.array(list(itertools.combinations(range(n), n1)), dtype=np.int64).reshape(-1, n1)
+        first_sums = pooled[first].sum(axis=1)
+        differences = first_sums / n1 - (total - first_sums) / (n - n1)
+        return observed, float(np.mean(np.abs(differences) >= abs(observed) - tolerance))
+
+    rng = rng if rng is not None else np.random.default_rng()
+    hits = 0
+    batch = max(1, min(n_resamples, BATCH_VALUES // n))
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        first = np.argpartition(rng.random((size, n)), n1 - 1, axis=1)[:, :n1]   #a random n1 subset per row
+        first_sums = pooled[first].sum(axis=1)
+        differences = first_sums / n1 - (total - first_sums) / (n - n1)
+        hits += int(np.count_nonzero(np.abs(differences) >= abs(observed) - tolerance))
+    return observed, (hits + 1) / (n_resamples + 1)
+
+def bootstrap_test(a, b, n_resamples: int = 10000, rng=None) -> tuple[float, float]:
+    """Two-sided bootstrap test of the difference in means: both groups are shifted to the pooled mean (so the null
+    hypothesis holds) and resampled with replacement. Returns the observed difference and (hits + 1) / (n_resamples + 1)."""
+    import numpy as np
+
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    observed = mean_difference(a, b)
+    pooled_mean = np.concatenate([a, b]).mean()
+    a_null, b_null = a - a.mean() + pooled_mean, b - b.mean() + pooled_mean
+    tolerance = 1e-12 * max(1.0, abs(observed))
+
+    rng = rng if rng is not None else np.random.default_rng()
+    hits = 0
+    batch = max(1, min(n_resamples, BATCH_VALUES // (len(a) + len(b))))
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        a_means = a_null[rng.integers(0, len(a), (size, len(a)))].mean(axis=1)
+        b_means = b_null[rng.integers(0, len(b), (size, len(b)))].mean(axis=1)
+        hits += int(np.count_nonzero(np.abs(a_means - b_means) >= abs(observed) - tolerance))
+    return observed, (hits + 1) / (n_resamples + 1)
+
+RESAMPLING_TESTS = {"permutation": permutation_test, "bootstrap": bootstrap_test}
+
+def _run_pair(test_name: str, a, b, n_resamples: int, seed: int, index: int) -> tuple[float, float]:
+    import numpy as np
+
+    rng = np.random.default_rng([seed, index])
+    return RESAMPLING_TESTS[test_name](a, b, n_resamples, rng)
+
+def resample_pairs(test_name: str, samples: list[tuple], n_resamples: int = 10000, seed: int = 0,
+                   jobs: int|None = 1) -> list[tuple[float, float]]:
+    """Runs a resampling test on every (a, b) pair of samples, in a process pool if jobs is more than 1 (None uses
+    one process per core). Returns (statistic, p-value) per pair, in order."""
+    arguments = [(test_name, a, b, n_resamples, seed, index) for index, (a, b) in enumerate(samples)]
+    if jobs == 1 or len(samples) < 2:
+        return [_run_pair(*argument) for argument in arguments]
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_run_pair, *zip(*arguments)))
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+"""
+Out-of-core aggregation of long (x, y, value) tables into the dense matrix a heatmap draws.
+
+The .csv file is read a chunk at a time and every chunk is added to 2-D arrays with one cell per (x, y) pair
+(np.bincount on the flat cell index), so neither the long table nor a grouped copy of it is ever in memory, only
+the finished matrix. The mean keeps a sum and a count per cell and the max a running maximum. The median can't be
+updated a chunk at a time, so it keeps the row and column code and the value of every kept row (16 bytes a row,
+much less than the .csv text or a DataFrame of it) and takes the exact median of every cell, the same as pandas,
+with one sort at the end.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+AGGREGATES = ["mean", "median", "max", "count"]
+START_LABELS = 64                       #rows/columns allocated before the first chunk, doubled when more labels appear
+
+class MatrixAccumulator:
+    """Accumulates one statistic (AGGREGATES) of the values of every (x, y) pair, a chunk of rows at a time. Labels
+    get a row/column of the matrix when they first appear."""
+
+    def __init__(self, stat: str = "mean"):
+        import numpy as np
+
+        if stat not in AGGREGATES:
+            print(f"Unknown aggregate {stat!r}, use one of: {', '.join(AGGREGATES)}.")
+            sys.exit(1)
+        self.stat = stat
+        self.x_labels, self.y_labels = {}, {}           #label: row/column of the matrix
+        self.value_max = -np.inf
+        self.counts = np.zeros((START_LABELS, START_LABELS), dtype=np.int64)
+        if stat == "mean":
+            self.totals = np.zeros(self.counts.shape)
+        elif stat == "max":
+            self.maxima = np.full(self.counts.shape, -np.inf)
+        elif stat == "median":
+            self.kept = []                              #(x codes, y codes, values) of every chunk
+
+    @staticmethod
+    def _codes(labels, known: dict):
+        """Integer codes of a chunk's labels (-1 for missing labels). Only the distinct labels are looked up."""
+        import numpy as np
+        import pandas as pd
+
+        codes, uniques = pd.factorize(labels)
+        lookup = np.array([known.setdefault(label, len(known)) for label in uniques] + [-1], dtype=np.int64)
+        return lookup[codes]                                #code -1 picks the -1 added at the end
+
+    def _grow(self):
+        """Doubles the rows/columns of the arrays until every label seen so far has a cell."""
+        import numpy as np
+
+        rows, columns = self.counts.shape
+        while rows < len(self.x_labels):
+            rows *= 2
+        while columns < len(self.y_labels):
+            columns *= 2
+        if (rows, columns) == self.counts.shape:
+            return
+        pad = ((0, rows - self.counts.shape[0]), (0, columns - self.counts.shape[1]))
+        self.counts = np.pad(self.counts, pad)
+        if self.stat == "mean":
+            self.totals = np.pad(self.totals, pad)
+        elif self.stat == "max":
+            self.maxima = np.pad(self.maxima, pad, constant_values=-np.inf)
+
+    def add(self, x, y, values):
+        """Adds a chunk of rows. Rows with a missing label or value are skipped."""
+        import numpy as np
+
+        x_codes, y_codes = self._codes(x, self.x_labels), self._codes(y, self.y_labels)
+        values = np.asarray(values, dtype=float)
+        valid = (x_codes >= 0) & (y_codes >= 0) & ~np.isnan(values)
+        x_codes, y_codes, values = x_codes[valid], y_codes[valid], values[valid]
+        if len(values) == 0:
+            return
+        self._grow()
+        cells = self.counts.size
+        flat = x_codes * self.counts.shape[1] + y_codes
+        self.counts += np.bincount(flat, minlength=cells).reshape(self.counts.shape)
+        self.value_max = max(self.value_max, values.max())
+        if self.stat == "mean":
+            self.totals += np.bincount(flat, weights=values, minlength=cells).reshape(self.counts.shape)
+        elif self.stat == "max":
+            np.maximum.at(self.maxima.reshape(-1), flat, values)
+        elif self.stat == "median":                     #the codes don't depend on the size of the arrays
+            self.kept.append((x_codes.astype(np.int32), y_codes.astype(np.int32), values))
+
+    def _median(self, rows: int, columns: int):
+        """The median of every cell: the rows are sorted by cell and value, and the middle value (the mean of the two
+        middle values for an even count) of every cell is read at its offset in the sorted values."""
+        import numpy as np
+
+        if len(self.kept) == 0:
+            return np.full((rows, columns), np.nan)
+        x_codes, y_codes, values = (np.concatenate(part) for part in zip(*self.kept))
+        cells = x_codes.astype(np.int64) * columns + y_codes
+        del x_codes, y_codes
+        values = values[np.lexsort((values, cells))]
+        counts = self.counts[:rows, :columns].reshape(-1)
+        starts = np.cumsum(counts) - counts
+        filled = counts > 0
+        medians = np.full(rows * columns, np.nan)
+        lower = values[starts[filled] + (counts[filled] - 1) // 2]
+        upper = values[starts[filled] + counts[filled] // 2]
+        medians[filled] = (lower + upper) / 2
+        return medians.reshape(rows, columns)
+
+    def matrix(self, x_name: str|None = None, y_name: str|None = None) -> pd.DataFrame:
+        """The finished matrix, with the rows and columns sorted by label (like groupby + pivot). Cells without values
+        are NaN. attrs["value_max"] is the largest value added (the default top of the color scale)."""
+        import numpy as np
+        import pandas as pd
+
+        rows, columns = len(self.x_labels), len(self.y_labels)
+        counts = self.counts[:rows, :columns]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self.stat == "mean":
+                values = self.totals[:rows, :columns] / counts
+            elif self.stat == "max":
+                values = self.maxima[:rows, :columns].copy()
+            elif self.stat == "median":
+                values = self._median(rows, columns)
+            else:
+                values = counts.astype(float)
+        values[counts == 0] = np.nan
+
+        x_labels, y_labels = pd.Index(list(self.x_labels), name=x_name), pd.Index(list(self.y_labels), name=y_name)
+        try:
+            x_order, y_order = x_labels.argsort(), y_labels.argsort()
+        except TypeError:                               #labels of mixed types keep the order they appeared in
+            x_order, y_order = np.arange(rows), np.arange(columns)
+        matrix = pd.DataFrame(values[np.ix_(x_order, y_order)], index=x_labels[x_order], columns=y_labels[y_order])
+        if self.stat != "count" and np.isfinite(self.value_max):
+            matrix.attrs["value_max"] = float(self.value_max)
+        return matrix
+
+def stream_matrix(filename: str, x: str, y: str, value: str, stat: str = "mean", chunksize: int = 1_000_000,
+                  equals: dict|None = None, exclude: dict|None = None) -> pd.DataFrame:
+    """Aggregates value for every (x, y) pair of a long .csv file into a matrix (rows x, columns y), reading only the
+    x, y, value and filter columns, chunksize rows at a time. equals/exclude filter the rows like read_filtered."""
+    import pandas as pd
+    from functions.parameters.all_file_funcs import QPCR_NA_VALUES, RowFilter
+
+    row_filter = RowFilter()
+    for column, wanted in (equals or {}).items():
+        row_filter.equals(column, wanted)
+    for column, values in (exclude or {}).items():
+        row_filter.exclude(column, values)
+    usecols = list(dict.fromkeys([x, y, value, *(equals or {}), *(exclude or {})]))
+
+    accumulator = MatrixAccumulator(stat)
+    for chunk in pd.read_csv(filename, usecols=usecols, chunksize=chunksize, na_values=QPCR_NA_VALUES):
+        if row_filter.steps:
+            chunk = chunk.iloc[row_filter.apply(chunk)[0]]
+        accumulator.add(chunk[x], chunk[y], chunk[value])
+    return accumulator.matrix(x, y)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+"""
+Post-processing of the svg files written by matplotlib, so the same plot always gives the same, smaller file.
+
+matplotlib names clip paths and markers with a random salt and stamps the file with the date it was written, which
+changes every svg on every render (and breaks the render cache and diffs). The figures are saved with a fixed salt
+and without a date, and clean_svg then drops the metadata block and the comments, removes the indentation and line
+breaks matplotlib puts between elements and inside paths, and merges identical path definitions into one, pointing
+every <use> reference at it. matplotlib already draws every dot as a <use> of one marker definition, but repeats
+the dot's style on each of them; when all the dots of a group share a style it is moved to the group instead.
+"""
+
+import re
+import gzip
+
+HASH_SALT = "GraphScripts"              #svg.hashsalt, makes the ids of clip paths and markers reproducible
+SVG_METADATA = {"Date": None}           #savefig metadata of svg files (no date)
+
+_METADATA = re.compile(rb"<metadata>.*?</metadata>\s*", re.DOTALL)
+_COMMENT = re.compile(rb"<!--.*?-->", re.DOTALL)
+_TEXT = re.compile(rb"(<text\b.*?</text>)", re.DOTALL)
+_BETWEEN_TAGS = re.compile(rb">\s+<")
+_PATH_DATA = re.compile(rb' d="([^"]*)"')
+_DEFINED_PATH = re.compile(rb'<path id="([^"]+)" (d="[^"]*"[^>]*)/>')
+_EMPTY_DEFS = re.compile(rb"<defs></defs>")
+_REFERENCE = re.compile(rb'xlink:href="#([^"]+)"')
+_USE_GROUP = re.compile(rb'<g((?: clip-path="[^"]*")?)>((?:<use [^>]*/>)+)</g>')
+_USE_STYLE = re.compile(rb' style="([^"]*)"')
+
+def _shared_style(match) -> bytes:
+    """Moves the style of a group of <use> elements to the group, if they all have the same one."""
+    attributes, uses = match.groups()
+    styles = set(_USE_STYLE.findall(uses))
+    if len(styles) != 1 or uses.count(b"<use ") != len(_USE_STYLE.findall(uses)):
+        return match.group(0)
+    return b"<g" + attributes + b' style="' + styles.pop() + b'">' + _USE_STYLE.sub(b"", uses) + b"</g>"
+
+def clean_svg(data: bytes) -> bytes:
+    """Minifies an svg written by matplotlib and merges its duplicate path definitions. Text elements (svg.fonttype
+    "none") are left as they are."""
+    data = _METADATA.sub(b"", data)
+    data = _COMMENT.sub(b"", data)
+    data = b"".join(part if part.startswith(b"<text") else _BETWEEN_TAGS.sub(b"><", part)
+                    for part in _TEXT.split(data))
+    data = _PATH_DATA.sub(lambda match: b' d="' + b" ".join(match.group(1).split()) + b'"', data)
+
+    first_id = {}                                       #path definition: id of its first copy
+    renamed = {}
+    def merge(match):
+        path_id, definition = match.groups()
+        if definition in first_id:
+            renamed[path_id] = first_id[definition]
+            return b""
+        first_id[definition] = path_id
+        return match.group(0)
+    data = _DEFINED_PATH.sub(merge, data)
+    if renamed:
+        data = _REFERENCE.sub(lambda match: b'xlink:href="#' + renamed.get(match.group(1), match.group(1)) + b'"', data)
+        data = _EMPTY_DEFS.sub(b"", data)
+    return _USE_GROUP.sub(_shared_style, data)
+
+def write_svg(path: str, data: bytes, compress: bool = False) -> int:
+    """Cleans an svg and writes it, gzipped (.svgz) if compress is set. The gzip header has no timestamp, so the
+    file is reproducible too. Returns the number of bytes written."""
+    data = clean_svg(data)
+    if compress:
+        data = gzip.compress(data, mtime=0)
+    with open(path, "wb") as file:
+        file.write(data)
+    return len(data)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""
+Point layouts for the dots drawn over bars and violins: beeswarm offsets (no two dots overlap), random jitter,
+density-aware subsampling of very large groups, and grid decimation of scatter plots.
+
+Everything works on plain NumPy arrays in display units (pixels), so it can be used with any plotting library.
+The beeswarm places points in order of their y value and only compares each point with the already placed points
+less than one dot diameter below it (a sorted sweep), instead of with every other point of the group.
+"""
+
+def beeswarm_offsets(y, diameter: float, max_offset: float = float("inf")):
+    """Returns x offsets that keep dots of the given diameter (centered at 0 + offset, y) from overlapping. Every dot
+    is placed as close to the center as possible. Dots that would need more than max_offset are clipped to it."""
+    import numpy as np
+
+    y = np.asarray(y, dtype=float)
+    order = np.argsort(y, kind="stable")
+    sorted_y = y[order]
+    x = np.zeros(len(y))
+    start = 0
+    for i in range(1, len(y)):
+        while sorted_y[i] - sorted_y[start] >= diameter:     #neighbours more than a diameter below can't overlap
+            start += 1
+        if start == i:
+            continue
+        neighbour_x = x[start:i]
+        reach = np.sqrt(diameter ** 2 - (sorted_y[i] - sorted_y[start:i]) ** 2)   #closest allowed x distance
+        candidates = np.concatenate(([0.0], neighbour_x - reach, neighbour_x + reach))
+        candidates = candidates[np.argsort(np.abs(candidates), kind="stable")]
+        x[i] = _first_free(candidates, neighbour_x, reach)
+    offsets = np.empty(len(y))
+    offsets[order] = np.clip(x, -max_offset, max_offset)
+    return offsets
+
+def _first_free(candidates, neighbour_x, reach, block: int = 64) -> float:
+    """The first candidate position that doesn't overlap any neighbour. Candidates are tested a block at a time
+    because the free spot is almost always among the first few."""
+    import numpy as np
+
+    for begin in range(0, len(candidates), block):
+        chunk = candidates[begin:begin + block]
+        overlaps = np.abs(chunk[:, None] - neighbour_x[None, :]) < reach[None, :] - 1e-6
+        free = ~overlaps.any(axis=1)
+        if free.any():
+            return float(chunk[np.argmax(free)])
+    return float(candidates[-1])
+
+def jitter_offsets(n: int, width: float, seed: int = 0):
+    """Uniform random x offsets within +- width / 2, the same for every run with the same seed."""
+    import numpy as np
+
+    return np.random.default_rng(seed).uniform(-width / 2, width / 2, n)
+
+def density_subsample(y, max_points: int, bins: int = 32, seed: int = 0):
+    """Picks at most max_points of the values so that dense ranges are thinned the most and sparse tails are kept.
+    y is split into bins and every bin keeps up to the same number of points (chosen so the total is max_points);
+    the smallest and largest value are always kept. Returns the sorted positions of the kept values."""
+    import numpy as np
+
+    y = np.asarray(y, dtype=float)
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    edges = np.histogram_bin_edges(y, bins=bins)
+    bin_codes = np.clip(np.searchsorted(edges, y, side="right") - 1, 0, bins - 1)
+    counts = np.bincount(bin_codes, minlength=bins)
+
+    sorted_counts = np.sort(counts)
+    filled_below = np.concatenate(([0], np.cumsum(sorted_counts)[:-1]))
+    cap_from_here = (max_points - filled_below) / (bins - np.arange(bins))   #per-bin cap if bins from here are capped
+    capped = np.flatnonzero(cap_from_here < sorted_counts)
+    cap = int(cap_from_here[capped[0]]) if len(capped) > 0 else int(sorted_counts[-1])
+
+    shuffle = np.random.default_rng(seed).random(len(y))
+    order = np.lexsort((shuffle, bin_codes))              #rows grouped by bin, in random order within a bin
+    rank = np.empty(len(y), dtype=np.int64)
+    rank[order] = np.arange(len(y)) - np.repeat(np.cumsum(counts) - counts, counts)
+    keep = rank < cap
+    keep[[np.argmin(y), np.argmax(y)]] = True
+    return np.flatnonzero(keep)
+
+def grid_decimate(x, y, cell: float):
+    """Keeps one point per cell of a square grid (cell wide, in the units of x and y, e.g. display pixels), so a
+    crowded cloud of dots is drawn with at most one dot per spot it covers. Points with a NaN coordinate are left out.
+    Returns the sorted positions of the kept points (the first point of every occupied cell)."""
+    import numpy as np
+
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if len(finite) == 0:
+        return finite
+    columns = np.floor((x[finite] - x[finite].min()) / cell).astype(np.int64)
+    rows = np.floor((y[finite] - y[finite].min()) / cell).astype(np.int64)
+    _, first = np.unique(rows * (columns.max() + 1) + columns, return_index=True)
+    return np.sort(finite[first])
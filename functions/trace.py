@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+"""
+Timing and memory of the stages of the plotting pipeline (reading, filtering, summaries, layout, saving, ...).
+
+Tracing is off unless the GRAPHSCRIPTS_TRACE environment variable names an output file (or `graphscripts.py batch
+--trace <file>` is used). Every `with span("name"):` block then records its wall time, CPU time and the peak memory
+allocated inside it (tracemalloc), and the spans are written when the program ends: as Chrome trace events if the
+file ends in .json (open it in chrome://tracing or https://ui.perfetto.dev), otherwise as one JSON object per line.
+
+    GRAPHSCRIPTS_TRACE=violin_trace.json python3 scripts/MakeViolinPlot.py my_data.csv
+
+When tracing is off a span only checks a flag, so the spans can stay in the code.
+"""
+
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+from contextlib import contextmanager
+
+ENV_VAR = "GRAPHSCRIPTS_TRACE"
+MEMORY_ENV_VAR = "GRAPHSCRIPTS_TRACE_MEMORY"   #set to 0 to skip tracemalloc, which slows python code down
+
+_state = {"enabled": False, "memory": False, "output": None}
+_spans = []                             #finished spans of this process
+_local = threading.local()              #open spans of the current thread
+
+def enable(output: str|None = None, memory: bool = True):
+    """Starts recording spans. With an output file the spans of this process are written to it at exit."""
+    import tracemalloc
+
+    _state.update(enabled=True, memory=memory, output=output)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if output is not None:
+        atexit.register(_write_at_exit)
+
+def disable_output():
+    """Keeps recording but doesn't write the file at exit (batch workers hand their spans to the main process)."""
+    _state["output"] = None
+
+def enabled() -> bool:
+    return _state["enabled"]
+
+def memory_enabled() -> bool:
+    return _state["enabled"] and _state["memory"]
+
+def _open_spans() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+@contextmanager
+def span(name: str, **args):
+    """Records the wall time, CPU time and peak traced memory (above the memory in use when the span started) of a
+    block of code. Keyword arguments are stored with the span, e.g. span("save", format="svg")."""
+    if not _state["enabled"]:
+        yield
+        return
+    import tracemalloc
+
+    stack = _open_spans()
+    #tracemalloc's peak is shared by all threads, so only spans of the main thread measure memory
+    memory = _state["memory"] and tracemalloc.is_tracing() and threading.current_thread() is threading.main_thread()
+    frame = {"child_peak": 0}
+    if memory:
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]["child_peak"] = max(stack[-1]["child_peak"], peak)    #reset_peak would lose the parent's peak
+        tracemalloc.reset_peak()
+        frame["start_memory"] = current
+    stack.append(frame)
+    start, start_wall, start_cpu = time.time(), time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+        stack.pop()
+        record = {"name": name, "start": start, "wall": wall, "cpu": cpu, "depth": len(stack),
+                  "pid": os.getpid(), "tid": threading.get_ident(), "args": args}
+        if memory:
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame["child_peak"])
+            record["peak_memory"] = max(0, peak - frame["start_memory"])
+            if stack:
+                stack[-1]["child_peak"] = max(stack[-1]["child_peak"], peak)
+        _spans.append(record)
+
+def traced(name: str|None = None):
+    """Decorator recording every call of a function as a span (named after the function by default)."""
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def add_spans(spans: list[dict]):
+    """Adds spans recorded in another process (a batch worker) to this one's."""
+    _spans.extend(spans)
+
+def recorded_spans() -> list[dict]:
+    """Returns the spans recorded so far in this process."""
+    return list(_spans)
+
+def take_spans() -> list[dict]:
+    """Returns the spans recorded so far in this process and forgets them."""
+    spans = list(_spans)
+    _spans.clear()
+    return spans
+
+def write_trace(path: str, spans: list[dict]):
+    """Writes spans as Chrome trace events (.json files) or as JSON lines (any other extension)."""
+    with open(path, "w") as file:
+        if path.endswith(".json"):
+            origin = min((record["start"] for record in spans), default=0)
+            events = [{"name": record["name"], "ph": "X", "ts": (record["start"] - origin) * 1e6, "dur": record["wall"] * 1e6,
+                       "pid": record["pid"], "tid": record["tid"],
+                       "args": {**record["args"], "cpu_ms": record["cpu"] * 1000,
+                                **({"peak_memory_mb": record["peak_memory"] / 2**20} if "peak_memory" in record else {})}}
+                      for record in spans]
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        else:
+            for record in spans:
+                file.write(json.dumps(record, default=str) + "\n")
+
+def _write_at_exit():
+    if _state["output"] is not None and _spans:
+        write_trace(_state["output"], take_spans())
+
+def slowest_stages(spans: list[dict], top: int = 10) -> list[dict]:
+    """Totals the spans by name, slowest total wall time first: number of calls, total and longest wall time,
+    total CPU time and the largest peak memory."""
+    stages = {}
+    for record in spans:
+        stage = stages.setdefault(record["name"], {"name": record["name"], "calls": 0, "wall": 0.0, "longest": 0.0,
+                                                   "cpu": 0.0, "peak_memory": 0})
+        stage["calls"] += 1
+        stage["wall"] += record["wall"]
+        stage["longest"] = max(stage["longest"], record["wall"])
+        stage["cpu"] += record["cpu"]
+        stage["peak_memory"] = max(stage["peak_memory"], record.get("peak_memory", 0))
+    return sorted(stages.values(), key=lambda stage: stage["wall"], reverse=True)[:top]
+
+def print_slowest(spans: list[dict], top: int = 10):
+    """Prints the slowest_stages table. Nested spans are included in their parent's time too."""
+    print(f"{'stage':<24} {'calls':>6} {'total [s]':>10} {'longest [s]':>12} {'cpu [s]':>9} {'peak [MB]':>10}")
+    for stage in slowest_stages(spans, top):
+        print(f"{stage['name']:<24} {stage['calls']:>6} {stage['wall']:>10.3f} {stage['longest']:>12.3f} "
+              f"{stage['cpu']:>9.3f} {stage['peak_memory'] / 2**20:>10.1f}")
+
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR], memory=os.environ.get(MEMORY_ENV_VAR, "1") != "0")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+"""
+Volcano plot statistics of a feature table (one row per gene/TE family/...): the log2 fold change, -log10 p-value,
+adjusted p-value and up/down/ns class of every feature, computed on whole columns at once.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
+from functions.trace import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+VOLCANO_CLASSES = ["down", "ns", "up"]
+RATIOS = ["log2", "difference"]
+
+def fold_changes(df: pd.DataFrame, config):
+    """The log2 fold change of every feature: config.fold_change if set, otherwise log2(numerator / denominator)
+    (config.ratio "log2", with config.pseudocount added to both) or numerator - denominator (config.ratio
+    "difference", for columns already on a log2 scale). Features with a zero on one side are +/-inf."""
+    import numpy as np
+
+    if config.fold_change is not None:
+        return df[config.fold_change].to_numpy(dtype=float)
+    numerator = df[config.numerator].to_numpy(dtype=float)
+    denominator = df[config.denominator].to_numpy(dtype=float)
+    if config.ratio == "difference":
+        return numerator - denominator
+    if config.ratio != "log2":
+        print(f"Unknown ratio {config.ratio!r}, use one of: {', '.join(RATIOS)}.")
+        sys.exit(1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log2((numerator + config.pseudocount) / (denominator + config.pseudocount))
+
+@traced()
+def volcano_table(df: pd.DataFrame, config) -> pd.DataFrame:
+    """Classifies every feature (row) of df with a VolcanoConfig. Returns a table with the same index and the columns
+    log2_fold_change, neg_log10_p (p-values of 0 are drawn at the smallest p-value above 0), p_adjusted (within every
+    value of config.groups, if set) and class: "up"/"down" if the adjusted p-value is at most config.alpha and the
+    fold change at least config.min_fold_change (log2 units) up or down, "ns" otherwise. Features without a p-value
+    or fold change are "ns"."""
+    import numpy as np
+    import pandas as pd
+    from functions.stats import adjust_pvalues
+
+    log2_fold = fold_changes(df, config)
+    column = df[config.pvalue].to_numpy(dtype=float)
+    pvalues = 10.0 ** -column if config.log_pvalues else column
+    positive = pvalues[pvalues > 0]
+    floor = positive.min() if len(positive) > 0 else np.finfo(float).tiny
+    with np.errstate(divide="ignore"):
+        neg_log_p = column if config.log_pvalues else -np.log10(np.maximum(pvalues, floor))
+
+    groups = df[config.groups].to_numpy() if config.groups is not None else None
+    adjusted = adjust_pvalues(pvalues, config.correction, groups)    #NaN p-values stay NaN and don't count
+    significant = adjusted <= config.alpha                  #NaN compares as False
+    classes = np.full(len(pvalues), 1)
+    classes[significant & (log2_fold >= config.min_fold_change)] = 2
+    classes[significant & (log2_fold <= -config.min_fold_change)] = 0
+    return pd.DataFrame({"log2_fold_change": log2_fold, "neg_log10_p": neg_log_p, "p_adjusted": adjusted,
+                         "class": pd.Categorical.from_codes(classes, VOLCANO_CLASSES)}, index=df.index)
+
+def top_features(table: pd.DataFrame, n: int):
+    """The positions of the n most significant up/down features: smallest adjusted p-value first, then the
+    largest fold change."""
+    import numpy as np
+
+    hits = np.flatnonzero((table["class"] != "ns").to_numpy())
+    order = np.lexsort((-np.abs(table["log2_fold_change"].to_numpy()[hits]), table["p_adjusted"].to_numpy()[hits]))
+    return hits[order[:n]]
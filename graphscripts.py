@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""
+Command line entry point for GraphScripts. Run from the GraphScripts folder, e.g.
+
+    python3 graphscripts.py batch my_plate_run violin heatmap
+
+renders a violin plot and a heatmap for every .csv file in datasets/my_plate_run/ into generated_images/.
+Only argparse is imported up front, the plotting libraries are imported by the workers when they draw.
+"""
+
+import argparse
+import sys
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser for all graphscripts subcommands."""
+    parser = argparse.ArgumentParser(prog="graphscripts", description="GraphScripts plotting tools")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report the import time of every module used by the command line tool and the plot functions")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch = subparsers.add_parser("batch", help="render plot types for every dataset in a folder of datasets/")
+    batch.add_argument("folder", help="folder inside datasets/ (use . for datasets/ itself)")
+    batch.add_argument("plots", nargs="+", help="plot types to render (bar, barset, clustermap, facetgrid, facetviolin, heatmap, line, plates, qpcr_bar, violin, volcano)")
+    batch.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: one per core)")
+    batch.add_argument("--pattern", default="*.csv", help="filename pattern of the datasets to render (default: *.csv)")
+    batch.add_argument("--no-cache", action="store_true", help="always re-plot, even if the dataset and configuration are unchanged")
+    batch.add_argument("--cache-size", type=float, default=None, help="maximum size of the render cache in MB (default: 500)")
+    batch.add_argument("--trace", default=None, metavar="FILE",
+                       help="time every stage of every job, write the spans to FILE (.json: Chrome trace) and print the slowest stages")
+    return parser
+
+def main(argv: list[str]|None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None and not args.profile_startup:
+        parser.error("a command is required")
+
+    if args.profile_startup:
+        from functions.startup import print_import_profile, CLI_MODULES, RENDER_MODULES
+        print_import_profile("startup", CLI_MODULES)
+        print_import_profile("first render", RENDER_MODULES)
+
+    if args.command == "batch":
+        from functions.batch import run_batch
+        results = run_batch(args.folder, args.plots, jobs=args.jobs, pattern=args.pattern,
+                            use_cache=not args.no_cache, cache_size_mb=args.cache_size, trace_output=args.trace)
+        failed = [result for result in results if not result.ok]
+        print(f"Rendered {len(results) - len(failed)} of {len(results)} plots.")
+        return 1 if len(failed) > 0 else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,19 +3,10 @@
 """Generates a barplot with categorical swarmplot overlayed."""
 
 # NECESSARY IMPORTS
-import seaborn as sns
-import pandas as pd
-import matplotlib.pyplot as plt
 import functions.parameters.all_file_funcs as myfunc
+import functions.plots as myplots
 
-# PROCESS THE FILE
-#FileCSV = myfunc.get_file_from_cmd()
-FileCSV = "Data.csv"
-mySVGOut = myfunc.my_output_file(FileCSV, plot_type="Bar",extension="svg")  #Generates a regular expression to automate the output filename
-
-# READ IN THE DATA
-DataSet = pd.read_csv(FileCSV,index_col = 0)       #Creates a 2D editable table
-
+# PLOT CONFIGURATION
 #FIRST VARIABLE
 #TissueOrder = ["Colon"]	                       #Must edit for new dataset
 TissueOrder = ["mLN","PeyersPatch","Proximal Colon","Epithelial cells"]	       #A list of labels 
@@ -26,7 +17,6 @@ TissueOrder = ["mLN","PeyersPatch","Proximal Colon","Epithelial cells"]	       #
 #TreatmentOrder = ["WT", "CD64-creSTING-flox"]
 #TreatmentOrder = ["Control","Amp","AmpHydroxybutyrate","AmpTributyrin"]
 
-
 # GENERATE COLOR WHEELS
 Colors = myfunc.make_wheel()
 custom_colors = myfunc.make_wheel()
@@ -34,60 +24,31 @@ custom_colors = myfunc.make_wheel()
 Colors.add(["mLN","PeyersPatch","Proximal Colon","Epithelial cells"])
 custom_colors.add(["mLN","PeyersPatch","Proximal Colon","Epithelial cells"],["#AE3899","#CF92DD","#009933","#EDAB21"])
 
-WhiteWheel = myfunc.get_white_wheel(DataSet, "Tissue") #specify dataset loaded in and the variable to match colors to
-
-Colors.print_colors()
-custom_colors.print_colors()
-
-# GENERATE THE BARPLOT
-
-g = sns.catplot(data=DataSet,
-    kind="bar",                 #specifies the kind of categorical plot
-    #row = "Tissue",             #determines the faceting of the grid
+PLOT_TYPE = "Bar"
+CONFIG = myplots.PlotConfig(
     x="Tissue",                  #x axis data
-    y="Log_Copies",             #y axis data
-    hue="Tissue",	            #defines how the bars will be split
-    order = TissueOrder,	    #defines the order of the tissues on the x axis
-    #hue_order = TreatmentOrder, #defines the order of the treatment on the X axis
-    errorbar="sd",                    #specifies whether using an error bar or a confidence interval
-    err_kws={'linewidth':0.75},	            #line width of the error bar
-    capsize = .1,	            #controls the cap of the stdev whisker
-    palette= Colors.colors,            #controls the colors on the graph, each value of Treatment must have a hex code
- 	saturation = 1,             #controls the saturation of the color (1 is full, 0 is black and white)
-    height=6,		            #controls the height of the graph
-    aspect = 1.2,               #controls the aspect ratio of the output graph, 4 Categories
-#    aspect = 1, #3 Categories
-#    aspect = .7, #2 Categories
-	linewidth = 1,              #defines the line thickness around the bar
-	edgecolor = "black"	        #defines the line color around the bar
+    y="Log_Copies",              #y axis data
+    hue="Tissue",                #defines how the bars will be split
+    order=TissueOrder,           #defines the order of the tissues on the x axis
+    #hue_order=TreatmentOrder,   #defines the order of the treatment on the X axis
+    palette=Colors.colors,       #controls the colors on the graph, each value of Tissue must have a hex code
+    dot_size=12,                 #defines size of dot
+    height=6,                    #controls the height of the graph
+    aspect=1.2,                  #controls the aspect ratio of the output graph, 4 Categories
+    index_col=0,
 )
-#g.despine(left=True)
-#g.set_axis_labels("", "")       #sets labels to be empty, default will pull from the data
-g.set_xlabels("")
-g.set_ylabels("")
-#g.legend.set_title("")          #sets the plot title to be empty, default will pull from the data
-
 
-# DRAW CATEGORICAL SWARMPLOT TO SHOW OBSERVATIONS
-
-ax = sns.swarmplot(data=DataSet, 
-					x="Tissue",                 #x axis data
-					y="Log_Copies",             #y axis data
-					hue="Tissue",            #category separating the data by color
-					dodge = "true",	            #Makes ure the dots are not plotted in the same column
-				    order = TissueOrder,        #specifies the order of data on the plot
-			        #hue_order = TreatmentOrder, #defines the order of the second variable on the X axis
-					palette = WhiteWheel,       #defines color palette to make sure every dot is white
-					edgecolor = "black",        #defines the edge color of the dots
-					size = 12,	                #defines size of dot
-					linewidth = .75,            #defines the line thickness around the white dot
-)
+if __name__ == "__main__":
+    myfunc.set_plot_backend(CONFIG.debug_show_plot)    #uses the faster Agg backend unless the plot is previewed
 
-#ax.set(ylim=(0, 6))           #limits the y axis range        
-#g._legend.remove()             #removes the legend from the plot
+    # PROCESS THE FILE
+    FileCSV = myfunc.get_file_from_cmd()
+    #FileCSV = myfunc.get_data_path("Data.csv")
 
-# SHOW / SAVE THE PLOT
+    # READ IN THE DATA AND GENERATE THE BARPLOT
+    DataSet = myplots.read_plot_data(FileCSV, CONFIG)       #Creates a 2D editable table
+    Summary = myplots.summarize_bars(DataSet, CONFIG)       #n, mean, sd, sem and 95% CI of every bar
+    g = myplots.qpcr_bar(DataSet, CONFIG, Summary)
 
-g.set_xlabels("")
-g.set_ylabels("")               
-plt.savefig(mySVGOut)          #saves the file to the generated_images folder
\ No newline at end of file
+    # SHOW / SAVE THE PLOT (the summary is saved next to the image as a .csv file)
+    myplots.save_figure(g, FileCSV, plot_type=PLOT_TYPE, extension=CONFIG.formats, dpi=CONFIG.dpi, show=CONFIG.debug_show_plot, table=Summary)  #saves the file to the generated_images folder
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+"""
+Creates a hierarchically clustered heatmap (rows and columns reordered by similarity, with dendrograms) from a
+provided .csv formatted dataset, e.g. the TE expression table Duod_GFSPF.csv.
+
+Clustering uses scipy (in references/requirements.txt), or fastcluster when it is installed (pip install fastcluster).
+"""
+
+# NECESSARY MODULE IMPORTS
+import functions.parameters.all_file_funcs as myfunc
+import functions.plots as myplots
+
+# PLOT CONFIGURATION
+PLOT_TYPE = "ClusterMap"
+CONFIG = myplots.HeatmapConfig(
+    well_positions=False,
+    index_col=0,                    #the first column names the rows (e.g. the TE families)
+    matrix_columns=["GF", "SPF"],   #the columns drawn as the heatmap (a long table can use x, y and value instead)
+    top_color="#bb334c",            #the colormap goes from white to this color
+    vmin=0,
+    vmax=None,                      #None rounds up the largest value
+    cluster="rows",                 #"rows", "columns" or "both"
+    linkage_method="average",
+    linkage_metric="euclidean",
+    linkage_backend="auto",         #"fastcluster", "scipy" or "auto"
+    optimal_ordering=False,         #slow for large tables, but only computed once per dataset (cached)
+    title="",                       #YOUR TITLE GOES HERE
+)
+
+if __name__ == "__main__":
+    myfunc.set_plot_backend(CONFIG.debug_show_plot)    #uses the faster Agg backend unless the plot is previewed
+
+    # OPEN FILES AND GENERATE PATH NAMES
+    myCSV = myfunc.get_file_from_cmd()
+    #myCSV = myfunc.get_data_path("Duod_GFSPF.csv") #your file goes here if only running this script
+
+    # READ IN THE DATA SET AND GENERATE THE CLUSTERED HEATMAP
+    DataSet = myplots.read_plot_data(myCSV, CONFIG)
+    g = myplots.clustered_heatmap(DataSet, CONFIG)
+
+    # OUTPUT AND SAVE THE PLOT
+    print("saving to " + myplots.save_figure(g, myCSV, plot_type=PLOT_TYPE, extension=CONFIG.formats, dpi=CONFIG.dpi,
+                                             matrix=myplots.heatmap_matrix(DataSet, CONFIG), show=CONFIG.debug_show_plot))
@@ -3,19 +3,10 @@
 """Generates a Facet Grid with a Violin Plot."""
 
 # NECESSARY IMPORTS
-import seaborn as sns
-import pandas as pd
-import matplotlib.pyplot as plt
 import functions.parameters.all_file_funcs as myfunc
+import functions.plots as myplots
 
-# OPEN FILES AND GENERATE PATH NAMES
-FileCSV = myfunc.get_file_from_cmd()
-FileCSV = myfunc.get_data_path("your_file_goes_here")
-mySVGOut = myfunc.my_output_file(FileCSV, plot_type="FacetViolin", extension="svg")
-
-# READ IN THE DATA
-DataSet = pd.read_csv(FileCSV,index_col = 0)
-
+# PLOT CONFIGURATION
 #TissueOrder = ["Colon"]	#Must edit for new dataset
 TissueOrder = ["mLN","PeyersPatch","Colon"]	#Must edit for new dataset
 
@@ -27,49 +18,35 @@ TreatmentOrder = ["ControlDiet","HiFiDiet"]
 
 # GET COLOR WHEELS
 Colors = myfunc.get_default_wheel()
-WhiteWheel = myfunc.get_white_wheel(DataSet, "Treatment")
 
-g = sns.FacetGrid(DataSet,
-    col="Tissue", 
-    hue="Treatment",	#defines how the bars will be split
-    col_order = TissueOrder,	#defines the order of the tissues on the x axis
-    hue_order = TreatmentOrder, #defines the order of the treatment on the X axis
-    palette= Colors.colors, #This controls the colors on the graph, must be a hash Treatment value to Hex code
-	ylim=(0, 6),
-	col_wrap = 3,
-	height = 2,		#This controls the height of the graph
-    aspect = 1, #4 Categories
-#    aspect = 1, #3 Categories
-#    aspect = .7, #2 Categories
+PLOT_TYPE = "FacetViolin"
+CONFIG = myplots.PlotConfig(
+    col="Tissue",                #one facet per tissue
+    col_order=TissueOrder,       #defines the order of the tissues
+    col_wrap=3,
+    x="Treatment",
+    y="Log_Copies",
+    hue="Treatment",             #defines how the violins will be split
+    order=TreatmentOrder,        #defines the order of the treatment on the X axis
+    hue_order=TreatmentOrder,
+    palette=Colors.colors,       #This controls the colors on the graph, must be a hash Treatment value to Hex code
+    ylim=(0, 6),
+    height=2,                    #This controls the height of the graph
+    aspect=1,                    #4 Categories
+    dot_size=5,                  #defines size of dot
+    index_col=0,
 )
 
-# GENERATE THE VIOLIN PLOT
-g.map(sns.violinplot, 
-	x='Treatment', 
-	y="Log_Copies", 
-	order=TreatmentOrder, 
-	inner = None,
-	cut = 1,
-    scale = "width",
-	linewidth = .75,
-	)
-
-# GENERATE THE SWARM PLOT
-g.map(sns.swarmplot, 
-	'Treatment', 
-	"Log_Copies", 
-	order=TreatmentOrder,
-	palette = WhiteWheel,
-	edgecolor = "black",
-	size = 5,	#defines size of dot
-	linewidth = .75, #defines the line thickness around the white dot
+if __name__ == "__main__":
+    myfunc.set_plot_backend(CONFIG.debug_show_plot)    #uses the faster Agg backend unless the plot is previewed
 
-	)
-#sns.set_axis_labels("", "")
-#g.legend.set_title("")
+    # OPEN FILES AND GENERATE PATH NAMES
+    FileCSV = myfunc.get_file_from_cmd()
+    #FileCSV = myfunc.get_data_path("your_file_goes_here")
 
+    # READ IN THE DATA AND GENERATE THE VIOLIN PLOTS
+    DataSet = myplots.read_plot_data(FileCSV, CONFIG)
+    g = myplots.facet_violin(DataSet, CONFIG)
 
-# SHOW AND SAVE THE FIGURE
-#plt.show()
-g = g.figure
-g.savefig(mySVGOut)
\ No newline at end of file
+    # SHOW AND SAVE THE FIGURE
+    myplots.save_figure(g, FileCSV, plot_type=PLOT_TYPE, extension=CONFIG.formats, dpi=CONFIG.dpi, show=CONFIG.debug_show_plot)
@@ -2,17 +2,10 @@
 """Generates a BarSet Plot from a provided dataset."""
 
 # NECESSARY IMPORTS
-import seaborn as sns
-import pandas as pd
-import matplotlib.pyplot as plt
 import functions.parameters.all_file_funcs as myfunc
+import functions.plots as myplots
 
-# READ IN THE FILES AND GENERATE PATH / CATEGORICAL NAMES
-FileCSV = myfunc.get_data_path(myfunc.get_file_from_cmd())
-#FileCSV = myfunc.get_data_path("your_file_goes_here")
-mySVGOut = myfunc.my_output_file(FileCSV, plot_type="BarSet",extension="svg")
-DataSet = pd.read_csv(FileCSV,index_col = 0)
-
+# PLOT CONFIGURATION
 #TissueOrder = ["Colon"]	                           #Must edit for new dataset
 TissueOrder = ["mLN","PeyersPatch","Colon"]	           #Must edit for new dataset
 
@@ -24,43 +17,36 @@ TissueOrder = ["mLN","PeyersPatch","Colon"]	           #Must edit for new datase
 TreatmentOrder = ["Control","Amp","AmpHydroxybutyrate","AmpTributyrin"]
 
 # GENERATE COLOR WHEELS
-WhiteWheel = myfunc.get_white_wheel(DataSet, "Treatment")
 Colors = myfunc.get_default_wheel()
 
-g = sns.catplot(data=DataSet,
-    kind="bar",                   #type of categorical graph
-	col = "Tissue",               #column separator category
-	col_order = TissueOrder,      #column ordering
+PLOT_TYPE = "BarSet"
+CONFIG = myplots.PlotConfig(
+    col="Tissue",                 #column separator category
+    col_order=TissueOrder,        #column ordering
     x="Treatment",                #x axis data
-    y="Log_Copies",               #y axis data 
-    order = TreatmentOrder,	      #defines the order of the tissues on the x axis
-    ci="sd",                      #specifies whether using an error bar or a confidence interval
-    errwidth = .75,	              #line width of the error bar
-    capsize = .1,	              #controls the cap of the stdev whisker
-    palette= Colors,              #controls the graph colors, each unique value of treatment should have a hex code
- 	saturation = 1,               #saturation of color (1 is full, 0 is black and white)
-    height=6,		              #controls the height of the graph
-    aspect = .5,                  #changes the aspect ratio of the graph, 4 Categories
-#    aspect = 1, #3 Categories
-#    aspect = .7, #2 Categories
-	linewidth = 1,                #defines the line thickness around the bar
-	edgecolor = "black"	          #defines the line color around the bar
+    y="Log_Copies",               #y axis data
+    hue="Treatment",              #colors the bars by treatment
+    order=TreatmentOrder,         #defines the order of the treatments on the x axis
+    hue_order=TreatmentOrder,
+    palette=Colors.colors,        #controls the graph colors, each unique value of treatment should have a hex code
+    height=6,                     #controls the height of the graph
+    aspect=.5,                    #changes the aspect ratio of the graph, 4 Categories
+    dot_size=5,                   #defines size of dot
+    legend=False,
+    index_col=0,
 )
 
-# GENERATE THE SWARMPLOT
-ax = sns.catplot(data=DataSet,
-    kind="swarm", 
-	col = "Tissue",
-	col_order = TissueOrder,
-    x="Treatment", 
-    y="Log_Copies", 
-    order = TreatmentOrder,	      #defines the order of the tissues on the x axis
-	palette = WhiteWheel,         #defines color palette to make sure every dot is white
-	edgecolor = "black",          #defines edges of the plot points
-	height = 6,	                  #defines size of dot
-	linewidth = .75,              #defines the line thickness around the white dot
-)
+if __name__ == "__main__":
+    myfunc.set_plot_backend(CONFIG.debug_show_plot)    #uses the faster Agg backend unless the plot is previewed
+
+    # READ IN THE FILES AND GENERATE PATH NAMES
+    FileCSV = myfunc.get_file_from_cmd()
+    #FileCSV = myfunc.get_data_path("your_file_goes_here")
+
+    # READ IN THE DATA AND GENERATE THE BARPLOTS
+    DataSet = myplots.read_plot_data(FileCSV, CONFIG)
+    Summary = myplots.summarize_bars(DataSet, CONFIG)       #n, mean, sd, sem and 95% CI of every bar
+    g = myplots.barset(DataSet, CONFIG, Summary)
 
-# SHOW / SAVE THE OUTPUT
-#plt.show()
-g.savefig(mySVGOut)
\ No newline at end of file
+    # SHOW / SAVE THE OUTPUT (the summary is saved next to the image as a .csv file)
+    myplots.save_figure(g, FileCSV, plot_type=PLOT_TYPE, extension=CONFIG.formats, dpi=CONFIG.dpi, show=CONFIG.debug_show_plot, table=Summary)
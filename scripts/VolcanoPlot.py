@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+"""
+Creates a volcano plot (log2 fold change against -log10 p, up/down/not significant features colored) from a
+provided .csv formatted dataset with one row per feature, e.g. the TE expression table Duod_GFSPF.csv.
+"""
+
+# NECESSARY MODULE IMPORTS
+import functions.parameters.all_file_funcs as myfunc
+import functions.plots as myplots
+
+# PLOT CONFIGURATION
+PLOT_TYPE = "Volcano"
+CONFIG = myplots.VolcanoConfig(
+    index_col=0,                    #the first column names the features (e.g. the TE families)
+    numerator="SPF",                #positive fold changes are higher in this column...
+    denominator="GF",               #...than in this one
+    ratio="difference",             #the GF/SPF columns are already log values, so the fold change is their difference
+    pvalue="Pval",
+    log_pvalues=True,               #the Pval column holds -log10 p
+    correction="BH",                #"BH", "BY", "storey" (q-values), "holm" or "bonferroni"
+    groups=None,                    #a column (e.g. "Tissue") whose values are corrected separately, None corrects all together
+    alpha=0.05,
+    min_fold_change=1,              #dashed lines at +-1 (twofold)
+    top_labels=10,                  #names of the most significant hits
+    xlim=None,                      #None pulls the range from the data
+    ylim=None,
+    title="",                       #YOUR TITLE GOES HERE
+)
+
+if __name__ == "__main__":
+    myfunc.set_plot_backend(CONFIG.debug_show_plot)    #uses the faster Agg backend unless the plot is previewed
+    from functions.volcano import volcano_table
+
+    # OPEN FILES AND GENERATE PATH NAMES
+    myCSV = myfunc.get_file_from_cmd()
+    #myCSV = myfunc.get_data_path("Duod_GFSPF.csv") #your file goes here if only running this script
+
+    # READ IN THE DATA SET, CLASSIFY THE FEATURES AND GENERATE THE VOLCANO PLOT
+    DataSet = myplots.read_plot_data(myCSV, CONFIG)
+    table = volcano_table(DataSet, CONFIG)
+    g = myplots.volcano(DataSet, CONFIG, table)
+
+    # OUTPUT AND SAVE THE PLOT (the fold change, p-values and class of every feature go to <image>_summary.csv)
+    print("saving to " + myplots.save_figure(g, myCSV, plot_type=PLOT_TYPE, extension=CONFIG.formats, dpi=CONFIG.dpi,
+                                             table=table.reset_index(), show=CONFIG.debug_show_plot))
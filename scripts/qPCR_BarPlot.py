@@ -3,24 +3,26 @@
 """Generates a barplot with categorical swarmplot overlayed."""
 
 # NECESSARY IMPORTS
-import seaborn as sns
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
 import sys
-import os
-import re
+import functions.parameters.all_file_funcs as myfunc
+import functions.plots as myplots
+from functions.qpcr import QPCRConfig
+from functions.stats import StatsConfig
 
 ####################################################################################################
 # PUT ALL VARIABLES FROM YOUR DATASET HERE! THERE IS NO NEED TO EDIT THE CODE BELOW #
 
-#Your Filename
+#Your Filename (a filename given on the command line, e.g. by the batch runner, is used instead)
 filename = "datasets/KN_fixed_results.csv"
 format_based_on_filename = False
+if len(sys.argv) > 1:
+    filename = "datasets/" + sys.argv[1]
+    format_based_on_filename = True
 alternate_title = "MHVY_fixed_barplot"
 
 #formatting and debugging
 debug_show_plot = False #Set to True if you want to view the plot locally. May break saved file.
+output_formats = ["svg"]  #any of "svg", "pdf", "png" and "jpeg", all saved from the same plot
 
 #The order of tissues to plot on the graph (these must match the names in your file EXACTLY)
 TissueOrder = ["Adipose Tissue","Cecum","Distal Colon","Liver","mLN","Omentum","PP","Proximal Colon","SI Zone A","SI Zone B","SI Zone C","SI Zone D","SI Zone E","Spleen"]	
@@ -28,9 +30,33 @@ TissueOrder = ["Adipose Tissue","Cecum","Distal Colon","Liver","mLN","Omentum","
 #Treatment/Infection Order (these must match the secondary names in your file EXACTLY)
 TreatmentOrder = ["Uninfected","MHV-Y","yHV68","yHV68 + MHV-Y"]
 
-#Color Customization (the white_overlay_palette should match the bar_split)
+#Color Customization (one color per bar_split value)
 custom_colors = ["#AE3899","#CF92DD","#009933","#EDAB21"]
-white_overlay_palette = "Sample Name"
+
+#Filtering (keeps only the rows where filter_col is filter_val, and drops the bar_split values in ignore_values)
+extra_filter = False
+filter_col = "Viral Genotype"
+filter_val = "MHV-Y"
+ignore_values = []
+outlier_filter = None         #None, "iqr" (drops y values above Q3 + 1.5 IQR or below 0) or "quantile" (drops the top 5%)
+
+#Large exports: set to a number of rows (e.g. 200000) to read the file in chunks instead of all at once
+stream_chunksize = None
+
+#Relative expression from raw CT values (set compute_expression to True to plot y_vals = "Relative Expression",
+#"LogValue", "Delta Ct" or "Delta Delta Ct" straight from an instrument export)
+compute_expression = False
+reference_gene = "GAPDH"
+control_group = "Uninfected"
+group_column = "Sample Name"
+sample_columns = ["Tissue", "Sample ID", "Sample Name"]
+
+#Statistics (tests between the bar_split groups of every x value, drawn as brackets over the bars)
+annotate_stats = False
+stats_test = "Mann-Whitney"   #"Mann-Whitney", or "permutation"/"bootstrap" for small groups (e.g. 5 mice per group)
+stats_correction = None       #None, "bonferroni", "holm", "BH" (Benjamini-Hochberg), "BY" or "storey" (q-values)
+correct_within_x = False      #corrects the tests of every x value separately instead of all together
+line_place = "inside"         #"inside" (over the bars) or "outside" (above the plot)
 
 #x and y axis data (these must match your column names EXACTLY)
 x_vals = "Sample Name"
@@ -43,115 +69,48 @@ title = "MHVY"
 
 ####################################################################################################
 
-# FUNCTION DEFINITIONS
-def my_output_file(filename: str, plot_type: str ="Plot", extension: str="svg", csv:bool=True) -> str:
-    """Creates a regex to rename the output file based on the original .csv file. The plot type adds the name of
-       the plot to the filename, and the extension specifies what file format to save (svg, png, jpeg, or pdf)."""
-    try:
-        if extension in ["svg", "png", "pdf", "jpeg", "jpg"]:
-            just_name = filename.split("/")
-            if csv == True:
-                new_name = re.sub(".csv$","_Image" + plot_type + "." + extension, just_name[::-1][0],1)
-            else:
-                new_name = filename + "_Image" + plot_type + "." + extension
-            return os.getcwd() + "/generated_images/" + new_name
-    except AttributeError:
-        print("_io.TextIOWrapper object has no attribute 'split'. Double check that the filename passed is a string.")
-        sys.exit(1)
-
-# PROCESS THE FILE
-#FileCSV = myfunc.get_file_from_cmd()
-#FileCSV = "qPCR_test.csv"
-if format_based_on_filename == True:
-    mySVGOut = my_output_file(filename, plot_type="Bar",extension="svg")  #Generates a regular expression to automate the output filename
-else:
-    mySVGOut = my_output_file(alternate_title, plot_type="Bar",extension="svg",csv=False)
-
-# READ IN THE DATA
-DataSet = pd.read_csv(filename,header=0)       #Creates a 2D editable table
-
-#DataSet[(np.abs(stats.zscore(DataSet)) < 3).all(axis=1)]
-
-# ATTEMPT TO REMOVE OUTLIERS
-
-#q = DataSet[y_vals].quantile(0.95)
-
-#final_df = DataSet[DataSet[y_vals] < q]
-final_df = DataSet
-
-# separate out the relative sample distinctions (need them to be separate for labeling purposes)
-#DataSet[['Mouse', 'Tissue']] = DataSet['Tissue & Sample ID'].str.split(' - ', n=1, expand=True)
-
-#print(DataSet.head())
-
-#FIRST VARIABLE
-# TissueOrder = ["Colon"]	                       #Must edit for new dataset, a list of labels
-
-#SECOND (OPTIONAL) VARIABLE
-# TreatmentOrder = ["MHV-Y", "MHV-Y_dHE"]            #A list of labels
-# TreatmentOrder = ["SPF", "GF"]
-# TreatmentOrder = ["WT", "CD64-creSTING-flox"]
-
-#GENERATE COLOR WHEELS
-
-WhiteWheel = ["#FFFFFF"] * len(list(set(DataSet[white_overlay_palette])))
-
-#GENERATE THE BARPLOT
-### Note: The x, y, and hue axes should be the same for both the catplot and the swarmplot, as this allows seaborn to map the dots correctly to each bar.
-### The palette for the swarmplot should be the WhiteWheel generated above, as it will force all dots to be the same color.
-
-g = sns.catplot(data=final_df,
-    kind="bar",                 #specifies the kind of categorical plot
-    #row = "Tissue",            #determines the faceting of the grid, creates separate plots
-    x=x_vals,                   #x axis data
-    y=y_vals,                   #y axis data
-    hue=bar_split,	            #defines how the bars will be split
-    order = TissueOrder,	    #defines the order of the tissues on the x axis
-    #hue_order = TreatmentOrder, #defines the order of the treatment on the X axis
-    errorbar="sd",              #specifies whether using an error bar or a confidence interval
-    err_kws={'linewidth':0.75},	            #line width of the error bar
-    capsize = .1,	            #controls the cap of the stdev whisker
-    palette=custom_colors,      #controls the colors on the graph, each value of Treatment must have a hex code
- 	saturation = 1,             #controls the saturation of the color (1 is full, 0 is black and white)
-    height=6,		            #controls the height of the graph
-    aspect = 1.2,               #controls the aspect ratio of the output graph, 4 Categories
-#    aspect = 1, #3 Categories
-#    aspect = .7, #2 Categories
-	linewidth = 1,              #defines the line thickness around the bar
-	edgecolor = "black"	        #defines the line color around the bar
-)
-#g.despine(left=True)
-g.set_axis_labels("", "")       #sets labels to be empty, default will pull from the data
-g.set_xlabels("")
-g.set_ylabels("")
-g.legend.set_title("")          #sets the plot title to be empty, default will pull from the data
-
-# DRAW CATEGORICAL SWARMPLOT TO SHOW OBSERVATIONS
-
-ax = sns.swarmplot(data=final_df, 
-					x=x_vals,                 #x axis data
-					y=y_vals,             #y axis data
-					hue=bar_split,            #category separating the data by color
-					dodge = True,	            #Makes ure the dots are not plotted in the same column
-				    order = TissueOrder,        #specifies the order of data on the plot
-			        #hue_order = TreatmentOrder, #defines the order of the second variable on the X axis
-					palette = WhiteWheel,       #defines color palette to make sure every dot is white
-					edgecolor = "black",        #defines the edge color of the dots
-					size = 3,	                #defines size of dot
-					linewidth = .75,            #defines the line thickness around the white dot
-                    legend=False
+PLOT_TYPE = "qPCRBar"               #differs from BarPlot_Graph.py, so batch runs of both don't write the same files
+CONFIG = myplots.PlotConfig(
+    x=x_vals,
+    y=y_vals,
+    hue=bar_split,
+    order=TissueOrder,
+    #hue_order=TreatmentOrder,
+    palette=custom_colors,
+    dot_size=3,
+    height=6,
+    aspect=1.2,
+    ylim=(0, None),
+    axis_rotate=axis_rotate,
+    title=title,
+    filter_equals={filter_col: filter_val} if extra_filter else None,
+    filter_exclude={bar_split: ignore_values} if len(ignore_values) > 0 else None,
+    chunksize=stream_chunksize,
+    stat_filter=outlier_filter,
+    qpcr=QPCRConfig(reference=reference_gene, control=control_group, group_col=group_column,
+                    sample_cols=sample_columns) if compute_expression else None,
+    stats=StatsConfig(test=stats_test, correction=stats_correction, correct_within_x=correct_within_x, text_format="star", hide_non_significant=True,
+                      loc=line_place, line_height=0) if annotate_stats else None,
+    formats=output_formats,
+    debug_show_plot=debug_show_plot,
 )
 
-ax.set(ylim=(0, None))           #limits the y axis range 
-ax.set_xticklabels(ax.get_xticklabels(),rotation=axis_rotate) 
-ax.set_title(title)     
-#g._legend.remove()             #removes the legend from the plot
-
-# SHOW / SAVE THE PLOT
-
-g.set_xlabels("")
-g.set_ylabels("")   
-
-if debug_show_plot == True:
-    plt.show()
-plt.savefig(mySVGOut,bbox_inches="tight")          #saves the file to the generated_images folder
\ No newline at end of file
+if __name__ == "__main__":
+    myfunc.set_plot_backend(CONFIG.debug_show_plot)    #uses the faster Agg backend unless the plot is previewed
+
+    # READ IN THE DATA
+    DataSet = myplots.read_plot_data(filename, CONFIG)       #Creates a 2D editable table
+
+    # GENERATE THE BARPLOT
+    ### Note: The x, y, and hue axes are shared by the bars and the dots, so every dot is drawn over its own bar.
+    ### The bars are drawn from a summary table (n, mean, sd, sem and 95% CI of every bar) that is saved with the plot.
+    Summary = myplots.summarize_bars(DataSet, CONFIG)
+    g = myplots.qpcr_bar(DataSet, CONFIG, Summary)
+
+    # SHOW / SAVE THE PLOT
+    if format_based_on_filename == True:
+        myplots.save_figure(g, filename, plot_type=PLOT_TYPE, extension=CONFIG.formats, dpi=CONFIG.dpi,
+                            show=debug_show_plot, table=Summary, bbox_inches="tight")
+    else:
+        myplots.save_figure(g, alternate_title, plot_type=PLOT_TYPE, extension=CONFIG.formats, dpi=CONFIG.dpi, csv=False,
+                            show=debug_show_plot, table=Summary, bbox_inches="tight")
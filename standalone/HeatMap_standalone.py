@@ -115,8 +115,7 @@ if not READ_ONLY:
         filtered_df = heatmap_df
 
     if len(IGNORE_VALUES) > 0:
-        for rem in IGNORE_VALUES:
-            filtered_df = filtered_df[filtered_df[Y_VAL] != rem]
+        filtered_df = filtered_df[~filtered_df[Y_VAL].isin(IGNORE_VALUES)]
 
     #print(filtered_df.head())
     #print(qPCR_df.shape[0])
@@ -82,8 +82,7 @@ else:
     filtered_df = qPCR_df
 
 if len(IGNORE_VALUES) > 0:
-    for rem in IGNORE_VALUES:
-        filtered_df = filtered_df[filtered_df[BAR_SPLIT] != rem]
+    filtered_df = filtered_df[~filtered_df[BAR_SPLIT].isin(IGNORE_VALUES)]
 
 
 print(filtered_df.head())